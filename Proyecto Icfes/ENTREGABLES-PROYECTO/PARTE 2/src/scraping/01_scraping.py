@@ -25,6 +25,13 @@ import re, ast
 UA = "ETL-Class/1.0 (contact: student@example.com)"
 HEADERS = {"User-Agent": UA}
 
+# Sesión compartida: keep-alive (un solo handshake TCP/TLS por host) + compresión
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+SESSION.headers["Accept-Encoding"] = "gzip, deflate"
+SESSION.mount("https://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=8))
+SESSION.mount("http://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
 # Directorio de datos según estructura
 DATA_DIR = Path("../data/raw")
 DATA_DIR.mkdir(parents=True, exist_ok=True)
@@ -77,7 +84,7 @@ def fetch_html(url, headers=None, max_retries=5, base_sleep=1.5, verbose=True):
     for v in variants:
         for attempt in range(1, max_retries+1):
             try:
-                r = requests.get(v, headers=headers, timeout=20, verify=False)  
+                r = SESSION.get(v, headers=headers, timeout=20, verify=False)
                 if verbose:
                     print(f"GET {v} -> {r.status_code}")
 
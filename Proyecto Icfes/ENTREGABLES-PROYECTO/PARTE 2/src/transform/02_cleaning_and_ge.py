@@ -807,25 +807,30 @@ print("Validator creado correctamente con el dataset:", validator.active_batch.d
 # In[73]:
 
 
+# meta.report_key: nombre de la expectativa en ge_report.json (PARTE 3 compila esta suite);
+# meta.critical: si falla, la tarea great_expectations del DAG falla
 # === 1. Expectativas de integridad ===
-validator.expect_column_values_to_not_be_null("punt_global")
-validator.expect_column_values_to_not_be_null("estu_depto_reside")
+validator.expect_column_values_to_not_be_null("punt_global", meta={"report_key": "not_null_punt_global", "critical": True})
+validator.expect_column_values_to_not_be_null("estu_depto_reside", meta={"report_key": "not_null_depto_reside", "critical": True})
 
 # === 2. Expectativas de dominio / rangos ===
-validator.expect_column_values_to_be_between("punt_global", min_value=0, max_value=500)
-validator.expect_column_values_to_be_between("pobreza_monetaria_depto", min_value=0, max_value=100)
-validator.expect_column_values_to_be_between("idh_depto", min_value=0, max_value=1)
+validator.expect_column_values_to_be_between("punt_global", min_value=0, max_value=500,
+                                            meta={"report_key": "range_punt_global_0_500", "critical": True})
+validator.expect_column_values_to_be_between("pobreza_monetaria_depto", min_value=0, max_value=100,
+                                            meta={"report_key": "range_pobreza_0_100"})
+validator.expect_column_values_to_be_between("idh_depto", min_value=0, max_value=1,
+                                            meta={"report_key": "range_idh_0_1"})
 
 # === 3. Expectativas de tipo de dato ===
-validator.expect_column_values_to_be_of_type("periodo", "int64")
-validator.expect_column_values_to_be_of_type("estu_pais_reside", "str")
+validator.expect_column_values_to_be_of_type("periodo", "int64", meta={"report_key": "type_periodo_int64"})
+validator.expect_column_values_to_be_of_type("estu_pais_reside", "str", meta={"report_key": "type_pais_str"})
 
 # === 4. Relación entre columnas ===
 validator.expect_column_pair_values_A_to_be_greater_than_B(
     column_A="punt_global",
     column_B="punt_matematicas",
     or_equal=True,
-    meta={"description": "punt_global debe ser >= punt_matematicas"}
+    meta={"description": "punt_global debe ser >= punt_matematicas", "report_key": "rule_global_ge_math"}
 )
 
 # === 5. Guardar la suite actualizada ===
@@ -0,0 +1,163 @@
+# bench/_synth.py
+"""
+Generador de un data_icfes_2024.csv sintético (las 53 columnas del crudo, mismos tipos)
+para medir transform / validación sin el archivo real, que no está en el repo.
+
+Las ubicaciones salen de data/staging/poblacion_municipios.csv, ponderadas por
+población, y se escriben como en el crudo del ICFES: departamentos sin tildes salvo
+BOGOTÁ / NARIÑO, abreviados (VALLE, NORTE SANTANDER, SAN ANDRES) y municipios en
+mayúsculas con tildes. Un ~0,3 % de estudiantes reside en el EXTRANJERO y algunos
+colegios figuran en DESCONOCIDO, como en los datos reales.
+"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+PARTE3 = Path(__file__).resolve().parents[1]
+STAGING_POBLACION = PARTE3 / "data" / "staging" / "poblacion_municipios.csv"
+
+COLUMNAS = [
+    "periodo", "estu_estudiante", "cole_area_ubicacion", "cole_bilingue", "cole_calendario",
+    "cole_caracter", "cole_depto_ubicacion", "cole_genero", "cole_jornada", "cole_mcpio_ubicacion",
+    "cole_naturaleza", "desemp_c_naturales", "desemp_ingles", "desemp_lectura_critica",
+    "desemp_matematicas", "desemp_sociales_ciudadanas", "estu_dedicacioninternet",
+    "estu_dedicacionlecturadiaria", "estu_depto_presentacion", "estu_depto_reside", "estu_genero",
+    "estu_grado", "estu_horassemanatrabaja", "estu_inse_individual", "estu_mcpio_presentacion",
+    "estu_mcpio_reside", "estu_nacionalidad", "estu_nse_establecimiento", "estu_nse_individual",
+    "estu_pais_reside", "fami_comecarnepescadohuevo", "fami_comecerealfrutoslegumbre",
+    "fami_comelechederivados", "fami_cuartoshogar", "fami_educacionmadre", "fami_educacionpadre",
+    "fami_estratovivienda", "fami_numlibros", "fami_personashogar", "fami_tienecomputador",
+    "fami_tieneinternet", "percentil_c_naturales", "percentil_global", "percentil_ingles",
+    "percentil_lectura_critica", "percentil_matematicas", "percentil_sociales_ciudadanas",
+    "punt_c_naturales", "punt_ingles", "punt_lectura_critica", "punt_matematicas",
+    "punt_sociales_ciudadanas", "punt_global",
+]
+
+# Columnas de texto no geográficas → valores posibles
+CATEGORIAS = {
+    "estu_estudiante": ["ESTUDIANTE"],
+    "cole_area_ubicacion": ["URBANO", "RURAL"],
+    "cole_calendario": ["A", "B", "OTRO"],
+    "cole_caracter": ["ACADÉMICO", "TÉCNICO", "TÉCNICO/ACADÉMICO", "NO APLICA"],
+    "cole_genero": ["MIXTO", "FEMENINO", "MASCULINO"],
+    "cole_jornada": ["MAÑANA", "TARDE", "COMPLETA", "UNICA", "NOCHE", "SABATINA"],
+    "cole_naturaleza": ["OFICIAL", "NO OFICIAL"],
+    "desemp_ingles": ["A-", "A1", "A2", "B1", "B+"],
+    "estu_dedicacioninternet": ["No Navega Internet", "30 minutos o menos",
+                                "Entre 30 y 60 minutos", "Entre 1 y 3 horas", "Más de 3 horas"],
+    "estu_dedicacionlecturadiaria": ["No leo por entretenimiento", "30 minutos o menos",
+                                     "Entre 30 y 60 minutos", "Entre 1 y 2 horas", "Más de 2 horas"],
+    "estu_genero": ["F", "M"],
+    "estu_horassemanatrabaja": ["0", "Menos de 10 horas", "Entre 11 y 20 horas",
+                                "Entre 21 y 30 horas", "Más de 30 horas"],
+    "estu_nacionalidad": ["COLOMBIA"],
+    "fami_comecarnepescadohuevo": ["Nunca o rara vez comemos eso", "1 o 2 veces por semana",
+                                   "3 a 5 veces por semana", "Todos o casi todos los días"],
+    "fami_comecerealfrutoslegumbre": ["Nunca o rara vez comemos eso", "1 o 2 veces por semana",
+                                      "3 a 5 veces por semana", "Todos o casi todos los días"],
+    "fami_comelechederivados": ["Nunca o rara vez comemos eso", "1 o 2 veces por semana",
+                                "3 a 5 veces por semana", "Todos o casi todos los días"],
+    "fami_cuartoshogar": ["Uno", "Dos", "Tres", "Cuatro", "Cinco", "Seis o mas"],
+    "fami_educacionmadre": ["Primaria completa", "Secundaria (Bachillerato) completa",
+                            "Técnica o tecnológica completa", "Educación profesional completa",
+                            "Postgrado", "No sabe", "Ninguno"],
+    "fami_educacionpadre": ["Primaria completa", "Secundaria (Bachillerato) completa",
+                            "Técnica o tecnológica completa", "Educación profesional completa",
+                            "Postgrado", "No sabe", "Ninguno"],
+    "fami_numlibros": ["0 A 10 LIBROS", "11 A 25 LIBROS", "26 A 100 LIBROS", "MÁS DE 100 LIBROS"],
+    "fami_personashogar": ["1 a 2", "3 a 4", "5 a 6", "7 a 8", "9 o más"],
+}
+
+# Departamento del staging (tal como lo publica municipios.com.co) → rótulo del crudo ICFES
+_DEPTO_ICFES = {
+    "Valle del Cauca": "VALLE", "Norte de Santander": "NORTE SANTANDER", "San Andrés": "SAN ANDRES",
+    "Nariño": "NARIÑO", "Atlántico": "ATLANTICO", "Bolívar": "BOLIVAR", "Boyacá": "BOYACA",
+    "Caquetá": "CAQUETA", "Chocó": "CHOCO", "Córdoba": "CORDOBA", "Guainía": "GUAINIA",
+    "Quindío": "QUINDIO", "Vaupés": "VAUPES",
+}
+# Municipios del staging con otro nombre en el ICFES (inverso de map_mpios de transform)
+_MPIO_ICFES = {
+    "Armero Guayabal": "ARMERO", "Cartagena": "CARTAGENA DE INDIAS", "Chibolo": "CHIVOLO",
+    "Don Matías": "DONMATÍAS", "Mariquita": "SAN SEBASTIÁN DE MARIQUITA", "Tumaco": "SAN ANDRÉS DE TUMACO",
+    "Santa Cruz de Lorica": "LORICA", "Ubaté": "VILLA DE SAN DIEGO DE UBATÉ", "Sincé": "SAN LUIS DE SINCÉ",
+}
+_PAISES_EXTRANJERO = ["VENEZUELA", "ECUADOR", "ESTADOS UNIDOS", "ESPAÑA", "PANAMÁ"]
+
+
+def ubicaciones() -> pd.DataFrame:
+    """(depto, mpio) en la grafía del ICFES y su población, a partir del staging."""
+    df = pd.read_csv(STAGING_POBLACION, encoding="utf-8-sig")
+    pob = (df["Poblacion"].astype(str).str.replace("Población", "", regex=False)
+           .str.replace(".", "", regex=False).str.strip().astype(int))
+    depto = df["Departamento"].map(lambda d: _DEPTO_ICFES.get(d, d.upper()))
+    mpio = df["Municipio"].map(lambda m: _MPIO_ICFES.get(m, m.upper()))
+    bogota = df["Municipio"].eq("Bogotá")
+    depto[bogota], mpio[bogota] = "BOGOTÁ", "BOGOTÁ D.C."
+    return pd.DataFrame({"depto": depto, "mpio": mpio, "poblacion": pob})
+
+
+def icfes_sintetico(n: int, seed: int = 0, periodo: int = 20242) -> pd.DataFrame:
+    """DataFrame con las 53 columnas del crudo del ICFES y `n` filas."""
+    rng = np.random.default_rng(seed)
+    ub = ubicaciones()
+    p = ub["poblacion"].to_numpy(float)
+    p /= p.sum()
+    deptos = ub["depto"].to_numpy(object)
+    mpios = ub["mpio"].to_numpy(object)
+
+    def lugar(base, frac_igual):
+        otro = rng.choice(len(ub), size=n, p=p)
+        return np.where(rng.random(n) < frac_igual, base, otro)
+
+    reside = rng.choice(len(ub), size=n, p=p)
+    cole = lugar(reside, 0.9)
+    presentacion = lugar(reside, 0.95)
+
+    data = {"periodo": np.full(n, periodo, dtype=np.int64)}
+    for col, valores in CATEGORIAS.items():
+        data[col] = np.array(valores, dtype=object)[rng.integers(0, len(valores), n)]
+
+    data["cole_depto_ubicacion"] = deptos[cole]
+    data["cole_mcpio_ubicacion"] = mpios[cole]
+    desconocido = rng.random(n) < 0.001
+    data["cole_depto_ubicacion"][desconocido] = "DESCONOCIDO"
+    data["estu_depto_presentacion"] = deptos[presentacion]
+    data["estu_mcpio_presentacion"] = mpios[presentacion]
+    data["estu_depto_reside"] = deptos[reside]
+    data["estu_mcpio_reside"] = mpios[reside]
+    data["estu_pais_reside"] = np.full(n, "COLOMBIA", dtype=object)
+    extranjero = rng.random(n) < 0.003
+    data["estu_depto_reside"][extranjero] = "EXTRANJERO"
+    data["estu_mcpio_reside"][extranjero] = "EXTRANJERO"
+    data["estu_pais_reside"][extranjero] = rng.choice(_PAISES_EXTRANJERO, size=int(extranjero.sum()))
+
+    data["cole_bilingue"] = rng.integers(0, 2, n)
+    data["estu_grado"] = np.full(n, 11, dtype=np.int64)
+    data["fami_estratovivienda"] = rng.integers(0, 7, n)
+    data["fami_tienecomputador"] = rng.integers(0, 2, n)
+    data["fami_tieneinternet"] = rng.integers(0, 2, n)
+    data["estu_inse_individual"] = np.round(rng.normal(55, 10, n), 6)
+    data["estu_nse_individual"] = rng.integers(1, 5, n).astype(float)
+    data["estu_nse_establecimiento"] = rng.integers(1, 5, n).astype(float)
+
+    materias = ["c_naturales", "lectura_critica", "matematicas", "sociales_ciudadanas", "ingles"]
+    puntajes = {m: np.clip(rng.normal(52, 11, n).round(), 0, 100).astype(np.int64) for m in materias}
+    for m in materias:
+        data[f"punt_{m}"] = puntajes[m]
+        data[f"percentil_{m}"] = np.clip(puntajes[m], 1, 100)
+        if m != "ingles":
+            data[f"desemp_{m}"] = np.clip(puntajes[m] // 25 + 1, 1, 4)
+    # Ponderación del ICFES: inglés pesa 1, las otras cuatro pesan 3 (sobre 13) → 0..500
+    suma = sum(3 * puntajes[m] for m in materias[:4]) + puntajes["ingles"]
+    data["punt_global"] = np.round(suma * 5 / 13).astype(np.int64)
+    data["percentil_global"] = np.clip(data["punt_global"] // 5, 1, 100)
+
+    return pd.DataFrame(data)[COLUMNAS]
+
+
+def escribir_csv(path: Path, n: int, seed: int = 0, periodo: int = 20242) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    icfes_sintetico(n, seed=seed, periodo=periodo).to_csv(path, index=False, encoding="utf-8")
+    return path
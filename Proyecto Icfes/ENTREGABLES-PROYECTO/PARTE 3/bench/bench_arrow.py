@@ -0,0 +1,123 @@
+# bench/bench_arrow.py
+"""
+Texto como object de Python vs. string[pyarrow] (ICFES_STRING_DTYPE=arrow) sobre el mismo
+crudo sintético (bench/_synth.py). Cada modo corre en un subproceso propio:
+
+- transform() completo, con el tiempo de cada paso de data/output/transform_metrics.json
+  y el pico de RSS del proceso;
+- memoria del DataFrame leído del crudo y de la lectura del dataset curado (lo que hacen
+  great_expectations y load), y una operación de texto sobre las columnas str.
+
+Al final comprueba que los CSV y el contenido del Parquet sean iguales en ambos modos.
+
+    python bench/bench_arrow.py --rows 2000000
+"""
+import argparse
+import filecmp
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PARTE3 = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PARTE3))
+
+from bench.bench_transform import _correr, _huella_parquet, _pico_rss_mb  # noqa: E402
+
+MODOS = ["object", "arrow"]
+
+
+def _medir(icfes: Path, out: Path) -> dict:
+    """Dentro del subproceso (ICFES_STRING_DTYPE ya fijado): transform, lecturas y texto."""
+    import pandas as pd
+
+    from etl import schema
+    from etl.curated import leer_curated
+    from etl.transform import cols_drop
+
+    r = _correr(icfes, out)
+    metricas = json.loads((out / "transform_metrics.json").read_text(encoding="utf-8"))
+    r["pasos"] = {p["paso"]: p["segundos"] for p in metricas["pasos"]}
+
+    df = schema.leer_icfes(icfes, cols_drop)
+    r["df_mb"] = round(schema.memoria_mb(df), 1)
+    texto = [c for c in df.columns if pd.api.types.is_string_dtype(df[c]) and df[c].dtype != "category"]
+    r["texto_mb"] = round(schema.memoria_mb(df[texto]), 1)
+    t0 = time.perf_counter()
+    for c in texto:
+        df[c].str.startswith("E").sum()
+        df[c].str.len().max()
+    r["str_ops_s"] = round(time.perf_counter() - t0, 2)
+    del df
+
+    t0 = time.perf_counter()
+    curado = leer_curated(ruta=out / "curated")
+    r["curado_s"] = round(time.perf_counter() - t0, 2)
+    r["curado_mb"] = round(schema.memoria_mb(curado), 1)
+    r["pico_total_mb"] = round(_pico_rss_mb(), 1)
+    return r
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=2_000_000)
+    ap.add_argument("--workdir", type=Path, default=None, help="reutiliza el CSV sintético entre corridas")
+    ap.add_argument("--_run", nargs=2, metavar=("ICFES", "OUT"), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args._run:
+        print("@@" + json.dumps(_medir(Path(args._run[0]), Path(args._run[1]))))
+        return
+
+    from bench._synth import escribir_csv
+
+    work = args.workdir or Path(tempfile.mkdtemp(prefix="bench_arrow_"))
+    work.mkdir(parents=True, exist_ok=True)
+    icfes = work / f"data_icfes_sintetico_{args.rows}.csv"
+    if not icfes.exists():
+        escribir_csv(icfes, args.rows)
+    print(f"Entrada: {args.rows:,} filas, {icfes.stat().st_size / 1024**2:.0f} MB")
+
+    resultados = {}
+    for modo in MODOS:
+        out = work / f"salida_{modo}"
+        env = dict(os.environ, ICFES_STRING_DTYPE=modo, TRANSFORM_MODE="full", TRANSFORM_EXPORT_CSV="1")
+        proc = subprocess.run([sys.executable, __file__, "--_run", str(icfes), str(out)],
+                              env=env, capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(proc.stdout[-2000:], proc.stderr[-4000:])
+            raise SystemExit(f"Falló el modo {modo}")
+        linea = next(l for l in proc.stdout.splitlines() if l.startswith("@@"))
+        resultados[modo] = dict(json.loads(linea[2:]), salida=out)
+
+    o, a = resultados["object"], resultados["arrow"]
+    filas = [
+        ("DataFrame del crudo (MB)", o["df_mb"], a["df_mb"]),
+        ("  columnas de texto (MB)", o["texto_mb"], a["texto_mb"]),
+        ("str.startswith + str.len (s)", o["str_ops_s"], a["str_ops_s"]),
+        ("transform completo (s)", o["segundos"], a["segundos"]),
+        ("pico RSS del transform (MB)", o["pico_rss_mb"], a["pico_rss_mb"]),
+    ]
+    filas += [(f"  {paso} (s)", o["pasos"][paso], a["pasos"].get(paso, float("nan")))
+              for paso in o["pasos"] if o["pasos"][paso] >= 0.05]
+    filas += [
+        ("lectura del curado (s)", o["curado_s"], a["curado_s"]),
+        ("DataFrame del curado (MB)", o["curado_mb"], a["curado_mb"]),
+    ]
+    print(f"\n{'':40s} {'object':>10s} {'arrow':>10s} {'arrow/object':>13s}")
+    for nombre, vo, va in filas:
+        print(f"{nombre:40s} {vo:10.2f} {va:10.2f} {va / vo if vo else float('nan'):12.2f}x")
+
+    iguales = filecmp.cmp(o["csv"], a["csv"], shallow=False)
+    iguales_pq = _huella_parquet(o["salida"] / "curated") == _huella_parquet(a["salida"] / "curated")
+    print(f"\nCSV idénticos: {'sí' if iguales else 'NO'} · Parquet con el mismo contenido: "
+          f"{'sí' if iguales_pq else 'NO'}")
+    if not (iguales and iguales_pq):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# bench/bench_extract_concurrency.py
+"""
+Compara el scraping de población municipal en serie vs. concurrente contra el
+servidor local (bench/fixture_server.py). No toca sitios reales.
+
+    python bench/bench_extract_concurrency.py --limit 300 --latency 0.05
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bench.fixture_server import FixtureServer, FIXTURES  # noqa: E402
+from etl import extract  # noqa: E402
+from etl.crawl import CrawlScheduler  # noqa: E402
+from etl.http_client import HttpClient  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--limit", type=int, default=300, help="municipios a descargar (0 = todos)")
+    ap.add_argument("--latency", type=float, default=0.05, help="latencia simulada por request (s)")
+    ap.add_argument("--workers", type=int, default=extract.SCRAPE_WORKERS)
+    ap.add_argument("--per-host", type=int, default=extract.SCRAPE_PER_HOST)
+    ap.add_argument("--delay", type=float, default=0.0, help="intervalo por host sin Crawl-delay (s)")
+    ap.add_argument("--max-per-host", type=int, default=extract.SCRAPE_MAX_PER_HOST,
+                    help="techo de la concurrencia AIMD por host")
+    ap.add_argument("--capacity", type=int, default=None,
+                    help="concurrencia que aguanta el servidor antes de responder 429")
+    ap.add_argument("--crawl-delay", type=int, default=None,
+                    help="Crawl-delay (s, entero como lo lee urllib.robotparser) a publicar en robots.txt")
+    args = ap.parse_args()
+
+    # Sin caché en disco: cada corrida debe ir a la red (local)
+    extract.HTTP_CLIENT = HttpClient(headers=extract.HEADERS, store=None,
+                                     pool_maxsize=max(args.workers, args.max_per_host))
+    robots = "User-agent: *\nAllow: /\n"
+    if args.crawl_delay is not None:
+        robots += f"Crawl-delay: {args.crawl_delay}\n"
+
+    html_mun = (FIXTURES / "municipios_colombia.html").read_text(encoding="utf-8")
+    df_municipios = extract._listado_municipios(html_mun)
+    if args.limit:
+        df_municipios = df_municipios.head(args.limit)
+
+    with FixtureServer(latency=args.latency, robots=robots, capacity=args.capacity) as srv:
+        df_local = df_municipios.assign(URL=df_municipios["URL"].map(srv.local_url))
+
+        resultados = {}
+        for nombre, workers in (("serie", 1), ("concurrente", args.workers)):
+            scheduler = CrawlScheduler(extract.HTTP_CLIENT, extract.UA, per_host=args.per_host,
+                                       max_per_host=args.max_per_host, default_delay=args.delay)
+            t0 = time.perf_counter()
+            df = extract.scrape_poblacion_municipios(df_local, workers=workers, scheduler=scheduler)
+            resultados[nombre] = (time.perf_counter() - t0, df)
+        throttled = srv.throttled
+
+    t_serie, df_serie = resultados["serie"]
+    t_conc, df_conc = resultados["concurrente"]
+    assert df_serie.equals(df_conc), "El modo concurrente no reproduce el resultado en serie"
+
+    n = len(df_municipios)
+    print(f"\nPáginas: {n}  latencia={args.latency}s  por_host={args.per_host}  delay={args.delay}s")
+    print(f"  serie        : {t_serie:7.2f}s  ({n / t_serie:7.1f} pág/s)")
+    print(f"  concurrente  : {t_conc:7.2f}s  ({n / t_conc:7.1f} pág/s)  workers={args.workers}")
+    print(f"  speedup      : {t_serie / t_conc:7.2f}x")
+    if args.capacity is not None:
+        print(f"  429 del servidor (capacidad={args.capacity}): {throttled}")
+
+
+if __name__ == "__main__":
+    main()
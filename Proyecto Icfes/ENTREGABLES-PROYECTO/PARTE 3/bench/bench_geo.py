@@ -0,0 +1,127 @@
+# bench/bench_geo.py
+"""
+Búsqueda de población municipal sobre (estu_depto_reside, estu_mcpio_reside) de un frame
+sintético (bench/_synth.py) al que se le meten errores de tipeo en una fracción de las filas:
+
+- texto            : Series indexada por (depto, municipio) normalizados, como antes;
+- códigos (frío)   : etl/geo.py sin índice en disco (asigna códigos y resuelve por trigramas);
+- códigos (memo)   : misma búsqueda con el índice y el memo que dejó la corrida anterior.
+
+Informa tiempo, filas con población y, de las resueltas por aproximación, cuántas
+cayeron en el municipio correcto.
+
+    python bench/bench_geo.py --rows 2000000 --ruido 0.02
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+PARTE3 = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PARTE3))
+
+from bench._synth import icfes_sintetico  # noqa: E402
+from etl import transform as tr  # noqa: E402
+from etl.geo import IndiceGeo, buscar_codigo  # noqa: E402
+from etl.normalize import normalizar_columnas, normalizar_serie  # noqa: E402
+
+COLS = ["estu_depto_reside", "estu_mcpio_reside"]
+
+
+def _errata(nombre: str, rng) -> str:
+    """Un error de tipeo: borra, duplica o permuta una letra interior."""
+    if len(nombre) < 6:
+        return nombre
+    i = int(rng.integers(1, len(nombre) - 2))
+    op = rng.integers(0, 3)
+    if op == 0:
+        return nombre[:i] + nombre[i + 1:]
+    if op == 1:
+        return nombre[:i] + nombre[i] + nombre[i:]
+    return nombre[:i] + nombre[i + 1] + nombre[i] + nombre[i + 2:]
+
+
+def _poblacion() -> pd.DataFrame:
+    """Referencia municipal normalizada como en transform._leer_referencias."""
+    df = pd.read_csv(tr.FILE_POBLACION_MUNICIPIO, encoding="utf-8")
+    df["Poblacion"] = (df["Poblacion"].astype(str).str.replace("Población", "", regex=False)
+                       .str.replace(".", "", regex=False).str.strip().astype(int))
+    df["Municipio_mapeado"] = normalizar_serie(df["Municipio"], tr.map_mpios)
+    df["Departamento_mapeado"] = normalizar_serie(df["Departamento"], tr.map_deptos)
+    df.loc[df["Municipio_mapeado"] == "BOGOTA D.C.", "Departamento_mapeado"] = "BOGOTÁ, D.C."
+    return df.drop_duplicates(["Departamento_mapeado", "Municipio_mapeado"])
+
+
+def por_texto(df, ref: pd.Series) -> np.ndarray:
+    """Búsqueda por las claves de texto (una vez por combinación distinta, como el antiguo _buscar)."""
+    cod_fila, combos = pd.factorize(pd.MultiIndex.from_arrays([df[c] for c in COLS]))
+    return ref.reindex(combos).to_numpy(dtype=float)[cod_fila]
+
+
+def por_codigos(df, geo: IndiceGeo, tabla: np.ndarray):
+    cod_depto = geo.codigos_depto(df[COLS[0]])
+    cod_mcpio = geo.codigos_mcpio(cod_depto, df[COLS[1]])
+    return buscar_codigo(cod_mcpio, tabla), cod_mcpio
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=2_000_000)
+    ap.add_argument("--ruido", type=float, default=0.02, help="fracción de filas con un error de tipeo")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    staging = PARTE3 / "data" / "staging"
+    tr.FILE_DANE_POBREZA = staging / "dane_pobreza_monetaria.csv"
+    tr.FILE_IDH_DEPTO = staging / "idh_departamentos.csv"
+    tr.FILE_POBLACION_MUNICIPIO = staging / "poblacion_municipios.csv"
+    tr.FILE_GEO_INDEX = Path(tempfile.mkdtemp(prefix="bench_geo_")) / "geo_index.json"
+
+    rng = np.random.default_rng(args.seed)
+    df = icfes_sintetico(args.rows, seed=args.seed)[COLS].copy()
+    normalizar_columnas(df, COLS[:1], tr.map_deptos)
+    normalizar_columnas(df, COLS[1:])
+    # Errores de tipeo: cada fila elegida lleva una variante fija de su municipio
+    limpio = df[COLS[1]].to_numpy(object)
+    distintos = pd.unique(limpio)
+    variantes = {m: _errata(m, rng) for m in distintos}
+    con_error = (rng.random(len(df)) < args.ruido) & (df[COLS[0]] != "EXTRANJERO").to_numpy()
+    df.loc[con_error, COLS[1]] = [variantes[m] for m in limpio[con_error]]
+    print(f"Frame: {len(df):,} filas, {df[COLS[1]].nunique():,} municipios distintos, "
+          f"{int(con_error.sum()):,} filas con error de tipeo ({args.ruido:.0%})")
+
+    ref_mpios = _poblacion()
+    ref_texto = ref_mpios.set_index(["Departamento_mapeado", "Municipio_mapeado"])["Poblacion"]
+
+    resultados = []
+    t0 = time.perf_counter()
+    pob = por_texto(df, ref_texto)
+    resultados.append(("texto", time.perf_counter() - t0, pob))
+
+    for nombre in ("códigos (frío)", "códigos (memo)"):
+        t0 = time.perf_counter()
+        refs = tr._leer_referencias()           # índice desde disco (la primera vez, vacío)
+        pob, cod_mcpio = por_codigos(df, refs["geo"], refs["poblacion_mcpio"])
+        refs["geo"].guardar()
+        resultados.append((nombre, time.perf_counter() - t0, pob))
+
+    # Municipio correcto de cada fila: el código de su nombre sin error
+    geo = refs["geo"]
+    correcto, _ = por_codigos(pd.DataFrame({COLS[0]: df[COLS[0]], COLS[1]: limpio}), geo,
+                              refs["poblacion_mcpio"])
+    aproximadas = con_error & ~np.isnan(pob)
+    aciertos = int((pob[aproximadas] == correcto[aproximadas]).sum())
+
+    print(f"\n{'búsqueda':18s} {'tiempo':>8s} {'filas con población':>20s}")
+    for nombre, segundos, valores in resultados:
+        print(f"{nombre:18s} {segundos:7.2f}s {int((~np.isnan(valores)).sum()):20,}")
+    print(f"\nFilas con error resueltas por aproximación: {int(aproximadas.sum()):,} de {int(con_error.sum()):,} "
+          f"({aciertos:,} en el municipio correcto) · memo: {len(geo.memo):,} nombres en {tr.FILE_GEO_INDEX}")
+
+
+if __name__ == "__main__":
+    main()
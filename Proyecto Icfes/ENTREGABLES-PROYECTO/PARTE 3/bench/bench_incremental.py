@@ -0,0 +1,80 @@
+# bench/bench_incremental.py
+"""
+Procesamiento incremental por periodo: arma un histórico de --periodos archivos sintéticos
+(data_icfes_<periodo>.csv), lo procesa completo y después mide cuánto tarda transform() al
+agregar un periodo más, volver a correr sin cambios y modificar el último archivo.
+
+    python bench/bench_incremental.py --periodos 4 --rows 500000 --rows-nuevo 500000
+"""
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PARTE3 = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PARTE3))
+
+
+def _periodo(i: int) -> int:
+    """20191, 20192, 20201, ... (dos periodos por año)."""
+    return (2019 + i // 2) * 10 + 1 + i % 2
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--periodos", type=int, default=4, help="archivos del histórico inicial")
+    ap.add_argument("--rows", type=int, default=300_000, help="filas por archivo del histórico")
+    ap.add_argument("--rows-nuevo", type=int, default=300_000, help="filas del periodo agregado")
+    ap.add_argument("--workdir", type=Path, default=None)
+    args = ap.parse_args()
+
+    from bench._synth import escribir_csv
+    from etl import transform as tr
+    from etl.curated import forma
+
+    work = args.workdir or Path(tempfile.mkdtemp(prefix="bench_incremental_"))
+    entrada, salida = work / "input", work / "output"
+    shutil.rmtree(salida, ignore_errors=True)
+    entrada.mkdir(parents=True, exist_ok=True)
+    salida.mkdir(parents=True)
+    for f in entrada.glob("data_icfes_*.csv"):
+        f.unlink()
+
+    staging = PARTE3 / "data" / "staging"
+    tr.FILE_DANE_POBREZA = staging / "dane_pobreza_monetaria.csv"
+    tr.FILE_IDH_DEPTO = staging / "idh_departamentos.csv"
+    tr.FILE_POBLACION_MUNICIPIO = staging / "poblacion_municipios.csv"
+    tr.DIR_ICFES, tr.BASE_OUTPUT, tr.OUT_CURATED = entrada, salida, salida / "curated"
+    tr.FILE_GEO_INDEX = salida / "geo_index.json"
+
+    for i in range(args.periodos):
+        escribir_csv(entrada / f"data_icfes_{_periodo(i)}.csv", args.rows, seed=i, periodo=_periodo(i))
+    print(f"Histórico: {args.periodos} archivos × {args.rows:,} filas en {entrada}")
+
+    def corrida(nombre):
+        t0 = time.perf_counter()
+        tr.transform()
+        segundos = time.perf_counter() - t0
+        filas, _ = forma(tr.OUT_CURATED)
+        return nombre, segundos, filas
+
+    resultados = [corrida("histórico completo")]
+    resultados.append(corrida("sin cambios"))
+    nuevo = entrada / f"data_icfes_{_periodo(args.periodos)}.csv"
+    escribir_csv(nuevo, args.rows_nuevo, seed=args.periodos, periodo=_periodo(args.periodos))
+    resultados.append(corrida(f"agrega {nuevo.name}"))
+    escribir_csv(nuevo, args.rows_nuevo, seed=args.periodos + 100, periodo=_periodo(args.periodos))
+    resultados.append(corrida(f"modifica {nuevo.name}"))
+
+    print(f"\n{'corrida':34s} {'tiempo':>8s} {'filas en el dataset':>20s}")
+    for nombre, segundos, filas in resultados:
+        print(f"{nombre:34s} {segundos:7.1f}s {filas:20,}")
+    esperado = args.periodos * args.rows + args.rows_nuevo
+    if resultados[-1][2] != esperado:
+        raise SystemExit(f"Filas finales {resultados[-1][2]:,} ≠ {esperado:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# bench/bench_normalize.py
+"""
+Normalización de las 6 columnas de ubicación del ICFES sobre un frame sintético de
+millones de filas (bench/_synth.py):
+
+- celda a celda : s.map(norm_txt).replace(map_deptos) / s.apply(norm_txt), como antes;
+- por únicos    : etl/normalize.normalizar_columnas (factorize → únicos → take).
+
+Verifica que ambos den exactamente lo mismo.
+
+    python bench/bench_normalize.py --rows 3000000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bench._synth import icfes_sintetico  # noqa: E402
+from etl.normalize import norm_txt, normalizar_columnas  # noqa: E402
+
+COLS_DEPTOS = ["cole_depto_ubicacion", "estu_depto_presentacion", "estu_depto_reside"]
+COLS_MPIOS = ["estu_mcpio_reside", "cole_mcpio_ubicacion", "estu_mcpio_presentacion"]
+# Subconjunto de map_deptos de transform (suficiente para ejercitar el mapeo)
+MAP_DEPTOS = {
+    "BOGOTA": "BOGOTÁ, D.C.", "VALLE": "VALLE DEL CAUCA", "QUINDIO": "QUINDÍO", "BOLIVAR": "BOLÍVAR",
+    "ATLANTICO": "ATLÁNTICO", "NARINO": "NARIÑO", "CORDOBA": "CÓRDOBA", "NORTE SANTANDER": "NORTE DE SANTANDER",
+    "BOYACA": "BOYACÁ", "CAQUETA": "CAQUETÁ", "CHOCO": "CHOCÓ", "GUAINIA": "GUAINÍA", "VAUPES": "VAUPÉS",
+    "SAN ANDRES": "SAN ANDRÉS, PROVIDENCIA Y SANTA CATALINA",
+}
+
+
+def celda_a_celda(df):
+    for c in COLS_DEPTOS:
+        df[c] = df[c].map(norm_txt).replace(MAP_DEPTOS)
+    for c in COLS_MPIOS:
+        df[c] = df[c].apply(norm_txt)
+    return df
+
+
+def por_unicos(df):
+    normalizar_columnas(df, COLS_DEPTOS, MAP_DEPTOS)
+    normalizar_columnas(df, COLS_MPIOS)
+    return df
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=3_000_000)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    base = icfes_sintetico(args.rows, seed=args.seed)[COLS_DEPTOS + COLS_MPIOS]
+    print(f"Frame sintético: {len(base):,} filas ({time.perf_counter() - t0:.1f}s)  "
+          f"valores distintos: {sum(base[c].nunique() for c in base):,} en {base.shape[1]} columnas")
+
+    tiempos = {}
+    resultados = {}
+    for nombre, fn in (("celda a celda", celda_a_celda), ("por únicos", por_unicos)):
+        df = base.copy()
+        t0 = time.perf_counter()
+        resultados[nombre] = fn(df)
+        tiempos[nombre] = time.perf_counter() - t0
+        print(f"  {nombre:14s}: {tiempos[nombre]:8.2f}s")
+
+    assert resultados["celda a celda"].equals(resultados["por únicos"]), "Los resultados difieren"
+    print(f"  speedup       : {tiempos['celda a celda'] / tiempos['por únicos']:8.1f}x  (resultados idénticos)")
+
+
+if __name__ == "__main__":
+    main()
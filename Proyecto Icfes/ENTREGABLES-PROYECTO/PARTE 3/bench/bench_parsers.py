@@ -0,0 +1,60 @@
+# bench/bench_parsers.py
+"""
+Micro-benchmark de la capa de parseo (etl/parsers.py) sobre los HTML guardados en
+data/input más una página de detalle de municipio sintética. Verifica que "bs4" y
+"lxml" devuelvan lo mismo y reporta el tiempo por página de cada uno.
+
+    python bench/bench_parsers.py --repeat 20
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bench.fixture_server import FIXTURES, detalle_html  # noqa: E402
+from etl.parsers import PARSERS  # noqa: E402
+
+CASOS = [
+    ("wikipedia_departamentos_idh.html", "tabla_idh"),
+    ("dane_pobreza_monetaria.html", "iframe_pobreza_src"),
+    ("dane_pobreza_monetaria_visualizacion.html", "script_grafico"),
+    ("municipios_colombia.html", "listado_municipios"),
+    ("<detalle municipio sintético>", "poblacion_municipio"),
+]
+
+
+def _medir(fn, html, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(html)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=20, help="repeticiones por caso (se toma el mejor)")
+    args = ap.parse_args()
+
+    bs4, fast = PARSERS["bs4"], PARSERS["lxml"]
+    print(f"{'fixture':45} {'método':22} {'bs4 ms':>9} {'lxml ms':>9} {'speedup':>8}")
+    for nombre, metodo in CASOS:
+        if nombre.startswith("<"):
+            html = detalle_html("/antioquia/abejorral", "Población 19.893")
+        else:
+            html = (FIXTURES / nombre).read_text(encoding="utf-8")
+
+        ref = getattr(bs4, metodo)(html)
+        got = getattr(fast, metodo)(html)
+        assert ref == got, f"{metodo}: lxml no coincide con bs4"
+
+        t_ref = _medir(getattr(bs4, metodo), html, args.repeat)
+        t_fast = _medir(getattr(fast, metodo), html, args.repeat)
+        print(f"{nombre:45} {metodo:22} {t_ref * 1e3:9.2f} {t_fast * 1e3:9.2f} {t_ref / t_fast:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
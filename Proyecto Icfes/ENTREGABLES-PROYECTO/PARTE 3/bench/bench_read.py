@@ -0,0 +1,85 @@
+# bench/bench_read.py
+"""
+Lectura del crudo del ICFES: por defecto (`low_memory=False`, 53 columnas, object/int64)
+vs. el lector con esquema de etl/schema.py (solo columnas usadas, tipos compactos) con
+cada motor. Cada variante corre en un subproceso para medir su propio pico de RSS.
+
+    python bench/bench_read.py --rows 2000000
+    python bench/bench_read.py --workdir /tmp/bench   # reutiliza el CSV sintético
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PARTE3 = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PARTE3))
+
+from bench.bench_transform import _pico_rss_mb  # noqa: E402
+
+VARIANTES = ["default", "schema_c", "schema_pyarrow"]
+
+
+def _leer(variante: str, icfes: Path) -> dict:
+    """Dentro del subproceso: lee el CSV con `variante`; devuelve tiempo, memoria y pico de RSS."""
+    import pandas as pd
+
+    from etl import schema
+    from etl.transform import cols_drop
+
+    t0 = time.perf_counter()
+    if variante == "default":
+        df = pd.read_csv(icfes, encoding="utf-8", low_memory=False)
+    else:
+        schema.ICFES_CSV_ENGINE = variante.split("_", 1)[1]
+        df = schema.leer_icfes(icfes, cols_drop)
+    return {
+        "segundos": round(time.perf_counter() - t0, 2),
+        "df_mb": round(schema.memoria_mb(df), 1),
+        "pico_rss_mb": round(_pico_rss_mb(), 1),
+        "columnas": len(df.columns),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=2_000_000)
+    ap.add_argument("--variantes", nargs="+", default=VARIANTES, choices=VARIANTES)
+    ap.add_argument("--workdir", type=Path, default=None, help="reutiliza el CSV sintético entre corridas")
+    ap.add_argument("--_run", nargs=2, metavar=("VARIANTE", "ICFES"), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args._run:
+        print("@@" + json.dumps(_leer(args._run[0], Path(args._run[1]))))
+        return
+
+    from bench._synth import escribir_csv
+
+    work = args.workdir or Path(tempfile.mkdtemp(prefix="bench_read_"))
+    work.mkdir(parents=True, exist_ok=True)
+    icfes = work / f"data_icfes_sintetico_{args.rows}.csv"
+    if not icfes.exists():
+        t0 = time.perf_counter()
+        escribir_csv(icfes, args.rows)
+        print(f"CSV sintético: {icfes} ({time.perf_counter() - t0:.1f}s)")
+    size_mb = icfes.stat().st_size / 1024**2
+    print(f"Entrada: {args.rows:,} filas, {size_mb:.0f} MB\n")
+
+    print(f"{'variante':16s} {'cols':>5s} {'tiempo':>8s} {'DataFrame':>10s} {'pico RSS':>10s}")
+    for variante in args.variantes:
+        proc = subprocess.run([sys.executable, __file__, "--_run", variante, str(icfes)],
+                              env=dict(os.environ), capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(proc.stderr[-4000:])
+            raise SystemExit(f"Falló la variante {variante}")
+        r = json.loads(next(l for l in proc.stdout.splitlines() if l.startswith("@@"))[2:])
+        print(f"{variante:16s} {r['columnas']:5d} {r['segundos']:7.1f}s "
+              f"{r['df_mb']:8.0f}MB {r['pico_rss_mb']:8.0f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# bench/bench_scraping.py
+"""
+Benchmark offline de las tareas de extract (extract_idh, extract_dane,
+extract_municipios) contra el servidor local de bench/fixture_server.py, que corre en
+otro proceso. Las URLs de etl/extract.py se reescriben al servidor; input, staging y
+manifest van a un directorio temporal y no se usa la caché HTTP en disco.
+
+Por fuente reporta requests (robots.txt incluido), páginas OK, 429/5xx recibidos, pág/s, latencia p50/p99
+por request y CPU del proceso del scraper.
+
+    python bench/bench_scraping.py --limit 300 --latency 0.05 --jitter 0.02
+    python bench/bench_scraping.py --limit 300 --throttle-rate 0.05 --error-rate 0.02
+"""
+import argparse
+import functools
+import json
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bench.fixture_server import FixtureProcess, PARTE3  # noqa: E402
+from etl import extract, manifest  # noqa: E402
+from etl.crawl import CrawlScheduler  # noqa: E402
+from etl.http_client import HttpClient  # noqa: E402
+
+
+class _TimedClient(HttpClient):
+    """HttpClient que guarda latencia y status de cada request."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+        self.samples = []
+
+    def get(self, url, headers=None, **kwargs):
+        t0 = time.perf_counter()
+        status = None
+        try:
+            r = super().get(url, headers=headers, **kwargs)
+            status = r.status_code
+            return r
+        finally:
+            with self._lock:
+                self.samples.append((time.perf_counter() - t0, status))
+
+    def reset(self):
+        with self._lock:
+            out, self.samples = self.samples, []
+        return out
+
+
+def _medir(nombre, fn, client):
+    client.reset()
+    t0, c0 = time.perf_counter(), time.process_time()
+    fn()
+    wall, cpu = time.perf_counter() - t0, time.process_time() - c0
+    samples = client.reset()
+
+    lat = np.array([s for s, _ in samples]) * 1000
+    status = [st for _, st in samples]
+    ok = sum(st is not None and 200 <= st < 300 for st in status)
+    return {
+        "fuente": nombre,
+        "requests": len(samples),
+        "ok": ok,
+        "429": status.count(429),
+        "5xx": sum(st is not None and st >= 500 for st in status),
+        "red": status.count(None),
+        "wall_s": round(wall, 3),
+        "pag_s": round(ok / wall, 1) if wall else 0.0,
+        "p50_ms": round(float(np.percentile(lat, 50)), 1) if len(lat) else None,
+        "p99_ms": round(float(np.percentile(lat, 99)), 1) if len(lat) else None,
+        "cpu_s": round(cpu, 3),
+        "cpu_ms_pag": round(cpu * 1000 / ok, 2) if ok else None,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--limit", type=int, default=300, help="municipios a descargar (0 = todos)")
+    ap.add_argument("--latency", type=float, default=0.05, help="latencia fija por request (s)")
+    ap.add_argument("--jitter", type=float, default=0.0, help="latencia extra exponencial, media (s)")
+    ap.add_argument("--throttle-rate", type=float, default=0.0, help="fracción de requests con 429")
+    ap.add_argument("--retry-after", type=int, default=0, help="Retry-After (s) de los 429 inyectados")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="fracción de requests con 500")
+    ap.add_argument("--capacity", type=int, default=None,
+                    help="concurrencia que aguanta el servidor antes de responder 429")
+    ap.add_argument("--workers", type=int, default=extract.SCRAPE_WORKERS)
+    ap.add_argument("--per-host", type=int, default=extract.SCRAPE_PER_HOST)
+    ap.add_argument("--delay", type=float, default=0.0, help="intervalo por host sin Crawl-delay (s)")
+    ap.add_argument("--parser", default=extract.PARSER.name, help="lxml | bs4")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", type=Path, default=None, help="guardar los resultados en JSON")
+    args = ap.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix="bench_scraping_"))
+    for d in ("input", "staging", "manifest"):
+        (tmp / d).mkdir()
+    extract.BASE_INPUT, extract.BASE_STAGING = tmp / "input", tmp / "staging"
+    manifest.BASE_SOURCES = tmp / "manifest"
+    extract.PARSER = extract.get_parser(args.parser)
+    extract.scrape_poblacion_municipios = functools.partial(extract.scrape_poblacion_municipios,
+                                                            workers=args.workers)
+
+    # Sin caché en disco: cada corrida debe ir a la red (local)
+    client = _TimedClient(headers=extract.HEADERS, store=None, pool_maxsize=max(args.workers, 16))
+    extract.HTTP_CLIENT = client
+    extract.SCHEDULER = CrawlScheduler(client, extract.UA, per_host=args.per_host,
+                                       max_per_host=args.workers, default_delay=args.delay, verbose=False)
+    if args.limit:
+        listado = extract._listado_municipios
+        extract._listado_municipios = lambda html: listado(html).head(args.limit)
+
+    server_kwargs = dict(latency=args.latency, jitter=args.jitter, capacity=args.capacity,
+                         throttle_rate=args.throttle_rate, error_rate=args.error_rate,
+                         retry_after=args.retry_after, seed=args.seed)
+    with FixtureProcess(**server_kwargs) as srv:
+        for nombre in ("URL_IDH", "URL_DANE", "URL_MUN"):
+            setattr(extract, nombre, srv.local_url(getattr(extract, nombre)))
+        extract.URL_DANE_BASE = srv.base_url
+
+        resultados = [
+            _medir("idh", extract.extract_idh, client),
+            _medir("dane", extract.extract_dane, client),
+            _medir("municipios", extract.extract_municipios, client),
+        ]
+        server_stats = srv.stats()
+
+    # Correctitud: IDH y DANE deben salir idénticos a los CSV de staging del repo
+    for f in ("idh_departamentos.csv", "dane_pobreza_monetaria.csv"):
+        ref = PARTE3 / "data" / "staging" / f
+        if ref.exists():
+            assert (tmp / "staging" / f).read_bytes() == ref.read_bytes(), f"{f} difiere del staging"
+    df_pob = pd.read_csv(tmp / "staging" / "poblacion_municipios.csv", encoding="utf-8-sig")
+    shutil.rmtree(tmp, ignore_errors=True)
+
+    print(f"\nServidor local: latencia={args.latency}s jitter={args.jitter}s 429={args.throttle_rate:.0%} "
+          f"500={args.error_rate:.0%} capacidad={args.capacity}  parser={args.parser} workers={args.workers}")
+    print(pd.DataFrame(resultados).set_index("fuente").to_string())
+    print(f"\nMunicipios con población: {df_pob['Poblacion'].notna().sum()}/{len(df_pob)}")
+    print(f"Servidor: {server_stats}")
+
+    if args.json:
+        args.json.write_text(json.dumps({"args": {k: str(v) for k, v in vars(args).items()},
+                                         "resultados": resultados, "servidor": server_stats},
+                                        indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"[OK] {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# bench/bench_transform.py
+"""
+Tiempo y pico de RAM de etl/transform.py sobre un crudo sintético (bench/_synth.py).
+Cada modo corre en un subproceso propio para que el pico de RSS (VmHWM) sea solo suyo;
+las referencias salen de data/staging del repo. Escribe Parquet + CSV y al final compara
+los CSV byte a byte.
+
+    python bench/bench_transform.py --rows 2000000
+    python bench/bench_transform.py --rows 2000000 --modes full chunked --chunk-rows 100000
+    python bench/bench_transform.py --rows 2000000 --modes full parallel --workers 1 2 4 8
+
+El modo parallel corre una vez por cada valor de --workers (escalado de 1 a N núcleos); su
+pico de RSS es el del proceso principal (los hijos comparten sus páginas por fork). El CSV
+opcional lo escribe el proceso principal: para medir solo el escalado, --sin-csv.
+"""
+import argparse
+import filecmp
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PARTE3 = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PARTE3))
+
+
+def _pico_rss_mb() -> float:
+    """VmHWM del proceso. ru_maxrss no sirve: se hereda del padre a través de fork + exec."""
+    try:
+        for linea in Path("/proc/self/status").read_text().splitlines():
+            if linea.startswith("VmHWM:"):
+                return int(linea.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _correr(icfes: Path, out: Path) -> dict:
+    """
+    Dentro del subproceso: transform() sobre solo `icfes`, con la salida (Parquet, registro y
+    CSV) en el directorio `out`; devuelve tiempo, pico de RSS y la ruta del CSV.
+    """
+    import shutil
+
+    from etl import transform as tr
+
+    staging = PARTE3 / "data" / "staging"
+    tr.DIR_ICFES, tr.PATRON_ICFES = icfes.parent, icfes.name
+    tr.FILE_DANE_POBREZA = staging / "dane_pobreza_monetaria.csv"
+    tr.FILE_IDH_DEPTO = staging / "idh_departamentos.csv"
+    tr.FILE_POBLACION_MUNICIPIO = staging / "poblacion_municipios.csv"
+    shutil.rmtree(out, ignore_errors=True)      # sin registro previo: se procesa siempre
+    out.mkdir(parents=True)
+    tr.BASE_OUTPUT = out
+    tr.OUT_CURATED = out / "curated"
+    tr.FILE_GEO_INDEX = out / "geo_index.json"
+
+    rss_inicio = _pico_rss_mb()
+    t0 = time.perf_counter()
+    tr.transform()
+    segundos = time.perf_counter() - t0
+    # transform reinicia VmHWM en cada paso (etl/metrics.py): su resumen guarda el pico máximo
+    metricas = json.loads(tr._ruta_metricas().read_text(encoding="utf-8"))
+    return {
+        "segundos": round(segundos, 2),
+        "pico_rss_mb": round(max(_pico_rss_mb(), metricas["pico_rss_mb"]), 1),
+        "rss_inicio_mb": round(rss_inicio, 1),
+        "csv": str(tr._salida_csv(icfes)),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=2_000_000)
+    ap.add_argument("--modes", nargs="+", default=["full", "chunked"])
+    ap.add_argument("--chunk-rows", type=int, default=200_000)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1],
+                    help="procesos del modo parallel")
+    ap.add_argument("--sin-csv", action="store_true", help="no exporta el CSV (compara solo el Parquet)")
+    ap.add_argument("--workdir", type=Path, default=None, help="reutiliza el CSV sintético entre corridas")
+    ap.add_argument("--_run", nargs=2, metavar=("ICFES", "OUT"), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args._run:
+        print("@@" + json.dumps(_correr(Path(args._run[0]), Path(args._run[1]))))
+        return
+
+    from bench._synth import escribir_csv
+
+    work = args.workdir or Path(tempfile.mkdtemp(prefix="bench_transform_"))
+    work.mkdir(parents=True, exist_ok=True)
+    icfes = work / f"data_icfes_sintetico_{args.rows}.csv"
+    if not icfes.exists():
+        t0 = time.perf_counter()
+        escribir_csv(icfes, args.rows)
+        print(f"CSV sintético: {icfes} ({time.perf_counter() - t0:.1f}s)")
+    size_mb = icfes.stat().st_size / 1024**2
+    print(f"Entrada: {args.rows:,} filas, {size_mb:.0f} MB")
+
+    corridas = []
+    for modo in args.modes:
+        if modo == "parallel":
+            corridas += [(f"parallel×{w}", modo, w) for w in sorted(set(args.workers))]
+        else:
+            corridas.append((modo, modo, 0))
+
+    resultados = {}
+    for nombre, modo, workers in corridas:
+        out = work / f"salida_{nombre}"
+        env = dict(os.environ, TRANSFORM_MODE=modo, TRANSFORM_CHUNK_ROWS=str(args.chunk_rows),
+                   TRANSFORM_WORKERS=str(workers), TRANSFORM_EXPORT_CSV="0" if args.sin_csv else "1")
+        proc = subprocess.run([sys.executable, __file__, "--_run", str(icfes), str(out)],
+                              env=env, capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(proc.stdout[-2000:], proc.stderr[-4000:])
+            raise SystemExit(f"Falló el modo {nombre}")
+        linea = next(l for l in proc.stdout.splitlines() if l.startswith("@@"))
+        resultados[nombre] = dict(json.loads(linea[2:]), salida=out)
+
+    base = resultados.get("parallel×1", next(iter(resultados.values())))["segundos"]
+    print(f"\n{'modo':12s} {'tiempo':>9s} {'speedup':>8s} {'pico RSS':>10s} {'RSS/CSV':>8s}")
+    for nombre, r in resultados.items():
+        print(f"{nombre:12s} {r['segundos']:8.1f}s {base / r['segundos']:7.2f}x "
+              f"{r['pico_rss_mb']:8.0f}MB {r['pico_rss_mb'] / size_mb:7.1f}x")
+    print(f"(speedup respecto de {'parallel×1' if 'parallel×1' in resultados else next(iter(resultados))}; "
+          f"núcleos disponibles: {len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()})")
+
+    salidas = [r["salida"] for r in resultados.values()]
+    iguales = True
+    if not args.sin_csv:
+        csvs = [r["csv"] for r in resultados.values()]
+        iguales = all(filecmp.cmp(csvs[0], c, shallow=False) for c in csvs[1:])
+        print(f"\nCSV idénticos entre modos: {'sí' if iguales else 'NO'}")
+    huellas = [_huella_parquet(s / "curated") for s in salidas]
+    iguales_pq = all(h == huellas[0] for h in huellas[1:])
+    print(f"Parquet con el mismo contenido entre modos: {'sí' if iguales_pq else 'NO'}")
+    if not (iguales and iguales_pq):
+        raise SystemExit(1)
+
+
+def _huella_parquet(ruta: Path) -> tuple:
+    """Columnas, dtypes y hashes de fila ordenados: igual contenido sin importar el orden de filas."""
+    import numpy as np
+    import pandas as pd
+
+    from etl.curated import leer_curated
+
+    df = leer_curated(ruta=ruta)
+    hashes = np.sort(pd.util.hash_pandas_object(df, index=False).to_numpy())
+    return tuple(df.columns), tuple(map(str, df.dtypes)), hashes.tobytes()
+
+
+if __name__ == "__main__":
+    main()
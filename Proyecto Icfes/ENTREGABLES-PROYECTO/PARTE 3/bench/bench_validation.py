@@ -0,0 +1,161 @@
+# bench/bench_validation.py
+"""
+great_expectations() con el motor propio (etl/validation.py), por lotes (GE_LOTE_FILAS,
+archivo por archivo), con la tabla entera en memoria (GE_LOTE_FILAS=0) y repitiendo la
+corrida con la caché por partición ya armada (GE_CACHE=1, sin cambios en los datos), vs. el de
+PandasDataset (GE_BACKEND=ge) sobre el dataset curado de un transform sintético
+(bench/_synth.py). Cada motor corre en un subproceso propio, así que cuenta también lo
+que tarda en importarse; informa import, lectura + validación, tarea completa y pico de RSS.
+
+Con --periodos N el dataset se repite en N periodos (enlaces a las mismas particiones),
+para ver cómo crece la memoria de cada motor con el histórico. Con --suite-x K la suite de
+PARTE 2 se repite K veces (mismas columnas, K veces más expectativas), para ver cómo crece
+el costo con la cantidad de expectativas.
+
+Compara los reportes de todos los motores (deben ser iguales). Si great_expectations no
+está instalado, el camino ge mide solo la lectura a pandas que necesita y queda fuera de
+la comparación.
+
+    python bench/bench_validation.py --rows 2000000 --periodos 1 4 8 --suite-x 1 10
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PARTE3 = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PARTE3))
+
+SUITE_PARTE2 = PARTE3.parent / "PARTE 2" / "src" / "validation" / "gx" / "expectations" / "icfes_suite.json"
+
+# nombre → variables de entorno del subproceso
+MOTORES = {
+    "lotes": {"GE_BACKEND": "native", "GE_LOTE_FILAS": "250000", "GE_CACHE": "0"},
+    "memoria": {"GE_BACKEND": "native", "GE_LOTE_FILAS": "0", "GE_CACHE": "0"},
+    "caché": {"GE_BACKEND": "native", "GE_LOTE_FILAS": "250000", "GE_CACHE": "1"},
+    "ge": {"GE_BACKEND": "ge", "GE_LOTE_FILAS": "0", "GE_CACHE": "0"},
+}
+
+
+def _medir(curated: Path, reporte: Path) -> dict:
+    """Dentro del subproceso (variables de MOTORES ya fijadas): importa, valida y corre la tarea."""
+    from bench.bench_transform import _pico_rss_mb
+
+    r = {"ge_instalado": True}
+    t0 = time.perf_counter()
+    from etl import great_expectations as g
+    if g.GE_BACKEND == "ge":
+        try:
+            from great_expectations.dataset import PandasDataset  # noqa: F401
+        except ImportError:
+            r["ge_instalado"] = False
+    r["import_s"] = time.perf_counter() - t0
+
+    g.IN_FINAL, g.GE_JSON = curated, reporte
+    suite, _ = g.cargar_suite(g.FILE_SUITE)
+    if g.GE_CACHE:
+        # Primera corrida (arma la caché, no se mide); lo medido es la repetición sin cambios
+        g._ruta_cache().unlink(missing_ok=True)
+        g._correr(g.GE_BACKEND, suite)
+    if r["ge_instalado"]:
+        t0 = time.perf_counter()
+        g._correr(g.GE_BACKEND, suite)
+        r["validacion_s"] = time.perf_counter() - t0
+        # La tarea completa, con el reporte para comparar entre motores
+        t0 = time.perf_counter()
+        g.great_expectations()
+        r["tarea_s"] = time.perf_counter() - t0
+    else:
+        t0 = time.perf_counter()
+        g.leer_curated(g.columnas_suite(suite), ruta=curated)
+        r["lectura_s"] = time.perf_counter() - t0
+    r["pico_rss_mb"] = _pico_rss_mb()
+    return r
+
+
+def _repetir(curated: Path, destino: Path, periodos: int) -> Path:
+    """`curated` (un periodo) repetido en `periodos` periodos con enlaces simbólicos."""
+    destino.mkdir(parents=True, exist_ok=True)
+    origen = next(curated.glob("periodo=*"))
+    for i in range(periodos):
+        enlace = destino / f"periodo={20001 + i}"
+        if not enlace.exists():
+            enlace.symlink_to(origen.resolve(), target_is_directory=True)
+    return destino
+
+
+def _suite_repetida(destino: Path, veces: int) -> Path:
+    """La suite de PARTE 2 con cada expectativa `veces` veces (claves del reporte distintas)."""
+    data = json.loads(SUITE_PARTE2.read_text(encoding="utf-8"))
+    base = data["expectations"]
+    data["expectations"] = [
+        dict(e, meta=dict(e.get("meta") or {}, report_key=f"{(e.get('meta') or {}).get('report_key', i)}_{k}"))
+        for k in range(veces) for i, e in enumerate(base)
+    ] if veces > 1 else base
+    destino.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    return destino
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=2_000_000)
+    ap.add_argument("--periodos", type=int, nargs="+", default=[1])
+    ap.add_argument("--suite-x", type=int, nargs="+", default=[1], help="veces que se repite la suite")
+    ap.add_argument("--workdir", type=Path, default=None, help="reutiliza el CSV y el curado entre corridas")
+    ap.add_argument("--_run", nargs=2, metavar=("CURATED", "REPORTE"), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args._run:
+        print("@@" + json.dumps(_medir(Path(args._run[0]), Path(args._run[1]))))
+        return
+
+    from bench._synth import escribir_csv
+    from bench.bench_transform import _correr
+
+    work = args.workdir or Path(tempfile.mkdtemp(prefix="bench_validation_"))
+    work.mkdir(parents=True, exist_ok=True)
+    icfes = work / f"data_icfes_sintetico_{args.rows}.csv"
+    out = work / f"salida_{args.rows}"
+    if not (out / "curated").exists():
+        if not icfes.exists():
+            escribir_csv(icfes, args.rows)
+        _correr(icfes, out)
+    print(f"Curado: {args.rows:,} filas por periodo en {out / 'curated'}")
+
+    distintos = False
+    print(f"\n{'periodos':>8s} {'suite':>6s} {'motor':8s} {'import (s)':>11s} {'suite (s)':>10s} {'tarea (s)':>10s} {'pico RSS (MB)':>14s}")
+    for periodos, veces in ((p, x) for p in args.periodos for x in args.suite_x):
+        curated = _repetir(out / "curated", work / f"periodos_{periodos}", periodos)
+        suite = _suite_repetida(work / f"suite_x{veces}.json", veces)
+        reportes = {}
+        for motor, variables in MOTORES.items():
+            reporte = work / f"ge_report_{periodos}_{motor}.json"
+            reporte.unlink(missing_ok=True)
+            env = dict(os.environ, GE_SUITE=str(suite), **variables)
+            proc = subprocess.run([sys.executable, __file__, "--_run", str(curated), str(reporte)],
+                                  env=env, capture_output=True, text=True)
+            if proc.returncode != 0:
+                print(proc.stdout[-2000:], proc.stderr[-4000:])
+                raise SystemExit(f"Falló el motor {motor}")
+            r = json.loads(next(l for l in proc.stdout.splitlines() if l.startswith("@@"))[2:])
+            if r["ge_instalado"]:
+                reportes[motor] = json.loads(reporte.read_text(encoding="utf-8"))
+                print(f"{periodos:8d} {'x' + str(veces):>6s} {motor:8s} {r['import_s']:11.2f} {r['validacion_s']:10.2f} "
+                      f"{r['tarea_s']:10.2f} {r['pico_rss_mb']:14.0f}")
+            else:
+                print(f"{periodos:8d} {'x' + str(veces):>6s} {motor:8s} {'—':>11s} {'—':>10s} {'—':>10s} {r['pico_rss_mb']:14.0f}"
+                      f"   (sin great_expectations: solo la lectura a pandas, {r['lectura_s']:.2f}s)")
+        iguales = all(rep == reportes["lotes"] for rep in reportes.values())
+        distintos |= not iguales
+        print(f"{'':15s} reportes idénticos ({', '.join(reportes)}): {'sí' if iguales else 'NO'}")
+
+    if distintos:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
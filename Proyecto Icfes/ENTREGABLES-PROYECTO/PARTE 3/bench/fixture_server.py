@@ -0,0 +1,280 @@
+# bench/fixture_server.py
+"""
+Servidor HTTP local que imita a las tres fuentes del extract usando los HTML guardados
+en data/input (Wikipedia IDH, DANE página + iframe, listado de municipios.com.co).
+Las páginas de detalle de cada municipio se sintetizan con el mismo bloque
+'col-6 col-md-4 py-4' que parsea etl/extract.py, tomando la población de
+data/staging/poblacion_municipios.csv cuando existe. Los links absolutos del listado
+se reescriben al propio servidor.
+Responde con ETag (y 304 ante If-None-Match) y comprime con gzip si el cliente lo acepta.
+
+Fallas inyectables:
+- latency (+ jitter exponencial de media `jitter`) por request;
+- capacity: 429 a los requests que superen esa concurrencia (sitio saturado);
+- throttle_rate / error_rate: fracción de requests que responden 429 (con Retry-After)
+  o 500, al azar con semilla fija.
+
+FixtureProcess levanta el mismo servidor en otro proceso, para que su CPU no se mezcle
+con la del scraper al medir (bench/bench_scraping.py); los contadores se leen de /__stats.
+"""
+import csv
+import gzip
+import hashlib
+import json
+import multiprocessing as mp
+import random
+import socket
+import threading
+import time
+import urllib.request
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import urlsplit
+
+PARTE3 = Path(__file__).resolve().parents[1]
+FIXTURES = PARTE3 / "data" / "input"
+STAGING_POBLACION = PARTE3 / "data" / "staging" / "poblacion_municipios.csv"
+
+# Ruta local → HTML guardado (mismos paths que las URLs reales de etl/extract.py)
+FIXTURE_ROUTES = {
+    "/municipios": FIXTURES / "municipios_colombia.html",
+    "/wiki/Anexo:Departamentos_de_Colombia_por_IDH": FIXTURES / "wikipedia_departamentos_idh.html",
+    "/index.php/estadisticas-por-tema/pobreza-y-condiciones-de-vida/pobreza-monetaria":
+        FIXTURES / "dane_pobreza_monetaria.html",
+    "/files/operaciones/PM/gra-PMDepartamental-2024.html": FIXTURES / "dane_pobreza_monetaria_visualizacion.html",
+}
+# Hosts reales cuyos links absolutos se reescriben al servidor local
+REWRITE_HOSTS = (b"https://www.municipios.com.co", b"http://www.municipios.com.co")
+
+DETALLE_TEMPLATE = """<!DOCTYPE html>
+<html lang="es"><head><meta charset="utf-8"><title>{municipio}</title></head>
+<body><div class="container"><div class="row">
+<div class="col-6 col-md-4 py-4"><i class="fa fa-map"></i> Extensión <b>{extension}</b> km²</div>
+<div class="col-6 col-md-4 py-4"><i class="fa fa-users"></i> {poblacion} habitantes</div>
+<div class="col-6 col-md-4 py-4"><i class="fa fa-thermometer"></i> Temperatura 24 °C</div>
+</div>{relleno}</div></body></html>
+"""
+
+
+def _poblaciones_guardadas() -> dict:
+    """path del municipio (/depto/mpio) → texto 'Población N' del staging."""
+    out = {}
+    if not STAGING_POBLACION.exists():
+        return out
+    with STAGING_POBLACION.open(encoding="utf-8-sig", newline="") as fh:
+        for row in csv.DictReader(fh):
+            if row.get("Poblacion"):
+                out[urlsplit(row["URL"]).path] = row["Poblacion"]
+    return out
+
+
+def detalle_html(path: str, poblacion: str = None) -> str:
+    """Página de detalle sintética; ~20 KB de relleno para parecerse a la real."""
+    municipio = path.rstrip("/").rsplit("/", 1)[-1].replace("-", " ").title()
+    poblacion = poblacion or f"Población {abs(hash(path)) % 90_000 + 1_000:,}".replace(",", ".")
+    relleno = "<p>" + ("Lorem ipsum dolor sit amet. " * 700) + "</p>"
+    return DETALLE_TEMPLATE.format(municipio=municipio, extension=abs(hash(path)) % 3000,
+                                   poblacion=poblacion, relleno=relleno)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # Cabeceras y cuerpo van en writes separados: sin NODELAY, keep-alive sufre
+        # la espera de Nagle + ACK retardado (~40 ms por request)
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_GET(self):
+        srv = self.server
+        if self.path == "/__stats":
+            self._send_stats()
+            return
+        with srv.lock:
+            srv.hits += 1
+            srv.in_flight += 1
+            falla = None
+            if srv.capacity is not None and srv.in_flight > srv.capacity:
+                falla = 429
+            elif srv.rng.random() < srv.throttle_rate:
+                falla = 429
+            elif srv.rng.random() < srv.error_rate:
+                falla = 500
+            if falla == 429:
+                srv.throttled += 1
+            elif falla == 500:
+                srv.errors += 1
+            extra = srv.rng.expovariate(1 / srv.jitter) if srv.jitter else 0.0
+        try:
+            if srv.latency or extra:
+                time.sleep(srv.latency + extra)
+            if falla == 429:
+                self._send_empty(429, {"Retry-After": str(srv.retry_after)})
+            elif falla:
+                self._send_empty(falla)
+            else:
+                self._serve()
+        finally:
+            with srv.lock:
+                srv.in_flight -= 1
+
+    def _send_empty(self, status, headers=None):
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _send_stats(self):
+        body = json.dumps(self.server.stats()).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _serve(self):
+        srv = self.server
+        path = urlsplit(self.path).path
+
+        if path == "/robots.txt":
+            body = srv.robots.encode("utf-8")
+        elif path in FIXTURE_ROUTES:
+            body = FIXTURE_ROUTES[path].read_bytes()
+            base = srv.base_url.encode("utf-8")
+            for host in REWRITE_HOSTS:
+                body = body.replace(host, base)
+        elif path.count("/") == 2:
+            body = detalle_html(path, srv.poblaciones.get(path)).encode("utf-8")
+        else:
+            self._send_empty(404)
+            return
+
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            with srv.lock:
+                srv.not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("ETag", etag)
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body, compresslevel=5)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128   # el default (5) descarta SYNs cuando abren muchos hilos a la vez
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"hits": self.hits, "not_modified": self.not_modified,
+                    "throttled": self.throttled, "errors": self.errors}
+
+
+class FixtureServer:
+    """Context manager: levanta el servidor en un hilo y expone base_url."""
+
+    def __init__(self, latency: float = 0.0, robots: str = "User-agent: *\nAllow: /\n",
+                 capacity: int = None, host: str = "127.0.0.1", port: int = 0,
+                 jitter: float = 0.0, throttle_rate: float = 0.0, error_rate: float = 0.0,
+                 retry_after: int = 0, seed: int = 0):
+        self.httpd = _Server((host, port), _Handler)
+        self.httpd.latency = latency
+        self.httpd.jitter = jitter
+        self.httpd.robots = robots
+        self.httpd.lock = threading.Lock()
+        self.httpd.capacity = capacity
+        self.httpd.throttle_rate = throttle_rate
+        self.httpd.error_rate = error_rate
+        self.httpd.retry_after = retry_after
+        self.httpd.rng = random.Random(seed)
+        self.httpd.in_flight = 0
+        self.httpd.hits = 0
+        self.httpd.not_modified = 0
+        self.httpd.throttled = 0
+        self.httpd.errors = 0
+        self.httpd.poblaciones = _poblaciones_guardadas()
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return self.httpd.base_url
+
+    @property
+    def hits(self) -> int:
+        return self.httpd.hits
+
+    @property
+    def not_modified(self) -> int:
+        return self.httpd.not_modified
+
+    @property
+    def throttled(self) -> int:
+        return self.httpd.throttled
+
+    @property
+    def errors(self) -> int:
+        return self.httpd.errors
+
+    def local_url(self, url: str) -> str:
+        """Reescribe una URL pública al servidor local conservando el path."""
+        return self.base_url + urlsplit(url).path
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def _serve_process(kwargs, conn, stop):
+    with FixtureServer(**kwargs) as srv:
+        conn.send(srv.base_url)
+        stop.wait()
+
+
+class FixtureProcess:
+    """Igual que FixtureServer, pero en un proceso aparte (su CPU no cuenta en el cliente)."""
+
+    def __init__(self, **kwargs):
+        self._parent, child = mp.Pipe()
+        self._stop = mp.Event()
+        self._proc = mp.Process(target=_serve_process, args=(kwargs, child, self._stop), daemon=True)
+        self.base_url = None
+
+    def local_url(self, url: str) -> str:
+        return self.base_url + urlsplit(url).path
+
+    def stats(self) -> dict:
+        with urllib.request.urlopen(self.base_url + "/__stats", timeout=10) as r:
+            return json.loads(r.read())
+
+    def __enter__(self):
+        self._proc.start()
+        self.base_url = self._parent.recv()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._proc.join(timeout=10)
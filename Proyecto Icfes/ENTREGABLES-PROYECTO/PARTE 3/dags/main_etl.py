@@ -1,14 +1,15 @@
 from datetime import datetime, timedelta
 from airflow import DAG
-from airflow.operators.python import PythonOperator
+from airflow.operators.python import PythonOperator, ShortCircuitOperator
 
 # Importar funciones  del ETL
 from etl.utils import ping
-from etl.extract import extract
+from etl.extract import extract_idh, extract_dane, extract_municipios
 from etl.transform import transform
-from etl.great_expectations import great_expectations
+from etl.great_expectations import great_expectations, great_expectations_dw
 from etl.load import load
 from etl.analytics import analytics
+from etl.manifest import sources_changed, commit_manifest
 
 
 default_args = {
@@ -32,11 +33,31 @@ with DAG(
         python_callable=ping,
     )
 
-    t_extract = PythonOperator(
-        task_id="extract",
-        python_callable=extract,
+    # Extract: una tarea por fuente; son independientes y el LocalExecutor las solapa.
+    # Si una falla, su reintento no vuelve a descargar las otras.
+    t_extract_idh = PythonOperator(
+        task_id="extract_idh",
+        python_callable=extract_idh,
     )
 
+    t_extract_dane = PythonOperator(
+        task_id="extract_dane",
+        python_callable=extract_dane,
+    )
+
+    t_extract_municipios = PythonOperator(
+        task_id="extract_municipios",
+        python_callable=extract_municipios,
+    )
+
+    # Sin cambios en las fuentes ni en los data_icfes_*.csv de input (un CSV por periodo)
+    # → se saltan las tareas siguientes
+    t_check_changes = ShortCircuitOperator(
+        task_id="check_changes",
+        python_callable=sources_changed,
+    )
+
+    # transform recibe el contexto: deja sus métricas por paso en XCom (key "transform_metrics")
     t_transform = PythonOperator(
         task_id="transform",
         python_callable=transform,
@@ -52,12 +73,26 @@ with DAG(
         python_callable=load,
     )
 
+    # La suite sobre el DW cargado, como SQL en Postgres: huérfanas y conciliación con el curado
+    t_great_expectations_dw = PythonOperator(
+        task_id="great_expectations_dw",
+        python_callable=great_expectations_dw,
+    )
+
     t_analytics = PythonOperator(
         task_id="analytics",
         python_callable=analytics,
     )
 
+    t_commit_manifest = PythonOperator(
+        task_id="commit_manifest",
+        python_callable=commit_manifest,
+    )
+
 
 
     # Orden de ejecución
-    t_ping >> t_extract >> t_transform >> t_great_expectations >> t_load >> t_analytics
+    t_extract = [t_extract_idh, t_extract_dane, t_extract_municipios]
+    t_ping >> t_extract >> t_check_changes >> t_transform >> t_great_expectations >> t_load
+    t_load >> t_great_expectations_dw >> t_analytics
+    t_analytics >> t_commit_manifest
@@ -0,0 +1,238 @@
+# etl/crawl.py
+"""
+Planificador de crawling por host, compartido por todos los hilos de una tarea de extract
+(uno por proceso: cada tarea del DAG tiene el suyo, y la concurrencia entre sitios sale de
+que las tres tareas corren en paralelo):
+
+- robots.txt: se descarga una sola vez por host (a través del HttpClient, así que
+  también queda en la caché) y decide qué URLs se pueden pedir.
+- Ritmo: un token bucket por host. La tasa sale de Crawl-delay / Request-rate del
+  robots.txt; si el sitio no declara nada, se usa la pausa por defecto.
+- Concurrencia adaptativa (AIMD) por host: sube de a poco mientras las respuestas
+  llegan rápidas y OK, y se reduce a la mitad ante 429/503, errores de red o picos de
+  latencia. Todos los hilos que scrapean el mismo host comparten el mismo límite.
+"""
+import threading
+import time
+import urllib.robotparser as rp
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+
+class _TokenBucket:
+    """Bucket clásico: `rate` tokens/s, hasta `capacity` acumulados. acquire() bloquea."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(capacity))
+        self.tokens = self.capacity
+        self._t = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self._t) * self.rate)
+                self._t = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class AdaptiveLimit:
+    """
+    Límite de concurrencia AIMD (additive increase / multiplicative decrease).
+
+    - Éxito rápido con el límite en uso: limit += increase / limit (≈ +1 por cada
+      "ventana" completa de éxitos). Si hay cupo ocioso (hilos en backoff, cola vacía)
+      no sube: no se gana margen que nunca se probó.
+    - 429/503, error de red o latencia > max(latency_floor, latency_factor × EWMA):
+      limit *= decrease, como mucho una vez por `cooldown` segundos (una ráfaga de
+      rechazos simultáneos cuenta como una sola señal).
+    Cada cambio del límite entero queda en `history` y en el log de la tarea.
+    """
+
+    def __init__(self, name: str, initial: int, minimum: int = 1, maximum: int = 16,
+                 increase: float = 1.0, decrease: float = 0.5,
+                 latency_factor: float = 3.0, latency_floor: float = 2.0, cooldown: float = 1.0,
+                 verbose: bool = True):
+        self.name = name
+        self.minimum = max(1, int(minimum))
+        self.maximum = max(self.minimum, int(maximum))
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.latency_floor = latency_floor
+        self.cooldown = cooldown
+        self.verbose = verbose
+        self.in_flight = 0
+        self.ewma = None
+        self.history = [(time.time(), int(self.limit), "inicio")]
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, status=None, latency: float = None):
+        """`status` None = excepción de red."""
+        with self._cond:
+            en_uso = self.in_flight >= int(self.limit)
+            self.in_flight -= 1
+            before = int(self.limit)
+            motivo = self._ajustar(status, latency, en_uso)
+            if int(self.limit) != before:
+                self.history.append((time.time(), int(self.limit), motivo))
+                if self.verbose:
+                    print(f"[AIMD] {self.name}: concurrencia {before} → {int(self.limit)} ({motivo})")
+            self._cond.notify_all()
+
+    def _ajustar(self, status, latency, en_uso):
+        lenta = False
+        if latency is not None:
+            if self.ewma is not None:
+                lenta = latency > max(self.latency_floor, self.latency_factor * self.ewma)
+            if not lenta:
+                # el baseline solo aprende de respuestas normales
+                self.ewma = latency if self.ewma is None else 0.8 * self.ewma + 0.2 * latency
+
+        if status is None or status in (429, 503) or lenta:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.cooldown:
+                self._last_decrease = now
+                self.limit = max(self.minimum, self.limit * self.decrease)
+            if status is None:
+                return "error de red"
+            return f"HTTP {status}" if status in (429, 503) else f"latencia {latency:.2f}s"
+
+        if 200 <= status < 400:
+            if en_uso:
+                self.limit = min(self.maximum, self.limit + self.increase / self.limit)
+            return "respuestas OK"
+        return f"HTTP {status}"
+
+
+class _Turno:
+    """Handle de un slot: el llamador informa el status HTTP de la respuesta."""
+
+    def __init__(self):
+        self.status = None
+
+    def report(self, status):
+        self.status = status
+
+
+class _Host:
+    def __init__(self, robots, bucket, limit: AdaptiveLimit):
+        self.robots = robots          # RobotFileParser o None (sin restricciones)
+        self.bucket = bucket          # _TokenBucket o None (sin límite de ritmo)
+        self.limit = limit            # AdaptiveLimit compartido por todos los hilos
+
+
+class CrawlScheduler:
+    """Robots + token bucket + concurrencia AIMD por host."""
+
+    def __init__(self, client, ua: str, per_host: int = 4, max_per_host: int = 16,
+                 default_delay: float = 0.25, respect_robots: bool = True, verbose: bool = True):
+        self.client = client
+        self.ua = ua
+        self.per_host = max(1, int(per_host))            # concurrencia inicial
+        self.max_per_host = max(self.per_host, int(max_per_host))
+        self.default_delay = max(0.0, float(default_delay))
+        self.respect_robots = respect_robots
+        self.verbose = verbose
+        self._hosts = {}
+        self._lock = threading.Lock()
+        self._host_locks = {}
+
+    # ---------- robots.txt ----------
+    def _read_robots(self, base: str):
+        """RobotFileParser del host, o None si no hay robots.txt utilizable."""
+        robots_url = base + "/robots.txt"
+        try:
+            r = self.client.get(robots_url, timeout=20, verify=False)
+        except Exception as e:
+            print(f"[robots] No se pudo leer {robots_url}: {e} → Continuamos con prudencia.")
+            return None
+        parser = rp.RobotFileParser(robots_url)
+        if r.status_code in (401, 403):
+            parser.disallow_all = True
+        elif r.ok:
+            parser.parse(r.text.splitlines())
+        else:
+            return None  # 404 u otro: sin restricciones
+        return parser
+
+    def _host(self, url) -> _Host:
+        parts = urlsplit(url)
+        key = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            if key in self._hosts:
+                return self._hosts[key]
+            host_lock = self._host_locks.setdefault(key, threading.Lock())
+
+        # Un solo hilo descarga el robots.txt de cada host; el resto espera
+        with host_lock:
+            with self._lock:
+                if key in self._hosts:
+                    return self._hosts[key]
+            robots = self._read_robots(key) if self.respect_robots else None
+            delay, capacity = self.default_delay, self.per_host
+            if robots is not None:
+                crawl_delay = robots.crawl_delay(self.ua)
+                rate = robots.request_rate(self.ua)
+                if crawl_delay:
+                    delay, capacity = float(crawl_delay), 1
+                elif rate and rate.requests:
+                    delay, capacity = rate.seconds / rate.requests, 1
+            bucket = _TokenBucket(1.0 / delay, capacity) if delay > 0 else None
+            limit = AdaptiveLimit(parts.netloc, initial=self.per_host, maximum=self.max_per_host,
+                                  verbose=self.verbose)
+            host = _Host(robots, bucket, limit)
+            if self.verbose:
+                print(f"[CRAWL] {key}: robots={'sí' if robots else 'no'}  intervalo={delay:.2f}s  "
+                      f"ráfaga={capacity}  concurrencia={self.per_host} (máx {self.max_per_host})")
+            with self._lock:
+                self._hosts[key] = host
+            return host
+
+    def allowed(self, url) -> bool:
+        host = self._host(url)
+        if host.robots is None:
+            return True
+        return host.robots.can_fetch(self.ua, url)
+
+    # ---------- ritmo y concurrencia ----------
+    @contextmanager
+    def slot(self, url):
+        """
+        Cupo para un request a `url`: espera turno de concurrencia y un token del host.
+        El llamador informa el status con `turno.report(status)`; la latencia la mide
+        el propio slot. Una excepción dentro del bloque cuenta como error de red.
+        """
+        host = self._host(url)
+        host.limit.acquire()
+        turno = _Turno()
+        t0 = None
+        try:
+            if host.bucket is not None:
+                host.bucket.acquire()
+            t0 = time.monotonic()
+            yield turno
+        finally:
+            latency = time.monotonic() - t0 if t0 is not None else None
+            host.limit.release(turno.status, latency)
+
+    def concurrency_log(self) -> list:
+        """Historial de concurrencia de todos los hosts: (timestamp, host, límite, motivo)."""
+        with self._lock:
+            hosts = list(self._hosts.values())
+        rows = [(t, h.limit.name, lim, motivo) for h in hosts for (t, lim, motivo) in h.limit.history]
+        return sorted(rows)
@@ -0,0 +1,276 @@
+# etl/curated.py
+"""
+Dataset curado del ICFES en Parquet (zstd), particionado por periodo y departamento de
+residencia:
+
+    data/output/df_icfes_2024_final/periodo=20242/estu_depto_reside=ANTIOQUIA/data_icfes_2024-0-0.parquet
+
+Cada archivo Parquet lleva como prefijo el CSV del ICFES del que sale (<prefijo>-<lote>-<n>):
+volver a procesar un periodo reemplaza solo sus archivos y deja el resto del histórico.
+Conserva los tipos del transform (Int64 de poblaciones, categorías, enteros compactos), así
+que great_expectations() y load() lo leen sin volver a inferir nada y solo con las columnas
+que usan. El CSV df_icfes_2024_final.csv queda como exportación opcional (TRANSFORM_EXPORT_CSV).
+"""
+import json
+import re
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from etl.schema import texto_arrow
+
+BASE_OUTPUT = Path("/opt/airflow/data/output")
+DIR_CURATED = BASE_OUTPUT / "df_icfes_2024_final"
+
+# Columnas de partición y su tipo en la ruta (periodo=20242/estu_depto_reside=...)
+PARTICIONES = pa.schema([("periodo", pa.int64()), ("estu_depto_reside", pa.string())])
+# dtype con el que vuelven al leer (pyarrow las entrega como int64 / str)
+DTYPES_PARTICION = {"periodo": "int64", "estu_depto_reside": "category"}
+COMPRESION = "zstd"
+# Texto de Arrow → string[pyarrow] al leer con ICFES_STRING_DTYPE=arrow
+_TEXTO = {pa.string(): pd.StringDtype("pyarrow"), pa.large_string(): pd.StringDtype("pyarrow")}
+
+
+def _particionado():
+    return ds.partitioning(PARTICIONES, flavor="hive")
+
+
+def _esquema_estable(schema: pa.Schema) -> pa.Schema:
+    """
+    Mismo esquema para todos los lotes: índices de diccionario int32 (pandas usa int8/int16
+    según cuántas categorías tenga cada lote) y particiones con el tipo de PARTICIONES.
+    """
+    campos = []
+    for f in schema:
+        tipo = f.type
+        if pa.types.is_dictionary(tipo):
+            tipo = pa.dictionary(pa.int32(), tipo.value_type)
+        if f.name in PARTICIONES.names:
+            tipo = PARTICIONES.field(f.name).type
+        campos.append(pa.field(f.name, tipo))
+    return pa.schema(campos, metadata=schema.metadata)
+
+
+def escribir_lote(df: pd.DataFrame, columnas: list, directorio: Path, nombre: str,
+                  schema: pa.Schema = None) -> pa.Schema:
+    """
+    Escribe `df` (solo `columnas`, en ese orden) en `directorio` como el archivo `nombre`-N
+    de cada partición. Devuelve el esquema usado, para repetirlo en los lotes siguientes.
+    """
+    tabla = pa.Table.from_pandas(df, columns=columnas, preserve_index=False)
+    schema = schema or _esquema_estable(tabla.schema)
+    ds.write_dataset(
+        tabla.cast(schema), directorio, format="parquet",
+        partitioning=_particionado(),
+        basename_template=f"{nombre}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        file_options=ds.ParquetFileFormat().make_write_options(compression=COMPRESION),
+    )
+    return schema
+
+
+class EscritorCurated:
+    """
+    Escribe las filas de un origen (`prefijo`) en un directorio temporal, en uno o varios
+    lotes, y las publica en `destino` al cerrar: recién ahí se reemplazan los archivos que
+    ese prefijo tenía antes. Una corrida fallida no toca el dataset publicado.
+    """
+
+    def __init__(self, destino: Path = None, prefijo: str = "part"):
+        self.destino = Path(destino or DIR_CURATED)
+        self.prefijo = prefijo
+        self.tmp = self.destino.with_name(f"{self.destino.name}.tmp-{prefijo}")
+        shutil.rmtree(self.tmp, ignore_errors=True)
+        self.schema = None
+        self.lotes = 0
+        self.filas = 0
+
+    def escribir(self, df: pd.DataFrame, columnas: list = None) -> None:
+        self.schema = escribir_lote(df, columnas, self.tmp, f"{self.prefijo}-{self.lotes}", self.schema)
+        self.registrar(len(df))
+
+    def registrar(self, filas: int, lotes: int = 1) -> None:
+        """Cuenta lotes escritos por fuera de escribir() (p. ej. por procesos hijos en self.tmp)."""
+        self.lotes += lotes
+        self.filas += filas
+
+    def cerrar(self) -> list:
+        """Publica los archivos nuevos del prefijo y devuelve sus rutas finales."""
+        viejos = partes(self.destino, self.prefijo)
+        for p in viejos:
+            p.unlink()
+        nuevos = []
+        for p in sorted(self.tmp.rglob("*.parquet")):
+            final = self.destino / p.relative_to(self.tmp)
+            final.parent.mkdir(parents=True, exist_ok=True)
+            p.replace(final)
+            nuevos.append(final)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+        _borrar_vacios(self.destino)
+        print(f"[CURATED] {self.destino} ← {self.prefijo}: {self.filas:,} filas, {self.lotes} lote(s), "
+              f"{len(nuevos)} archivos parquet ({COMPRESION}); reemplaza {len(viejos)}")
+        return nuevos
+
+
+def archivos(ruta: Path = None) -> list:
+    return sorted(Path(ruta or DIR_CURATED).rglob("*.parquet"))
+
+
+def partes(ruta: Path, prefijo: str) -> list:
+    """Archivos Parquet escritos para `prefijo` (<prefijo>-<lote>-<n>.parquet)."""
+    patron = re.compile(re.escape(prefijo) + r"-\d+-\d+\.parquet")
+    return [p for p in archivos(ruta) if patron.fullmatch(p.name)]
+
+
+def particiones(ruta: Path = None) -> dict:
+    """{"periodo=.../estu_depto_reside=...": [archivos]} de las particiones del dataset."""
+    ruta = Path(ruta or DIR_CURATED)
+    out = {}
+    for f in sorted(_dataset(ruta).files):
+        out.setdefault(Path(f).parent.relative_to(ruta).as_posix(), []).append(f)
+    return out
+
+
+def periodos(rutas) -> list:
+    """Valores de `periodo` de las particiones donde están `rutas` (.../periodo=20242/...)."""
+    out = set()
+    for p in rutas:
+        for parte in Path(p).parts:
+            if parte.startswith("periodo="):
+                out.add(int(parte.split("=", 1)[1]))
+    return sorted(out)
+
+
+def _borrar_vacios(ruta: Path) -> None:
+    """Directorios de partición que quedaron sin archivos (de abajo hacia arriba)."""
+    for d in sorted((d for d in ruta.rglob("*") if d.is_dir()), key=lambda d: len(d.parts), reverse=True):
+        if not any(d.iterdir()):
+            d.rmdir()
+
+
+def _dataset(ruta: Path = None) -> ds.Dataset:
+    ruta = Path(ruta or DIR_CURATED)
+    if not ruta.exists():
+        raise FileNotFoundError(f"No se encuentra el dataset curado: {ruta}")
+    return ds.dataset(ruta, format="parquet", partitioning=_particionado())
+
+
+def columnas(ruta: Path = None) -> list:
+    """Columnas del dataset en el orden con que se escribieron (metadatos de pandas)."""
+    return _ordenadas(_dataset(ruta).schema)
+
+
+def _ordenadas(schema: pa.Schema) -> list:
+    nombres = schema.names
+    if schema.metadata and b"pandas" in schema.metadata:
+        orden = [c["name"] for c in json.loads(schema.metadata[b"pandas"])["columns"]]
+        nombres = [c for c in orden if c in nombres] + [c for c in nombres if c not in orden]
+    return nombres
+
+
+def forma(ruta: Path = None) -> tuple:
+    """
+    (filas, columnas) sin leer datos: filas desde el pie de cada archivo (count_rows del
+    dataset retiene memoria por archivo y crece con el histórico).
+    """
+    n_cols = len(columnas(ruta))
+    return sum(filas_periodo(ruta).values()), n_cols
+
+
+def filas_periodo(ruta: Path = None) -> dict:
+    """{periodo: filas} desde el pie de cada archivo, sin leer datos."""
+    out = {}
+    for p in _dataset(ruta).files:
+        for periodo in periodos([p]) or [None]:
+            out[periodo] = out.get(periodo, 0) + pq.read_metadata(p).num_rows
+    return out
+
+
+def leer_tabla(cols: list = None, filtro=None, ruta: Path = None) -> pa.Table:
+    """Tabla Arrow con las columnas `cols` que existan (todas si es None), en el orden del dataset."""
+    disponibles = columnas(ruta)
+    cols = disponibles if cols is None else [c for c in disponibles if c in set(cols)]
+    return _dataset(ruta).to_table(columns=cols, filter=filtro)
+
+
+def _proyeccion(dataset: ds.Dataset, cols: list = None) -> pa.Schema:
+    """Esquema del dataset con las columnas `cols` que existan (todas si es None), en su orden."""
+    disponibles = _ordenadas(dataset.schema)
+    cols = disponibles if cols is None else [c for c in disponibles if c in set(cols)]
+    return pa.schema([dataset.schema.field(c) for c in cols])
+
+
+def _lotes(fragmentos, schema: pa.Schema, filas_lote: int):
+    pendientes, filas = [], 0
+    cols = schema.names
+    for fragmento in fragmentos:
+        # Las columnas de partición no están en el archivo: salen de la ruta
+        claves = ds.get_partition_keys(fragmento.partition_expression)
+        with pq.ParquetFile(fragmento.path) as archivo:
+            propias = [c for c in cols if c not in claves]
+            for lote in archivo.iter_batches(batch_size=filas_lote, columns=propias):
+                arrays = [pa.repeat(pa.scalar(claves[c], schema.field(c).type), lote.num_rows)
+                          if c in claves else lote.column(c) for c in cols]
+                pendientes.append(pa.Table.from_arrays(arrays, names=cols).cast(schema))
+                filas += lote.num_rows
+                if filas >= filas_lote:
+                    yield pa.concat_tables(pendientes)
+                    pendientes, filas = [], 0
+    if pendientes:
+        yield pa.concat_tables(pendientes)
+
+
+def leer_lotes(cols: list = None, filas_lote: int = 250_000, ruta: Path = None):
+    """
+    Itera el dataset en tablas Arrow de unas `filas_lote` filas (columnas `cols`, con el
+    esquema del dataset), un archivo a la vez: la memoria no crece con la cantidad de
+    periodos / particiones. Se lee cada archivo con ParquetFile y no con el escáner de
+    pyarrow.dataset, que retiene memoria por cada archivo leído. Los grupos de filas chicos
+    (uno por partición y lote del transform) se juntan hasta completar el lote.
+    """
+    dataset = _dataset(ruta)
+    fragmentos = sorted(dataset.get_fragments(), key=lambda f: f.path)
+    return _lotes(fragmentos, _proyeccion(dataset, cols), filas_lote)
+
+
+def leer_particiones(cols: list = None, filas_lote: int = 250_000, ruta: Path = None, claves=None):
+    """
+    (partición, lotes) de cada partición del dataset (solo las de `claves` si se da), con
+    los lotes como en leer_lotes pero sin mezclar filas de particiones distintas.
+    """
+    ruta = Path(ruta or DIR_CURATED)
+    dataset = _dataset(ruta)
+    schema = _proyeccion(dataset, cols)
+    grupos = {}
+    for f in dataset.get_fragments():
+        clave = Path(f.path).parent.relative_to(ruta).as_posix()
+        if claves is None or clave in claves:
+            grupos.setdefault(clave, []).append(f)
+    for clave in sorted(grupos):
+        yield clave, _lotes(sorted(grupos[clave], key=lambda f: f.path), schema, filas_lote)
+
+
+def leer_curated(cols: list = None, filtro=None, ruta: Path = None) -> pd.DataFrame:
+    """
+    DataFrame con las columnas `cols` (todas si es None; las que no existan se ignoran),
+    en el orden del dataset y con los dtypes del transform. `filtro` es una expresión de
+    pyarrow.dataset (p. ej. ds.field("periodo") == 20242) y poda particiones.
+    El texto vuelve como object o, con ICFES_STRING_DTYPE=arrow, como string[pyarrow]
+    (sea cual sea el modo con que se escribió cada archivo).
+    """
+    tabla = leer_tabla(cols, filtro, ruta)
+    cols = tabla.column_names
+    df = tabla.to_pandas(types_mapper=_TEXTO.get if texto_arrow() else None)
+    for c, dtype in DTYPES_PARTICION.items():
+        if c in df.columns:
+            df[c] = df[c].astype(dtype)
+    if not texto_arrow():
+        # Archivos escritos en modo arrow: sus metadatos de pandas piden StringDtype
+        for c in df.columns:
+            if isinstance(df[c].dtype, pd.StringDtype):
+                df[c] = df[c].astype(object)
+    return df[cols]
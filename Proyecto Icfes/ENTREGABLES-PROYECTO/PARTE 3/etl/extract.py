@@ -1,23 +1,33 @@
 # etl/extract.py
+import os
+import json
 import time
 import random
 import re
 import ast
+import threading
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from urllib.parse import urljoin
-import urllib.robotparser as rp
 
-import requests
-from bs4 import BeautifulSoup
 import pandas as pd
 
+from etl.crawl import CrawlScheduler
+from etl.http_cache import HttpCache
+from etl.http_client import HttpClient
+from etl import manifest
+from etl.parsers import get_parser
+
 # =========================
 # RUTAS DENTRO DEL CONTENEDOR AIRFLOW
 # =========================
 BASE_INPUT = Path("/opt/airflow/data/input")
 BASE_STAGING = Path("/opt/airflow/data/staging")
+BASE_CACHE = Path("/opt/airflow/data/cache")
 BASE_INPUT.mkdir(parents=True, exist_ok=True)
 BASE_STAGING.mkdir(parents=True, exist_ok=True)
+BASE_CACHE.mkdir(parents=True, exist_ok=True)
 
 # =========================
 # CONFIG
@@ -25,33 +35,93 @@ BASE_STAGING.mkdir(parents=True, exist_ok=True)
 UA = "ETL-Class/1.0 (contact: student@example.com)"
 HEADERS = {"User-Agent": UA}
 
+# Scraping concurrente de municipios (se puede ajustar por variables de entorno)
+SCRAPE_WORKERS  = int(os.getenv("SCRAPE_WORKERS", "8"))        # hilos totales
+SCRAPE_PER_HOST = int(os.getenv("SCRAPE_PER_HOST", "4"))       # concurrencia inicial por host (AIMD)
+SCRAPE_MAX_PER_HOST = int(os.getenv("SCRAPE_MAX_PER_HOST", str(SCRAPE_WORKERS)))  # techo del AIMD
+SCRAPE_DELAY    = float(os.getenv("SCRAPE_DELAY", "0.25"))     # intervalo por host si robots.txt no fija Crawl-delay (s)
+
+# Parser HTML: "lxml" (XPath compilados, rápido) o "bs4" (BeautifulSoup, referencia)
+PARSER = get_parser(os.getenv("HTML_PARSER", "lxml"))
+
+# Caché HTTP en disco (páginas de municipios, iframes…): TTL y presupuesto de tamaño
+HTTP_CACHE_TTL_HOURS = float(os.getenv("HTTP_CACHE_TTL_HOURS", "168"))   # 7 días
+HTTP_CACHE_MAX_MB    = float(os.getenv("HTTP_CACHE_MAX_MB", "200"))
+
+# Cliente HTTP y planificador compartidos: se crean al primer uso, uno por proceso (no al
+# importar: el DAG importa este módulo en el scheduler y en todas las tareas, y la conexión
+# SQLite de la caché no debe cruzar un fork). Los benchmarks pueden fijar los suyos acá.
+HTTP_CLIENT = None
+SCHEDULER = None
+_COMPARTIDOS = {}               # pid → (cliente, planificador)
+_LOCK_COMPARTIDOS = threading.Lock()
+
+
+def _compartidos() -> tuple:
+    pid = os.getpid()
+    with _LOCK_COMPARTIDOS:
+        if pid not in _COMPARTIDOS:
+            # keep-alive, compresión, caché y GET condicional (ETag / Last-Modified)
+            cliente = HttpClient(
+                headers=HEADERS,
+                store=HttpCache(BASE_CACHE / "http",
+                                ttl_seconds=HTTP_CACHE_TTL_HOURS * 3600,
+                                max_bytes=int(HTTP_CACHE_MAX_MB * 1024**2)),
+                pool_maxsize=max(SCRAPE_WORKERS, SCRAPE_MAX_PER_HOST),
+            )
+            # robots.txt (una vez por host), Crawl-delay y token bucket por host
+            planificador = CrawlScheduler(
+                cliente, UA,
+                per_host=SCRAPE_PER_HOST,
+                max_per_host=SCRAPE_MAX_PER_HOST,
+                default_delay=SCRAPE_DELAY,
+                respect_robots=os.getenv("RESPECT_ROBOTS", "1") != "0",
+            )
+            _COMPARTIDOS[pid] = (cliente, planificador)
+        return _COMPARTIDOS[pid]
+
+
+def _http_client() -> HttpClient:
+    return HTTP_CLIENT if HTTP_CLIENT is not None else _compartidos()[0]
+
+
+def _scheduler() -> CrawlScheduler:
+    return SCHEDULER if SCHEDULER is not None else _compartidos()[1]
+
 # =========================
 # UTILIDADES
 # =========================
-def _allowed_by_robots(robots_url: str, target_url: str, ua: str = UA) -> bool:
-    try:
-        parser = rp.RobotFileParser()
-        parser.set_url(robots_url)
-        parser.read()
-        allowed = parser.can_fetch(ua, target_url)
-        print(f"[robots] {robots_url} → can_fetch({target_url}) = {allowed}")
-        return allowed
-    except Exception as e:
-        print(f"[robots] No se pudo leer {robots_url}: {e} → Continuamos con prudencia.")
-        return True  # si falla lectura de robots, seguimos con prudencia
-
-def fetch_html(url, headers=None, max_retries=5, base_sleep=1.5, verbose=True):
+def fetch_html(url, headers=None, max_retries=5, base_sleep=1.5, verbose=True, scheduler=None):
     """
     Igual a tu notebook: reintentos + backoff + variantes de URL.
     (verify=False para evitar issues SSL como en el notebook)
+    - Una copia fresca en la caché del cliente compartido se devuelve sin red ni espera.
+    - Si no, el `scheduler` (el compartido por defecto) valida robots.txt y da el turno
+      por host (concurrencia AIMD + token bucket); cada status se le informa para
+      que ajuste la concurrencia del host. Los sleeps de backoff ocurren fuera del turno.
     """
     headers = headers or HEADERS
+    scheduler = scheduler or _scheduler()
+    client = _http_client()
     variants = [url, url.rstrip('/'), url.replace('https://','http://')]
 
     for v in variants:
+        # Una sola búsqueda en la caché: si la entrada está vencida, get() la reutiliza
+        # para el GET condicional y el cuerpo del 304
+        fresca, entrada = client.get_cached(v)
+        if fresca is not None:
+            return fresca.text
+
+        if not scheduler.allowed(v):
+            if verbose:
+                print(f"[robots] {v} no permitido para {UA} → se omite")
+            continue
+
         for attempt in range(1, max_retries+1):
             try:
-                r = requests.get(v, headers=headers, timeout=20, verify=False)
+                with scheduler.slot(v) as turno:
+                    r = client.get(v, headers=headers, cached=entrada, timeout=20, verify=False)
+                    turno.report(r.status_code)
                 if verbose:
                     print(f"GET {v} -> {r.status_code}")
 
@@ -81,84 +151,182 @@ def fetch_html(url, headers=None, max_retries=5, base_sleep=1.5, verbose=True):
 
     return None
 
+class _Journal:
+    """
+    Journal append-only (JSONL) del scraping de municipios: una línea por URL
+    descargada con su población. Si la tarea falla, el reintento lo lee y
+    solo descarga lo que falta; al terminar se compacta en el CSV y se borra.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._fh = None
+
+    def load(self) -> dict:
+        done = {}
+        if not self.path.exists():
+            return done
+        with self.path.open(encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # línea truncada por un corte a mitad de escritura
+                done[rec["URL"]] = rec["Poblacion"]
+        return done
+
+    def __enter__(self):
+        needs_newline = self.path.exists() and self.path.stat().st_size > 0 and \
+            not self.path.read_bytes().endswith(b"\n")
+        self._fh = self.path.open("a", encoding="utf-8")
+        if needs_newline:
+            self._fh.write("\n")
+        return self
+
+    def append(self, url, poblacion):
+        line = json.dumps({"URL": url, "Poblacion": poblacion}, ensure_ascii=False)
+        with self._lock:
+            self._fh.write(line + "\n")
+            self._fh.flush()
+
+    def __exit__(self, *exc):
+        self._fh.close()
+        self._fh = None
+
+    def discard(self):
+        self.path.unlink(missing_ok=True)
+
+
+def _listado_municipios(html_mun: str) -> pd.DataFrame:
+    """Parsea el listado de municipios.com.co → DataFrame (Departamento, Municipio, URL)."""
+    departamentos, municipios, urls = PARSER.listado_municipios(html_mun)
+    return pd.DataFrame({
+        "Departamento": departamentos,
+        "Municipio": municipios,
+        "URL": urls
+    })
+
+def scrape_poblacion_municipios(df_municipios: pd.DataFrame, workers=SCRAPE_WORKERS,
+                                scheduler: CrawlScheduler = None,
+                                journal: Path = None) -> pd.DataFrame:
+    """
+    Descarga la página de cada municipio y extrae su población.
+    Con workers > 1 usa un pool de hilos acotado; robots.txt, el cupo por host y el
+    ritmo los impone el CrawlScheduler. El orden de filas es el del listado.
+    Con `journal`, cada página descargada queda registrada al instante y las ya
+    registradas (de un intento anterior) no se vuelven a pedir.
+    """
+    scheduler = scheduler or _scheduler()
+    jr = _Journal(journal) if journal is not None else None
+
+    urls = df_municipios["URL"].tolist()
+    done = jr.load() if jr is not None else {}
+    pendientes = list(dict.fromkeys(u for u in urls if u not in done))
+    if done:
+        print(f"[JOURNAL] {len(urls) - len(pendientes)} municipios ya procesados en {jr.path.name}; "
+              f"faltan {len(pendientes)}")
+
+    def _uno(url_muni):
+        html_det = fetch_html(url_muni, headers=HEADERS, verbose=False, scheduler=scheduler)
+        if not html_det:
+            return None  # sin registrar: el próximo intento la vuelve a pedir
+        poblacion = PARSER.poblacion_municipio(html_det)
+        if jr is not None:
+            jr.append(url_muni, poblacion)
+        return poblacion
+
+    t0 = time.perf_counter()
+    with (jr if jr is not None else nullcontext()):
+        if workers <= 1:
+            nuevos = [_uno(u) for u in pendientes]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scrape") as pool:
+                nuevos = list(pool.map(_uno, pendientes))
+    elapsed = time.perf_counter() - t0
+
+    done.update(zip(pendientes, nuevos))
+    poblaciones = [done.get(u) for u in urls]
+    ok = sum(p is not None for p in poblaciones)
+    print(f"[SCRAPE] {ok}/{len(urls)} municipios con población; {len(pendientes)} descargados en {elapsed:.1f}s "
+          f"(workers={workers})")
+    for t, host, limite, motivo in scheduler.concurrency_log():
+        print(f"[AIMD] {time.strftime('%H:%M:%S', time.localtime(t))} {host} concurrencia={limite} ({motivo})")
+
+    return pd.DataFrame({
+        "Departamento": df_municipios["Departamento"].tolist(),
+        "Municipio": df_municipios["Municipio"].tolist(),
+        "URL": urls,
+        "Poblacion": poblaciones
+    })
+
 # =========================
-# TAREA PRINCIPAL (Airflow)
+# FUENTES
 # =========================
-def extract():
-    print("== EXTRACT: empezando (descarga HTML a input y CSV a staging) ==")
+URL_IDH = "https://es.wikipedia.org/wiki/Anexo:Departamentos_de_Colombia_por_IDH"
+URL_DANE = "https://www.dane.gov.co/index.php/estadisticas-por-tema/pobreza-y-condiciones-de-vida/pobreza-monetaria"
+URL_DANE_BASE = "https://www.dane.gov.co"
+URL_MUN = "https://www.municipios.com.co/municipios"
+
+def _html_input(url: str, path: Path, error: str) -> str:
+    """HTML de `path` en input; si no existe lo descarga y lo guarda."""
+    if path.exists():
+        print(f"[CACHE] {path}")
+        return path.read_text(encoding="utf-8")
+    html = fetch_html(url, headers=HEADERS)
+    if not html:
+        raise RuntimeError(error)
+    path.write_text(html, encoding="utf-8")
+    print(f"[OK] Guardado: {path}")
+    return html
+
+# =========================
+# TAREAS (Airflow): una por fuente, independientes entre sí
+# =========================
+def extract_idh():
+    print("== EXTRACT IDH: Wikipedia → input + staging ==")
 
     # ---------- 1) Wikipedia: IDH por departamento ----------
-    URL_IDH = "https://es.wikipedia.org/wiki/Anexo:Departamentos_de_Colombia_por_IDH"
     FILE_IDH_HTML = BASE_INPUT / "wikipedia_departamentos_idh.html"
+    FILE_IDH_STAGING = BASE_STAGING / "idh_departamentos.csv"
+    html = _html_input(URL_IDH, FILE_IDH_HTML, "No se pudo descargar Wikipedia IDH")
 
-    if not FILE_IDH_HTML.exists():
-        html = fetch_html(URL_IDH, headers=HEADERS)
-        if not html:
-            raise RuntimeError("No se pudo descargar Wikipedia IDH")
-        FILE_IDH_HTML.write_text(html, encoding="utf-8")
-        print(f"[OK] Guardado: {FILE_IDH_HTML}")
-    else:
-        print(f"[CACHE] {FILE_IDH_HTML}")
+    # Mismo HTML y mismo CSV que la corrida anterior: no hace falta re-parsear
+    if manifest.unchanged("idh", [FILE_IDH_HTML, FILE_IDH_STAGING]):
+        print(f"[SKIP] {FILE_IDH_STAGING} al día (HTML sin cambios)")
+        return
 
     # Parsear tabla y guardar CSV (staging) como en el notebook
-    html = FILE_IDH_HTML.read_text(encoding="utf-8")
-    soup = BeautifulSoup(html, "lxml")
-    table = soup.find("table", {"class": "wikitable"})
-
-    rows = []
-    for tr in table.select("tr"):
-        cols = tr.find_all("td")
-        if len(cols) != 3:
-            continue
-        entidad = cols[0].get_text(strip=True)
-        idh = cols[1].get_text(strip=True).replace(",", ".")
-        poblacion = cols[2].get_text(strip=True).replace("\xa0", "").replace(" ", "")
-        rows.append({
-            "Entidad": entidad,
-            "IDH": float(idh),
-            "Población": int(poblacion)
-        })
-
-    df_idh_departamento = pd.DataFrame(rows)
-    FILE_IDH_STAGING = BASE_STAGING / "idh_departamentos.csv"
+    df_idh_departamento = pd.DataFrame(PARSER.tabla_idh(html))
     df_idh_departamento.to_csv(FILE_IDH_STAGING, index=False, encoding="utf-8")
     print(f"[OK] STAGING: {FILE_IDH_STAGING} ({len(df_idh_departamento)} filas)")
+    manifest.record("idh", [FILE_IDH_HTML, FILE_IDH_STAGING])
+
+def extract_dane():
+    print("== EXTRACT DANE: pobreza monetaria → input + staging ==")
 
     # ---------- 2) DANE: pobreza monetaria (página + iframe) ----------
-    URL_DANE = "https://www.dane.gov.co/index.php/estadisticas-por-tema/pobreza-y-condiciones-de-vida/pobreza-monetaria"
     FILE_DANE_MAIN = BASE_INPUT / "dane_pobreza_monetaria.html"
     FILE_DANE_IFRAME = BASE_INPUT / "dane_pobreza_monetaria_visualizacion.html"
+    FILE_POBREZA_STAGING = BASE_STAGING / "dane_pobreza_monetaria.csv"
 
-    if not FILE_DANE_MAIN.exists():
-        html_main = fetch_html(URL_DANE, headers=HEADERS)
-        if not html_main:
-            raise RuntimeError("No se pudo descargar página principal del DANE")
-        FILE_DANE_MAIN.write_text(html_main, encoding="utf-8")
-        print(f"[OK] Guardado: {FILE_DANE_MAIN}")
-    else:
-        html_main = FILE_DANE_MAIN.read_text(encoding="utf-8")
-        print(f"[CACHE] {FILE_DANE_MAIN}")
+    html_main = _html_input(URL_DANE, FILE_DANE_MAIN, "No se pudo descargar página principal del DANE")
 
     # Extraer iframe y guardarlo
-    soup_dane = BeautifulSoup(html_main, "lxml")
-    iframe = soup_dane.find("iframe", src=lambda s: s and "gra-PMDepartamental" in s)
-    if not iframe or not iframe.get("src"):
+    iframe_src = PARSER.iframe_pobreza_src(html_main)
+    if not iframe_src:
         raise RuntimeError("No se encontró el iframe de pobreza monetaria en DANE")
 
-    iframe_url = urljoin("https://www.dane.gov.co", iframe["src"])
-    if not FILE_DANE_IFRAME.exists():
-        html_iframe = fetch_html(iframe_url, headers=HEADERS)
-        if not html_iframe:
-            raise RuntimeError("No se pudo descargar el iframe de la visualización del DANE")
-        FILE_DANE_IFRAME.write_text(html_iframe, encoding="utf-8")
-        print(f"[OK] Guardado: {FILE_DANE_IFRAME}")
-    else:
-        html_iframe = FILE_DANE_IFRAME.read_text(encoding="utf-8")
-        print(f"[CACHE] {FILE_DANE_IFRAME}")
+    iframe_url = urljoin(URL_DANE_BASE, iframe_src)
+    html_iframe = _html_input(iframe_url, FILE_DANE_IFRAME,
+                              "No se pudo descargar el iframe de la visualización del DANE")
+
+    if manifest.unchanged("dane", [FILE_DANE_MAIN, FILE_DANE_IFRAME, FILE_POBREZA_STAGING]):
+        print(f"[SKIP] {FILE_POBREZA_STAGING} al día (HTML sin cambios)")
+        return
 
     # Parseo del <script> del iframe → CSV en staging (igual que notebook)
-    soup_iframe = BeautifulSoup(html_iframe, "lxml")
-    script = next(s.text for s in soup_iframe.find_all("script") if "labels" in s.text)
+    script = PARSER.script_grafico(html_iframe)
 
     departamentos = ast.literal_eval("[" + re.search(r"labels:\s*\[(.*?)\]", script, re.S).group(1) + "]")
     data_2023 = ast.literal_eval("[" + re.search(r"label:\s*'2023'.*?data:\s*\[(.*?)\]", script, re.S).group(1) + "]")
@@ -170,68 +338,40 @@ def extract():
         "Pobreza_2024": data_2024
     })
 
-    FILE_POBREZA_STAGING = BASE_STAGING / "dane_pobreza_monetaria.csv"
     df_pobreza.to_csv(FILE_POBREZA_STAGING, index=False, encoding="utf-8-sig")
     print(f"[OK] STAGING: {FILE_POBREZA_STAGING} ({len(df_pobreza)} filas)")
+    manifest.record("dane", [FILE_DANE_MAIN, FILE_DANE_IFRAME, FILE_POBREZA_STAGING])
+
+def extract_municipios():
+    print("== EXTRACT MUNICIPIOS: municipios.com.co → input + staging ==")
 
     # ---------- 3) Municipios.com.co: listado y población ----------
-    URL_MUN = "https://www.municipios.com.co/municipios"
     FILE_MUN_HTML = BASE_INPUT / "municipios_colombia.html"
-
-    if not FILE_MUN_HTML.exists():
-        html_mun = fetch_html(URL_MUN, headers=HEADERS)
-        if not html_mun:
-            raise RuntimeError("No se pudo descargar municipios.com.co")
-        FILE_MUN_HTML.write_text(html_mun, encoding="utf-8")
-        print(f"[OK] Guardado: {FILE_MUN_HTML}")
-    else:
-        html_mun = FILE_MUN_HTML.read_text(encoding="utf-8")
-        print(f"[CACHE] {FILE_MUN_HTML}")
+    html_mun = _html_input(URL_MUN, FILE_MUN_HTML, "No se pudo descargar municipios.com.co")
 
     # Parsear listado de municipios (igual al notebook)
-    soup_mun = BeautifulSoup(html_mun, "lxml")
-    departamentos = []
-    municipios = []
-    urls = []
-
-    for div in soup_mun.find_all("div", class_="departamento_slide"):
-        dep = div.find("h3").get_text(strip=True)
-        for a in div.select("ul.municipiosDepartamento li a"):
-            departamentos.append(dep)
-            municipios.append(a.get_text(strip=True))
-            urls.append(a["href"])
-
-    df_municipios = pd.DataFrame({
-        "Departamento": departamentos,
-        "Municipio": municipios,
-        "URL": urls
-    })
+    df_municipios = _listado_municipios(html_mun)
 
-    # Scraping de población por municipio (como en tu notebook)
-    resultados = []
-    for _, row in df_municipios.iterrows():
-        url_muni = row["URL"]
-        html_det = fetch_html(url_muni, headers=HEADERS, verbose=False)
-        poblacion_num = None
-        if html_det:
-            soup_det = BeautifulSoup(html_det, "lxml")
-            blocks = soup_det.find_all("div", class_="col-6 col-md-4 py-4")
-            for div in blocks:
-                text = div.get_text(" ", strip=True)
-                if "habitantes" in text.lower():
-                    poblacion_num = text.replace("habitantes", "").strip()
-                    break
-
-        resultados.append({
-            "Departamento": row["Departamento"],
-            "Municipio": row["Municipio"],
-            "URL": url_muni,
-            "Poblacion": poblacion_num
-        })
-
-    df_poblacion = pd.DataFrame(resultados)
+    # Scraping de población por municipio (concurrente, con cupo por host).
+    # El journal permite que un reintento de Airflow retome donde quedó.
+    FILE_POBLACION_JOURNAL = BASE_STAGING / "poblacion_municipios.journal.jsonl"
+    df_poblacion = scrape_poblacion_municipios(df_municipios, journal=FILE_POBLACION_JOURNAL)
+
+    # Compactar: journal → CSV definitivo, y descartar el journal
     FILE_POBLACION_STAGING = BASE_STAGING / "poblacion_municipios.csv"
     df_poblacion.to_csv(FILE_POBLACION_STAGING, index=False, encoding="utf-8-sig")
+    _Journal(FILE_POBLACION_JOURNAL).discard()
     print(f"[OK] STAGING: {FILE_POBLACION_STAGING} ({len(df_poblacion)} filas)")
+    # Las páginas de detalle cambian por su cuenta: se scrapea siempre (la caché HTTP lo
+    # abarata) y el hash del CSV resultante decide si hubo cambios.
+    manifest.record("municipios", [FILE_MUN_HTML, FILE_POBLACION_STAGING])
+
+    print(f"[HTTP] {_http_client().stats.snapshot()}")
 
+def extract():
+    """Las tres fuentes en secuencia (uso fuera del DAG; el DAG las corre en paralelo)."""
+    print("== EXTRACT: empezando (descarga HTML a input y CSV a staging) ==")
+    extract_idh()
+    extract_dane()
+    extract_municipios()
     print("== EXTRACT completado: 4 HTML en input + 3 CSV en staging ==")
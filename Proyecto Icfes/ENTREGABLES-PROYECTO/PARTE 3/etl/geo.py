@@ -0,0 +1,244 @@
+# etl/geo.py
+"""
+Índice geográfico: nombres normalizados → códigos enteros de departamento y municipio.
+
+- Departamentos: código DIVIPOLA oficial del DANE (05 ANTIOQUIA, 11 BOGOTÁ, ...).
+- Municipios: código estable `depto * 1000 + n`, asignado la primera vez que aparece el
+  par (depto, municipio) en la referencia de población y guardado en disco
+  (data/staging/geo_index.json). Las referencias no traen el código DIVIPOLA municipal,
+  así que no es el oficial, pero no cambia entre corridas: un municipio nuevo toma el
+  siguiente número libre de su departamento y uno que desaparece no libera el suyo.
+
+Un nombre sin coincidencia exacta se resuelve por trigramas dentro de su departamento:
+similitud de Jaccard ≥ GEO_FUZZY_UMBRAL y un único mejor candidato (con empate no se
+resuelve). Cada resolución (también las fallidas) queda en el memo del mismo archivo y
+la corrida siguiente no la vuelve a calcular; el memo se descarta si cambia la
+referencia o el umbral.
+
+El transform busca pobreza, IDH y poblaciones por estos códigos (arreglos indexados
+por código) en vez de por texto.
+"""
+import hashlib
+import json
+import os
+import re
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from etl.normalize import norm_txt
+
+FILE_GEO_INDEX = Path("/opt/airflow/data/staging/geo_index.json")
+
+# Similitud mínima (Jaccard de trigramas) para aceptar un nombre aproximado
+GEO_FUZZY_UMBRAL = float(os.getenv("GEO_FUZZY_UMBRAL", "0.6"))
+
+SIN_CODIGO = 0      # ningún código DIVIPOLA es 0
+
+# ===== Códigos DIVIPOLA de departamento (nombre como queda tras map_deptos) =====
+DIVIPOLA_DEPTOS = {
+    5: "ANTIOQUIA", 8: "ATLÁNTICO", 11: "BOGOTÁ, D.C.", 13: "BOLÍVAR", 15: "BOYACÁ",
+    17: "CALDAS", 18: "CAQUETÁ", 19: "CAUCA", 20: "CESAR", 23: "CÓRDOBA",
+    25: "CUNDINAMARCA", 27: "CHOCÓ", 41: "HUILA", 44: "LA GUAJIRA", 47: "MAGDALENA",
+    50: "META", 52: "NARIÑO", 54: "NORTE DE SANTANDER", 63: "QUINDÍO", 66: "RISARALDA",
+    68: "SANTANDER", 70: "SUCRE", 73: "TOLIMA", 76: "VALLE DEL CAUCA", 81: "ARAUCA",
+    85: "CASANARE", 86: "PUTUMAYO", 88: "SAN ANDRÉS, PROVIDENCIA Y SANTA CATALINA",
+    91: "AMAZONAS", 94: "GUAINÍA", 95: "GUAVIARE", 97: "VAUPÉS", 99: "VICHADA",
+}
+# Otras grafías frecuentes (las de map_deptos se agregan al construir el índice)
+_ALIAS_DEPTOS = {
+    "BOGOTA D.C.": 11, "BOGOTA DC": 11, "VALLE": 76, "NORTE SANTANDER": 54, "GUAJIRA": 44,
+    "SAN ANDRES": 88, "SAN ANDRES Y PROVIDENCIA": 88,
+    "ARCHIPIELAGO DE SAN ANDRES, PROVIDENCIA Y SANTA CATALINA": 88,
+}
+
+
+def _palabras(nombre: str) -> list:
+    return re.sub(r"[^A-Z0-9 ]", " ", nombre).split()
+
+
+def _trigramas(nombre: str) -> frozenset:
+    """Trigramas de `nombre` (ya normalizado) sin puntuación, con dos espacios de relleno al inicio."""
+    relleno = f"  {' '.join(_palabras(nombre))} "
+    return frozenset(relleno[i:i + 3] for i in range(len(relleno) - 2))
+
+
+class _Trigramas:
+    """
+    Índice invertido trigrama → claves, con la búsqueda del único mejor candidato. Antes de
+    los trigramas se prueba el nombre sin espacios ni puntuación (FUENTE DE ORO = FUENTEDEORO).
+    """
+
+    def __init__(self, nombres: dict):
+        self.compactos = {}
+        for clave, nombre in nombres.items():
+            compacto = "".join(_palabras(nombre))
+            # Dos claves con el mismo compacto: ambiguo, no se resuelve así
+            self.compactos[compacto] = None if compacto in self.compactos else clave
+        self.tris = {clave: _trigramas(nombre) for clave, nombre in nombres.items()}
+        self.postings = {}
+        for clave, tris in self.tris.items():
+            for t in tris:
+                self.postings.setdefault(t, []).append(clave)
+
+    def mejor(self, nombre: str, umbral: float):
+        """Clave más parecida a `nombre` o None si no llega al umbral o hay empate."""
+        compacto = self.compactos.get("".join(_palabras(nombre)))
+        if compacto is not None:
+            return compacto
+        q = _trigramas(nombre)
+        comunes = Counter(c for t in q for c in self.postings.get(t, ()))
+        puntajes = sorted(((n / (len(q) + len(self.tris[c]) - n), c) for c, n in comunes.items()),
+                          reverse=True)
+        if not puntajes or puntajes[0][0] < umbral:
+            return None
+        if len(puntajes) > 1 and puntajes[1][0] == puntajes[0][0]:
+            return None
+        return puntajes[0][1]
+
+
+class IndiceGeo:
+    """
+    Códigos de departamento y municipio para los pares (depto, municipio) de la referencia
+    de población. `ruta` guarda los códigos municipales asignados y el memo de búsquedas
+    aproximadas; se actualiza con guardar().
+    """
+
+    def __init__(self, pares: pd.DataFrame, ruta: Path = None, mapping_deptos: dict = None):
+        self.ruta = Path(ruta or FILE_GEO_INDEX)
+        self.deptos = {norm_txt(n): c for c, n in DIVIPOLA_DEPTOS.items()}
+        self.deptos.update(_ALIAS_DEPTOS)
+        for alias, nombre in (mapping_deptos or {}).items():
+            codigo = self.deptos.get(norm_txt(nombre))
+            if codigo is not None:
+                self.deptos.setdefault(norm_txt(alias), codigo)
+        self._fuzzy_deptos = _Trigramas({a: a for a in self.deptos})
+
+        guardado = self._leer()
+        self.memo, self.memo_nuevo = {}, {}     # memo_nuevo: resueltos en este proceso (ver transform paralelo)
+        self._cambios = False
+        self.municipios = {k: int(v) for k, v in guardado.get("municipios", {}).items()}
+        nuevos = self._asignar(pares)
+        self.huella = hashlib.sha256("\n".join(sorted(self._referencia)).encode()).hexdigest()
+        memo_valido = (guardado.get("referencia") == self.huella
+                       and guardado.get("umbral") == GEO_FUZZY_UMBRAL)
+        if memo_valido:
+            self.memo = dict(guardado.get("memo", {}), **self.memo)
+        self._cambios = self._cambios or nuevos > 0 or not memo_valido
+        self._fuzzy_mcpios = {}
+        print(f"[GEO] {len(self._referencia):,} municipios con código ({nuevos} nuevos) · "
+              f"memo aproximado: {len(self.memo):,} nombres"
+              + ("" if memo_valido or not guardado else " (descartado: cambió la referencia)"))
+
+    # ----- persistencia -----
+    def _leer(self) -> dict:
+        try:
+            return json.loads(self.ruta.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def guardar(self) -> None:
+        if not self._cambios:
+            return
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "departamentos": {f"{c:02d}": n for c, n in DIVIPOLA_DEPTOS.items()},
+            "municipios": self.municipios,
+            "referencia": self.huella,
+            "umbral": GEO_FUZZY_UMBRAL,
+            "memo": self.memo,
+        }
+        tmp = self.ruta.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, indent=1, ensure_ascii=False, sort_keys=True), encoding="utf-8")
+        tmp.replace(self.ruta)
+        self._cambios = False
+
+    def _asignar(self, pares: pd.DataFrame) -> int:
+        """Código para cada (depto, municipio) de `pares` que aún no lo tiene; devuelve cuántos se asignaron."""
+        claves = {f"{self.codigo_depto(d)}|{norm_txt(m)}" for d, m in zip(pares.iloc[:, 0], pares.iloc[:, 1])}
+        self._referencia = {c for c in claves if not c.startswith(f"{SIN_CODIGO}|")}
+        siguiente = {}
+        for clave, codigo in self.municipios.items():
+            depto = int(clave.split("|", 1)[0])
+            siguiente[depto] = max(siguiente.get(depto, 1), codigo % 1000 + 1)
+        nuevos = sorted(self._referencia - self.municipios.keys(),
+                        key=lambda c: (int(c.split("|", 1)[0]), c))
+        for clave in nuevos:
+            depto = int(clave.split("|", 1)[0])
+            n = siguiente.get(depto, 1)
+            self.municipios[clave] = depto * 1000 + n
+            siguiente[depto] = n + 1
+        return len(nuevos)
+
+    def incorporar(self, memo: dict) -> None:
+        """Agrega resoluciones hechas en otro proceso (hijos del modo paralelo)."""
+        for clave, codigo in memo.items():
+            if clave not in self.memo:
+                self._memorizar(clave, codigo)
+
+    # ----- resolución de un nombre -----
+    def _memorizar(self, clave: str, codigo):
+        self.memo[clave] = codigo
+        self.memo_nuevo[clave] = codigo
+        self._cambios = True
+        return codigo
+
+    def codigo_depto(self, nombre) -> int:
+        clave = norm_txt(nombre)
+        codigo = self.deptos.get(clave)
+        if codigo is not None:
+            return codigo
+        memo = f"D|{clave}"
+        if memo not in self.memo:
+            alias = self._fuzzy_deptos.mejor(clave, GEO_FUZZY_UMBRAL) if clave else None
+            self._memorizar(memo, self.deptos[alias] if alias else None)
+        return self.memo[memo] or SIN_CODIGO
+
+    def codigo_mcpio(self, depto: int, nombre) -> int:
+        if depto == SIN_CODIGO:
+            return SIN_CODIGO
+        clave = f"{depto}|{norm_txt(nombre)}"
+        codigo = self.municipios.get(clave)
+        if codigo is not None and clave in self._referencia:
+            return codigo
+        if clave not in self.memo:
+            if depto not in self._fuzzy_mcpios:
+                prefijo = f"{depto}|"
+                self._fuzzy_mcpios[depto] = _Trigramas({k: k[len(prefijo):] for k in self._referencia
+                                                        if k.startswith(prefijo)})
+            buscado = clave.split("|", 1)[1]
+            vecino = self._fuzzy_mcpios[depto].mejor(buscado, GEO_FUZZY_UMBRAL) if buscado else None
+            self._memorizar(clave, self.municipios[vecino] if vecino else None)
+        return self.memo[clave] or SIN_CODIGO
+
+    # ----- columnas completas (una resolución por valor distinto) -----
+    def codigos_depto(self, s: pd.Series) -> np.ndarray:
+        """Código DIVIPOLA por fila (SIN_CODIGO si el nombre no se resuelve)."""
+        cod, uniq = pd.factorize(s, use_na_sentinel=False)
+        tabla = np.array([self.codigo_depto(u) for u in uniq] or [SIN_CODIGO], dtype=np.int16)
+        return tabla[cod]
+
+    def codigos_mcpio(self, deptos: np.ndarray, s: pd.Series) -> np.ndarray:
+        """Código de municipio por fila, dado el código de departamento de cada fila."""
+        cod_m, uniq_m = pd.factorize(s, use_na_sentinel=False)
+        base = max(len(uniq_m), 1)
+        cod_fila, combos = pd.factorize(deptos.astype(np.int64) * base + cod_m)
+        tabla = [self.codigo_mcpio(int(d), uniq_m[m]) for d, m in zip(*np.divmod(combos, base))]
+        return np.array(tabla or [SIN_CODIGO], dtype=np.int32)[cod_fila]
+
+
+def tabla_por_codigo(ref: pd.Series) -> np.ndarray:
+    """`ref` (indexada por código) como arreglo denso: valor en la posición del código, NaN en el resto."""
+    tabla = np.full(int(ref.index.max()) + 1 if len(ref) else 1, np.nan)
+    tabla[ref.index.to_numpy()] = ref.to_numpy(dtype=float)
+    return tabla
+
+
+def buscar_codigo(codigos: np.ndarray, tabla: np.ndarray) -> np.ndarray:
+    """Valor de `tabla` para cada código (NaN si el código no está o es SIN_CODIGO)."""
+    dentro = codigos < len(tabla)
+    out = np.full(len(codigos), np.nan)
+    out[dentro] = tabla[codigos[dentro]]
+    return out
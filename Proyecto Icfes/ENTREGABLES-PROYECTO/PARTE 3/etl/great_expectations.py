@@ -2,13 +2,36 @@
 
 from pathlib import Path
 import json
+import os
+import time
 import pandas as pd
-from great_expectations.dataset import PandasDataset
+
+from etl.curated import (DIR_CURATED, columnas, filas_periodo, leer_curated, leer_lotes,
+                         leer_particiones, leer_tabla, particiones)
+from etl.manifest import file_entry
+from etl.validation import (TIPOS_GE, Estadisticas, cargar_suite, columnas_suite, validar,
+                            validar_lotes, version_suite)
+from etl import validation_sql
 
 # === Rutas dentro del contenedor Airflow ===
 BASE_OUTPUT = Path("/opt/airflow/data/output")
-IN_FINAL = BASE_OUTPUT / "df_icfes_2024_final.csv"
+IN_FINAL = DIR_CURATED
 GE_JSON = BASE_OUTPUT / "ge_report.json"
+DW_JSON = BASE_OUTPUT / "ge_dw_report.json"
+# Suite de PARTE 2 (src/validation/gx/expectations, montada en docker-compose): fuente única
+# de las expectativas, con meta.report_key (clave del reporte) y meta.critical
+FILE_SUITE = Path(os.getenv("GE_SUITE", "/opt/airflow/gx/expectations/icfes_suite.json"))
+
+# Motor de validación: "native" (etl/validation.py, sin pandas ni great_expectations),
+# "ge" (PandasDataset) o "both" (corre los dos y compara los resultados)
+GE_BACKEND = os.getenv("GE_BACKEND", "native").lower()
+# Filas por lote del motor native (lee archivo por archivo, memoria constante); 0 = tabla entera
+GE_LOTE_FILAS = int(os.getenv("GE_LOTE_FILAS", "250000"))
+# Estadísticas por partición guardadas entre corridas: solo se validan las particiones
+# nuevas o modificadas (motor native por lotes); 0 = validar todo siempre
+GE_CACHE = os.getenv("GE_CACHE", "1") == "1"
+# DW que valida great_expectations_dw() después de load (el mismo de load y analytics)
+DW_CONN_URI = os.getenv("DW_CONN_URI")
 
 
 def _succ(x) -> bool:
@@ -30,65 +53,216 @@ def _brief(res) -> dict:
     return out
 
 
+def _validar_ge(df: pd.DataFrame, suite: list) -> dict:
+    """La suite con PandasDataset de great_expectations (se importa solo si se usa)."""
+    from great_expectations.dataset import PandasDataset
+
+    # PandasDataset valida "str" valor a valor solo en columnas object: el texto Arrow
+    # (ICFES_STRING_DTYPE=arrow) se le pasa como object; acá es solo estu_pais_reside
+    ge_df = PandasDataset(df.astype({c: object for c in df.columns if isinstance(df[c].dtype, pd.StringDtype)}))
+    metodos = {tipo: ge_tipo for ge_tipo, tipo in TIPOS_GE.items()}
+    out = {}
+    for clave, tipo, cols, kw in suite:
+        nombres = (cols,) if isinstance(cols, str) else tuple(cols)
+        if not set(nombres).issubset(ge_df.columns):
+            out[clave] = None
+        elif tipo == "pair_gt":
+            #  Regla entre columnas (el reporte solo lleva success, como antes)
+            mask = ge_df[nombres[0]] >= ge_df[nombres[1]] if kw.get("or_equal") else ge_df[nombres[0]] > ge_df[nombres[1]]
+            out[clave] = {
+                "success": bool(mask.all()),
+                "unexpected_count": int((~mask).sum()),
+                "unexpected_percent": round((~mask).sum() / len(ge_df) * 100, 4),
+            }
+        else:
+            expectativa = getattr(ge_df, metodos.get(tipo, tipo))
+            out[clave] = expectativa(*nombres, **kw) if nombres else expectativa(**kw)
+    return out
+
+
+def _ruta_cache() -> Path:
+    # Dentro del dataset, como el _ledger.json de transform (pyarrow ignora los "_*"): si se
+    # borra el dataset, se borra también su caché
+    return IN_FINAL / "_ge_cache.json"
+
+
+def _leer_cache() -> dict:
+    try:
+        return json.loads(_ruta_cache().read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _guardar_cache(cache: dict):
+    tmp = _ruta_cache().with_suffix(".tmp")
+    tmp.write_text(json.dumps(cache, ensure_ascii=False, sort_keys=True), encoding="utf-8")
+    tmp.replace(_ruta_cache())
+
+
+def _estadisticas_cache(suite: list, cols: list) -> Estadisticas:
+    """
+    Estadísticas del dataset completo a partir de las de cada partición. Una partición se
+    vuelve a leer solo si cambió su contenido (sha256 de sus archivos, reutilizado si tamaño
+    y mtime no cambiaron) o la versión de la suite; el resto sale de _ge_cache.json.
+    """
+    version = version_suite(suite)
+    cache = _leer_cache()
+    previas = cache.get("particiones", {}) if cache.get("suite") == version else {}
+    if cache and not previas:
+        print("[GE] Caché de otra versión de la suite → se valida todo")
+
+    actuales, vigentes = {}, {}
+    for clave, rutas in particiones(IN_FINAL).items():
+        previa = previas.get(clave, {})
+        huellas = {Path(r).name: file_entry(Path(r), previa.get("archivos", {}).get(Path(r).name)) for r in rutas}
+        actuales[clave] = {"archivos": huellas}
+        mismas = {n: h["sha256"] for n, h in huellas.items()}
+        if previa and mismas == {n: h["sha256"] for n, h in previa["archivos"].items()}:
+            vigentes[clave] = previa["estadisticas"]
+
+    pendientes = set(actuales) - set(vigentes)
+    nuevas = {}
+    for clave, lotes in leer_particiones(cols, GE_LOTE_FILAS, IN_FINAL, claves=pendientes):
+        nuevas[clave] = validar_lotes(lotes, suite).a_dict()
+
+    total = Estadisticas(suite)
+    for clave in sorted(actuales):
+        actuales[clave]["estadisticas"] = vigentes.get(clave) or nuevas[clave]
+        total.combinar(Estadisticas.desde_dict(suite, actuales[clave]["estadisticas"]))
+    _guardar_cache({"suite": version, "particiones": actuales})
+    print(f"[GE] Caché: {len(pendientes)} de {len(actuales)} particiones validadas, "
+          f"{len(vigentes)} desde {_ruta_cache()}")
+    return total
+
+
+def _correr(backend: str, suite: list) -> tuple:
+    """(resultados por clave, filas del dataset, segundos) de `suite` con el motor `backend`."""
+    # Solo las columnas que usan las expectativas (el Parquet permite leer nada más que estas)
+    cols = columnas_suite(suite)
+    if backend == "ge":
+        cols += [c for _, tipo, cs, _ in suite if tipo not in TIPOS_GE.values()
+                 for c in ((cs,) if isinstance(cs, str) else cs) if c not in cols]
+    t0 = time.perf_counter()
+    if backend == "native" and GE_LOTE_FILAS > 0:
+        if GE_CACHE:
+            est = _estadisticas_cache(suite, cols)
+        else:
+            est = validar_lotes(leer_lotes(cols, GE_LOTE_FILAS, ruta=IN_FINAL), suite)
+        for c, st in est.columnas.items():
+            print(f"[GE] {c}: nulos={st['nulos']:,} min={st['min']} max={st['max']}")
+        res, filas = est.resultados(), est.filas
+    elif backend == "native":
+        tabla = leer_tabla(cols, ruta=IN_FINAL)
+        res, filas = validar(tabla, suite), tabla.num_rows
+    elif backend == "ge":
+        df = leer_curated(cols, ruta=IN_FINAL)
+        res, filas = _validar_ge(df, suite), len(df)
+    else:
+        raise ValueError(f"GE_BACKEND desconocido: {backend} (native | ge | both)")
+    return res, filas, time.perf_counter() - t0
+
+
 def great_expectations():
-    print("== GE: iniciando validaciones sobre df_icfes_2024_final.csv ==")
+    print("== GE: iniciando validaciones sobre df_icfes_2024_final ==")
 
-    # Cargar dataset final
-    df = pd.read_csv(IN_FINAL, encoding="utf-8-sig", low_memory=False)
-    print(f"[GE] Dataset leído: {IN_FINAL}  Shape={df.shape}")
+    suite, criticas = cargar_suite(FILE_SUITE)
+    n_cols = len(columnas(IN_FINAL))
+    print(f"[GE] Dataset: {IN_FINAL}  columnas={n_cols}  validadas={len(columnas_suite(suite))}  motor={GE_BACKEND}")
+    print(f"[GE] Suite: {FILE_SUITE} ({len(suite)} expectativas, críticas: {', '.join(criticas) or 'ninguna'})")
+
+    backends = ["native", "ge"] if GE_BACKEND == "both" else [GE_BACKEND]
+    resultados = {}
+    for b in backends:
+        resultados[b], filas, segundos = _correr(b, suite)
+        print(f"[GE] Suite de {len(suite)} expectativas con el motor {b}: {segundos:.2f}s  filas={filas:,}")
+    res = resultados[backends[0]]
 
-    ge_df = PandasDataset(df)
     summary = {
         "dataset": str(IN_FINAL),
-        "shape": {"rows": int(df.shape[0]), "cols": int(df.shape[1])},
-        "expectations": {}
+        "shape": {"rows": int(filas), "cols": int(n_cols)},
+        "expectations": {clave: _brief(res[clave]) for clave, *_ in suite},
     }
 
-    # =========================
-    # Expectativas críticas
-    # =========================
-    res1 = ge_df.expect_column_values_to_not_be_null("punt_global")
-    res2 = ge_df.expect_column_values_to_be_between("punt_global", min_value=0, max_value=500)
-    res3 = ge_df.expect_column_values_to_not_be_null("estu_depto_reside")
-
-    summary["expectations"]["not_null_punt_global"] = _brief(res1)
-    summary["expectations"]["range_punt_global_0_500"] = _brief(res2)
-    summary["expectations"]["not_null_depto_reside"] = _brief(res3)
-
-    # =========================
-    # Otras expectativas
-    # =========================
-    res4 = ge_df.expect_column_values_to_be_of_type("periodo", "int64") if "periodo" in ge_df.columns else None
-    res5 = ge_df.expect_column_values_to_be_of_type("estu_pais_reside", "str") if "estu_pais_reside" in ge_df.columns else None
-    res6 = ge_df.expect_column_values_to_be_between("pobreza_monetaria_depto", min_value=0, max_value=100) if "pobreza_monetaria_depto" in ge_df.columns else None
-    res7 = ge_df.expect_column_values_to_be_between("idh_depto", min_value=0, max_value=1) if "idh_depto" in ge_df.columns else None
-
-    summary["expectations"]["type_periodo_int64"] = _brief(res4)
-    summary["expectations"]["type_pais_str"] = _brief(res5)
-    summary["expectations"]["range_pobreza_0_100"] = _brief(res6)
-    summary["expectations"]["range_idh_0_1"] = _brief(res7)
-
-    #  Regla entre columnas
-    if {"punt_global", "punt_matematicas"}.issubset(ge_df.columns):
-        mask = ge_df["punt_global"] >= ge_df["punt_matematicas"]
-        res8 = {
-            "success": bool(mask.all()),
-            "unexpected_count": int((~mask).sum()),
-            "unexpected_percent": round((~mask).sum() / len(ge_df) * 100, 4),
-        }
-    else:
-        res8 = None
-    summary["expectations"]["rule_global_ge_math"] = _brief(res8)
+    if GE_BACKEND == "both":
+        ge = {clave: _brief(r) for clave, r in resultados["ge"].items()}
+        distintas = [k for k, v in summary["expectations"].items() if v != ge[k]]
+        for k in distintas:
+            print(f"[WARN] Paridad GE: {k} native={summary['expectations'][k]} ge={ge[k]}")
+        print(f"[GE] Paridad native vs ge: {len(suite) - len(distintas)}/{len(suite)} expectativas iguales")
 
     # Guardar reporte JSON estructurado
     GE_JSON.write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
     print(f"[GE] Reporte guardado: {GE_JSON}")
 
     # Validar expectativas críticas
-    critical_ok = all((_succ(res1), _succ(res2), _succ(res3)))
+    critical_ok = all(_succ(res[k]) for k in criticas)
     print(f"[GE] Estado de expectativas críticas: {critical_ok}")
 
     if not critical_ok:
         raise AssertionError("GE: Falló alguna expectativa crítica. Revisa ge_report.json")
 
     print("== GE: validaciones completadas con éxito ==")
+
+
+def great_expectations_dw():
+    """
+    La misma suite sobre el DW que dejó load(), como SQL de agregación en Postgres
+    (etl/validation_sql.py): no trae filas a pandas. Además de las expectativas revisa que
+    ninguna fila de fact_icfes quede sin su dimensión y que las filas de cada periodo sean
+    las del dataset curado (contadas desde el pie de los Parquet).
+    """
+    from sqlalchemy import create_engine, text
+
+    print("== GE DW: validando fact_icfes y sus dimensiones en Postgres ==")
+    if not DW_CONN_URI:
+        raise RuntimeError("DW_CONN_URI no está definido en el entorno (.env).")
+
+    suite, criticas = cargar_suite(FILE_SUITE)
+    curado = filas_periodo(IN_FINAL)
+
+    t0 = time.perf_counter()
+    engine = create_engine(DW_CONN_URI, pool_pre_ping=True)
+    with engine.connect() as conn:
+        filas = conn.execute(text(validation_sql.SQL_CATALOGO), {"tablas": validation_sql.TABLAS}).fetchall()
+        tablas = validation_sql.catalogo(filas)
+        sql, params, salidas = validation_sql.compilar(suite, tablas)
+        filas = conn.execute(text(sql), params).fetchall()
+    print(f"[GE DW] Suite de {len(suite)} expectativas en SQL: {time.perf_counter() - t0:.2f}s")
+
+    est, huerfanas, dw = Estadisticas(suite), {}, {}
+    for fila in filas:
+        parcial, h = validation_sql.leer_fila(suite, tablas, salidas, fila)
+        est.combinar(parcial)
+        dw[fila[0]] = parcial.filas
+        for d, n in h.items():
+            huerfanas[d] = huerfanas.get(d, 0) + n
+    for c, st in est.columnas.items():
+        print(f"[GE DW] {c}: nulos={st['nulos']:,} min={st['min']} max={st['max']}")
+    res = est.resultados()
+
+    conciliado = dw == curado
+    for periodo in sorted(set(curado) | set(dw), key=str):
+        print(f"[GE DW] periodo {periodo}: curado={curado.get(periodo, 0):,} fact_icfes={dw.get(periodo, 0):,}")
+    for d, n in huerfanas.items():
+        print(f"[GE DW] Huérfanas de {d}: {n:,}")
+
+    summary = {
+        "tablas": {t: len(cs) for t, cs in tablas.items()},
+        "shape": {"rows": int(est.filas), "cols": len(est.columnas)},
+        "conciliacion": {
+            "success": conciliado,
+            "curado": {str(p): n for p, n in sorted(curado.items(), key=lambda x: str(x[0]))},
+            "fact_icfes": {str(p): n for p, n in sorted(dw.items(), key=lambda x: str(x[0]))},
+        },
+        "huerfanas": huerfanas,
+        "expectations": {clave: _brief(res[clave]) for clave, *_ in suite},
+    }
+    DW_JSON.write_text(json.dumps(summary, ensure_ascii=False, indent=2, default=str), encoding="utf-8")
+    print(f"[GE DW] Reporte guardado: {DW_JSON}")
+
+    critical_ok = all(_succ(res[k]) for k in criticas)
+    print(f"[GE DW] Críticas: {critical_ok}  conciliación: {conciliado}  huérfanas: {sum(huerfanas.values()):,}")
+    if not (critical_ok and conciliado and not any(huerfanas.values())):
+        raise AssertionError("GE DW: el DW no pasó la validación. Revisa ge_dw_report.json")
+
+    print("== GE DW: validaciones completadas con éxito ==")
@@ -0,0 +1,148 @@
+# etl/http_cache.py
+"""
+Caché HTTP persistente para el scraping (páginas de municipios, iframes, etc.).
+
+- Índice SQLite por URL: validadores (ETag / Last-Modified), encoding, fecha de
+  descarga y de último acceso.
+- Cuerpos direccionados por contenido: objects/<sha256[:2]>/<sha256>.gz (gzip),
+  así dos URLs con el mismo HTML comparten un solo archivo.
+- TTL: dentro del TTL la entrada es "fresca" y se sirve sin tocar la red;
+  vencida, se revalida con GET condicional (ver etl/http_client.py).
+- Presupuesto de tamaño: al superarlo se expulsan las entradas menos usadas (LRU).
+"""
+import gzip
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    url           TEXT PRIMARY KEY,
+    digest        TEXT NOT NULL,
+    size          INTEGER NOT NULL,   -- bytes comprimidos en disco
+    etag          TEXT,
+    last_modified TEXT,
+    encoding      TEXT,
+    fetched_at    REAL NOT NULL,
+    accessed_at   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at);
+CREATE INDEX IF NOT EXISTS idx_entries_digest ON entries (digest);
+"""
+
+
+class HttpCache:
+    """Caché en disco con TTL y expulsión LRU; thread-safe (un lock + una conexión)."""
+
+    def __init__(self, root: Path, ttl_seconds: float = 7 * 24 * 3600, max_bytes: int = 200 * 1024**2):
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.ttl = float(ttl_seconds)
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.root / "index.sqlite", check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.objects / digest[:2] / f"{digest}.gz"
+
+    def lookup(self, url):
+        """Entrada de `url` (body, validadores, fresh) o None. Marca el acceso para LRU."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT digest, etag, last_modified, encoding, fetched_at FROM entries WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            digest, etag, last_modified, encoding, fetched_at = row
+            try:
+                body = gzip.decompress(self._blob_path(digest).read_bytes())
+            except (OSError, EOFError):
+                self._db.execute("DELETE FROM entries WHERE url = ?", (url,))
+                self._db.commit()
+                return None
+            self._db.execute("UPDATE entries SET accessed_at = ? WHERE url = ?", (now, url))
+            self._db.commit()
+        return {
+            "body": body,
+            "etag": etag,
+            "last_modified": last_modified,
+            "encoding": encoding,
+            "fresh": (now - fetched_at) < self.ttl,
+        }
+
+    def save(self, url, body: bytes, etag=None, last_modified=None, encoding=None):
+        digest = hashlib.sha256(body).hexdigest()
+        packed = gzip.compress(body, compresslevel=6)
+        path = self._blob_path(digest)
+        now = time.time()
+        with self._lock:
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_suffix(".tmp")
+                tmp.write_bytes(packed)
+                tmp.replace(path)
+            old = self._db.execute("SELECT digest FROM entries WHERE url = ?", (url,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries "
+                "(url, digest, size, etag, last_modified, encoding, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, digest, len(packed), etag, last_modified, encoding, now, now),
+            )
+            if old and old[0] != digest:
+                self._drop_orphan(old[0])
+            self._evict()
+            self._db.commit()
+
+    def touch(self, url):
+        """Tras un 304: la entrada vuelve a ser fresca durante otro TTL."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("UPDATE entries SET fetched_at = ?, accessed_at = ? WHERE url = ?",
+                             (now, now, url))
+            self._db.commit()
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._total_bytes()
+
+    def _total_bytes(self) -> int:
+        # Cada blob cuenta una vez aunque lo compartan varias URLs
+        row = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM entries)"
+        ).fetchone()
+        return int(row[0])
+
+    def _drop_orphan(self, digest):
+        in_use = self._db.execute("SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)).fetchone()
+        if not in_use:
+            self._blob_path(digest).unlink(missing_ok=True)
+
+    def _evict(self):
+        total = self._total_bytes()
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        rows = self._db.execute("SELECT url, digest, size FROM entries ORDER BY accessed_at ASC").fetchall()
+        for url, digest, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM entries WHERE url = ?", (url,))
+            in_use = self._db.execute("SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)).fetchone()
+            if not in_use:
+                self._blob_path(digest).unlink(missing_ok=True)
+                total -= size
+            evicted += 1
+        print(f"[HTTP-CACHE] LRU: {evicted} entradas expulsadas ({total / 1024**2:.1f} MB en uso)")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
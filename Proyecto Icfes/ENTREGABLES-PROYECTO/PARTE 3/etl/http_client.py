@@ -0,0 +1,156 @@
+# etl/http_client.py
+"""
+Cliente HTTP compartido para el scraping:
+- requests.Session con pool de conexiones (keep-alive) reutilizado entre hilos.
+- Accept-Encoding gzip/deflate (+ br/zstd si urllib3 puede decodificarlos).
+- Caché en disco (etl/http_cache.HttpCache): dentro del TTL no se toca la red; vencida
+  la entrada se revalida con GET condicional (If-None-Match / If-Modified-Since) y una
+  página sin cambios cuesta un 304 y se sirve desde disco.
+- Contadores: requests, hits de caché, conexiones nuevas/reutilizadas, hits 304 y bytes ahorrados.
+"""
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.request import ACCEPT_ENCODING  # "gzip,deflate" + br/zstd según lo instalado
+
+from etl.http_cache import HttpCache
+
+
+class HttpStats:
+    """Contadores thread-safe del cliente."""
+
+    FIELDS = ("requests", "cache_hits", "connections_opened", "not_modified",
+              "bytes_downloaded", "bytes_wire", "bytes_saved_304")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._c = dict.fromkeys(self.FIELDS, 0)
+
+    def incr(self, field, n=1):
+        with self._lock:
+            self._c[field] += n
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            out = dict(self._c)
+        out["connections_reused"] = max(0, out["requests"] - out["connections_opened"])
+        out["bytes_saved_compression"] = max(0, out["bytes_downloaded"] - out["bytes_wire"])
+        out["bytes_saved"] = out["bytes_saved_304"] + out["bytes_saved_compression"]
+        return out
+
+
+class _CountingAdapter(HTTPAdapter):
+    """HTTPAdapter cuyos pools cuentan cada conexión TCP/TLS nueva."""
+
+    def __init__(self, stats: HttpStats, **kwargs):
+        self._stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        stats = self._stats
+
+        class _HTTPPool(HTTPConnectionPool):
+            def _new_conn(self):
+                stats.incr("connections_opened")
+                return super()._new_conn()
+
+        class _HTTPSPool(HTTPSConnectionPool):
+            def _new_conn(self):
+                stats.incr("connections_opened")
+                return super()._new_conn()
+
+        self.poolmanager.pool_classes_by_scheme = {"http": _HTTPPool, "https": _HTTPSPool}
+
+
+# get() sin entrada de get_cached(): la busca él mismo
+_SIN_BUSCAR = object()
+
+
+class HttpClient:
+    """Session compartida + caché/revalidación. `get` devuelve un requests.Response."""
+
+    def __init__(self, headers=None, store: HttpCache = None, pool_maxsize=16):
+        self.stats = HttpStats()
+        self.store = store
+        self.session = requests.Session()
+        self.session.headers.update(headers or {})
+        self.session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        adapter = _CountingAdapter(self.stats, pool_connections=8, pool_maxsize=pool_maxsize)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get_cached(self, url) -> tuple:
+        """
+        (response, entrada) desde la caché, con una sola lectura del índice y del cuerpo:
+        response si la entrada está fresca (sin red), si no None; entrada vencida (o None)
+        para pasarla a get(..., cached=entrada) y revalidar sin volver a buscarla.
+        """
+        cached = self.store.lookup(url) if self.store is not None else None
+        if cached and cached["fresh"]:
+            self.stats.incr("cache_hits")
+            return self._from_cache(url, cached), cached
+        return None, cached
+
+    def get(self, url, headers=None, cached=_SIN_BUSCAR, **kwargs) -> requests.Response:
+        """
+        GET con caché y revalidación. `cached` es la entrada que ya devolvió get_cached()
+        (vencida o None): evita buscarla de nuevo en la caché.
+        """
+        headers = dict(headers or {})
+        if cached is _SIN_BUSCAR:
+            cached = self.store.lookup(url) if self.store is not None else None
+            if cached and cached["fresh"]:
+                # Dentro del TTL: cero tráfico de red
+                self.stats.incr("cache_hits")
+                return self._from_cache(url, cached)
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        r = self.session.get(url, headers=headers, **kwargs)
+        self.stats.incr("requests")
+
+        if r.status_code == 304 and cached:
+            # Sin cambios: servir el cuerpo guardado como si fuera un 200
+            self.stats.incr("not_modified")
+            self.stats.incr("bytes_saved_304", len(cached["body"]))
+            self.store.touch(url)
+            r.status_code = 200
+            r.reason = "OK (revalidated)"
+            r._content = cached["body"]
+            r.encoding = cached.get("encoding") or "utf-8"
+            r.from_cache = True
+            return r
+
+        r.from_cache = False
+        self.stats.incr("bytes_downloaded", len(r.content))
+        try:
+            self.stats.incr("bytes_wire", r.raw.tell())
+        except Exception:
+            self.stats.incr("bytes_wire", len(r.content))
+
+        if r.ok and self.store is not None:
+            self.store.save(url, r.content, r.headers.get("ETag"), r.headers.get("Last-Modified"),
+                            encoding=r.encoding)
+        return r
+
+    @staticmethod
+    def _from_cache(url, cached) -> requests.Response:
+        r = requests.Response()
+        r.url = url
+        r.status_code = 200
+        r.reason = "OK (cache)"
+        r._content = cached["body"]
+        r.encoding = cached.get("encoding") or "utf-8"
+        r.from_cache = True
+        return r
+
+    def close(self):
+        self.session.close()
+        if self.store is not None:
+            self.store.close()
@@ -0,0 +1,132 @@
+# etl/manifest.py
+"""
+Manifest de contenido del pipeline (sha256 por archivo).
+
+- Cada tarea de extract registra sus HTML de input y CSV de staging en
+  manifest/sources/<fuente>.json (un archivo por fuente: las tareas corren en paralelo).
+- check_changes (ShortCircuitOperator) junta esos registros + los data_icfes_<periodo>*.csv
+  de input y los compara con el manifest de la última corrida completa. Sin cambios → el DAG salta
+  transform, great_expectations, load y analytics.
+- commit_manifest (al final del DAG) promueve ese snapshot a "última corrida completa":
+  si algo falla a mitad de camino, la próxima corrida vuelve a procesar.
+
+Para no releer archivos grandes, el hash se reutiliza si tamaño y mtime no cambiaron.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+BASE_MANIFEST = Path("/opt/airflow/data/manifest")
+BASE_SOURCES = BASE_MANIFEST / "sources"
+BASE_SOURCES.mkdir(parents=True, exist_ok=True)
+
+FILE_COMMITTED = BASE_MANIFEST / "manifest.json"   # última corrida completa
+FILE_PENDING = BASE_MANIFEST / "pending.json"      # snapshot que se está procesando
+
+BASE_INPUT = Path("/opt/airflow/data/input")
+PATRON_ICFES = "data_icfes_*.csv"                  # un archivo por periodo (data_icfes_2024.csv, ...)
+FILE_FINAL = Path("/opt/airflow/data/output/df_icfes_2024_final")   # dataset Parquet (etl/curated.py)
+
+
+# ========= HELPERS =========
+def sha256_file(path: Path, chunk: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def _load(path: Path) -> dict:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+def _dump(path: Path, data: dict):
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data, indent=2, ensure_ascii=False, sort_keys=True), encoding="utf-8")
+    tmp.replace(path)
+
+def file_entry(path: Path, previous: dict = None) -> dict:
+    """sha256, tamaño y mtime de `path`; reutiliza el hash de `previous` si tamaño y mtime no cambiaron."""
+    st = path.stat()
+    if previous and previous.get("size") == st.st_size and previous.get("mtime_ns") == st.st_mtime_ns:
+        return previous
+    return {"sha256": sha256_file(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+def _hashes(paths, previous: dict) -> dict:
+    """{ruta: entrada} de los archivos que existen; los que faltan no aparecen."""
+    out = {}
+    for p in map(Path, paths):
+        if p.exists():
+            out[str(p)] = file_entry(p, previous.get(str(p)))
+    return out
+
+def _digests(entries: dict) -> dict:
+    return {k: v["sha256"] for k, v in entries.items()}
+
+
+# ========= REGISTRO POR FUENTE (tareas de extract) =========
+def record(source: str, paths):
+    """Guarda el hash de `paths` como estado actual de la fuente `source`."""
+    path = BASE_SOURCES / f"{source}.json"
+    entries = _hashes(paths, _load(path))
+    _dump(path, entries)
+    print(f"[MANIFEST] {source}: {len(entries)} archivos registrados")
+
+def unchanged(source: str, paths) -> bool:
+    """True si todos `paths` existen y coinciden con lo registrado para `source`."""
+    previous = _load(BASE_SOURCES / f"{source}.json")
+    paths = [str(p) for p in paths]
+    if not previous or not all(Path(p).exists() for p in paths):
+        return False
+    current = _hashes(paths, previous)
+    return all(p in previous and current[p]["sha256"] == previous[p]["sha256"] for p in paths)
+
+
+# ========= DETECCIÓN DE CAMBIOS (DAG) =========
+def snapshot() -> dict:
+    """Estado actual: todas las fuentes registradas + los CSV del ICFES (todos los periodos)."""
+    entries = {}
+    for f in sorted(BASE_SOURCES.glob("*.json")):
+        entries.update(_load(f))
+    entries.update(_hashes(sorted(BASE_INPUT.glob(PATRON_ICFES)), _load(FILE_COMMITTED)))
+    return entries
+
+def sources_changed() -> bool:
+    """
+    Callable del ShortCircuitOperator: True (seguir) si cambió algún input respecto de la
+    última corrida completa, si falta la salida final o si FORCE_ETL=1.
+    """
+    current = snapshot()
+    _dump(FILE_PENDING, current)
+
+    if os.getenv("FORCE_ETL", "0") == "1":
+        print("[MANIFEST] FORCE_ETL=1 → se procesa igual")
+        return True
+    if not FILE_FINAL.exists():
+        print(f"[MANIFEST] No existe {FILE_FINAL} → se procesa")
+        return True
+
+    before, now = _digests(_load(FILE_COMMITTED)), _digests(current)
+    added = sorted(now.keys() - before.keys())
+    removed = sorted(before.keys() - now.keys())
+    modified = sorted(k for k in now.keys() & before.keys() if now[k] != before[k])
+    for label, keys in (("nuevo", added), ("eliminado", removed), ("modificado", modified)):
+        for k in keys:
+            print(f"[MANIFEST] {label}: {k}")
+
+    if added or removed or modified:
+        return True
+    print(f"[MANIFEST] Sin cambios en {len(now)} archivos → se omiten las tareas siguientes")
+    return False
+
+def commit_manifest():
+    """Al terminar el DAG: el snapshot procesado pasa a ser la última corrida completa."""
+    pending = _load(FILE_PENDING)
+    if not pending:
+        pending = snapshot()
+    _dump(FILE_COMMITTED, pending)
+    FILE_PENDING.unlink(missing_ok=True)
+    print(f"[MANIFEST] Corrida completa registrada: {FILE_COMMITTED} ({len(pending)} archivos)")
@@ -0,0 +1,175 @@
+# etl/metrics.py
+"""
+Métricas por paso de una tarea (tiempo, CPU, memoria y filas).
+
+    with METRICAS.paso("1) lectura") as m:
+        df = leer(...)
+        m.filas_salida = len(df)
+
+Cada paso registra tiempo de reloj, tiempo de CPU (del proceso y de los hijos ya
+terminados, p. ej. el pool del modo paralelo), RSS al entrar y cuánto subió el pico de
+RSS durante el paso, y filas de entrada / salida. Los pasos con el mismo nombre (un
+paso por lote en el modo por lotes) se acumulan. El pico se mide con VmHWM de
+/proc/self/status; en Linux se reinicia al entrar a cada paso de primer nivel
+(/proc/self/clear_refs), así que un paso no hereda el pico del anterior.
+
+Los procesos hijos (el pool del modo paralelo) miden sus pasos con su propia copia de
+las métricas y se los devuelven al padre (pasos() → incorporar()); el pico de RSS de los
+hijos ya terminados sale de getrusage(RUSAGE_CHILDREN).
+"""
+import json
+import os
+try:
+    import resource
+except ImportError:             # no es Unix
+    resource = None
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+
+def _status_mb(campo: str) -> float:
+    """VmRSS / VmHWM del proceso en MB (0 si /proc no está disponible)."""
+    try:
+        for linea in Path("/proc/self/status").read_text().splitlines():
+            if linea.startswith(campo + ":"):
+                return int(linea.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def _pico_hijos_mb() -> float:
+    """Pico de RSS del hijo más grande ya terminado (ru_maxrss en KB en Linux)."""
+    if resource is None:
+        return 0.0
+    return resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+
+
+def _reiniciar_pico() -> bool:
+    try:
+        Path("/proc/self/clear_refs").write_text("5")
+        return True
+    except OSError:
+        return False
+
+
+def _cpu() -> float:
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+class Medicion:
+    """Lo que completa el bloque de un paso: filas de salida y contadores extra (`detalle`, se suman)."""
+
+    def __init__(self, filas_entrada: int = None):
+        self.filas_entrada = filas_entrada
+        self.filas_salida = None
+        self.pico_hijos = None
+        self.detalle = {}
+
+
+class Metricas:
+    """Pasos medidos de una corrida de `tarea`; `archivo` etiqueta los pasos de cada archivo procesado."""
+
+    def __init__(self, tarea: str):
+        self.tarea = tarea
+        self.reiniciar()
+
+    def reiniciar(self) -> None:
+        self.archivo = None
+        self._pasos = {}
+        self._nivel = 0
+        self._pico = 0.0            # VmHWM máximo visto al cerrar un paso (el reinicio lo baja)
+        self._inicio = time.perf_counter()
+        self._fecha = datetime.now().isoformat(timespec="seconds")
+
+    @contextmanager
+    def paso(self, nombre: str, filas: int = None):
+        """Mide el bloque como el paso `nombre` del archivo actual; `filas` = filas de entrada."""
+        m = Medicion(filas)
+        if self._nivel == 0:
+            _reiniciar_pico()
+        rss0, pico0, hijos0 = _status_mb("VmRSS"), _status_mb("VmHWM"), _pico_hijos_mb()
+        t0, cpu0 = time.perf_counter(), _cpu()
+        self._nivel += 1
+        try:
+            yield m
+        finally:
+            self._nivel -= 1
+            # Cuánto superó el paso el pico que había al entrar (tras el reinicio, el RSS de entrada)
+            pico = _status_mb("VmHWM")
+            self._pico = max(self._pico, pico)
+            delta_pico = max(pico - max(pico0, rss0), 0.0)
+            # Hijos terminados durante el paso con un pico mayor que los anteriores
+            hijos = _pico_hijos_mb()
+            if hijos > hijos0:
+                m.pico_hijos = hijos
+            self._acumular(nombre, m, time.perf_counter() - t0, _cpu() - cpu0, rss0, delta_pico)
+
+    def _acumular(self, nombre, m: Medicion, segundos, cpu, rss0, delta_pico):
+        r = self._pasos.setdefault((self.archivo, nombre), dict(
+            archivo=self.archivo, paso=nombre, llamadas=0, segundos=0.0, cpu_segundos=0.0,
+            rss_inicio_mb=round(rss0, 1), delta_pico_rss_mb=0.0, filas_entrada=None, filas_salida=None,
+        ))
+        r["llamadas"] += 1
+        r["segundos"] = round(r["segundos"] + segundos, 3)
+        r["cpu_segundos"] = round(r["cpu_segundos"] + cpu, 3)
+        r["delta_pico_rss_mb"] = round(max(r["delta_pico_rss_mb"], delta_pico), 1)
+        salida = m.filas_salida if m.filas_salida is not None else m.filas_entrada
+        for k, v in (("filas_entrada", m.filas_entrada), ("filas_salida", salida)):
+            if v is not None:
+                r[k] = (r[k] or 0) + int(v)
+        if m.pico_hijos is not None:
+            r["pico_rss_hijos_mb"] = round(max(r.get("pico_rss_hijos_mb", 0.0), m.pico_hijos), 1)
+        for k, v in m.detalle.items():
+            r[k] = r.get(k, 0) + v
+
+    def pasos(self) -> list:
+        """Los pasos medidos hasta acá (lo que un proceso hijo le devuelve al padre)."""
+        return list(self._pasos.values())
+
+    def incorporar(self, pasos: list) -> None:
+        """
+        Suma los pasos medidos en otro proceso (pasos()) a los de este: tiempos, CPU, filas y
+        llamadas se suman entre hijos, y el aumento del pico es el mayor que tuvo uno de ellos.
+        """
+        for p in pasos:
+            r = self._pasos.setdefault((p["archivo"], p["paso"]), dict(
+                archivo=p["archivo"], paso=p["paso"], llamadas=0, segundos=0.0, cpu_segundos=0.0,
+                rss_inicio_mb=p["rss_inicio_mb"], delta_pico_rss_mb=0.0, filas_entrada=None, filas_salida=None,
+            ))
+            for k, v in p.items():
+                if k in ("archivo", "paso", "rss_inicio_mb") or v is None:
+                    continue
+                if k in ("delta_pico_rss_mb", "pico_rss_hijos_mb"):
+                    r[k] = max(r.get(k) or 0.0, v)
+                else:
+                    r[k] = round((r.get(k) or 0) + v, 3)
+
+    def resumen(self, **extra) -> dict:
+        return dict(
+            tarea=self.tarea, inicio=self._fecha,
+            segundos=round(time.perf_counter() - self._inicio, 3),
+            pico_rss_mb=round(max(self._pico, _status_mb("VmHWM")), 1),
+            pico_rss_hijos_mb=round(_pico_hijos_mb(), 1),
+            pasos=list(self._pasos.values()), **extra,
+        )
+
+    def imprimir(self) -> None:
+        for r in self._pasos.values():
+            origen = f"{r['archivo']} · " if r["archivo"] else ""
+            filas = "" if r["filas_salida"] is None else f"  filas {r['filas_salida']:,}"
+            hijos = f", hijos {r['pico_rss_hijos_mb']:.0f} MB" if "pico_rss_hijos_mb" in r else ""
+            print(f"[METRICS] {origen}{r['paso']}: {r['segundos']:.2f}s (CPU {r['cpu_segundos']:.2f}s, "
+                  f"pico +{r['delta_pico_rss_mb']:.0f} MB{hijos}, x{r['llamadas']}){filas}")
+
+    def guardar(self, ruta: Path, **extra) -> dict:
+        """Escribe el resumen en `ruta` (JSON) y lo devuelve."""
+        data = self.resumen(**extra)
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        tmp = ruta.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(ruta)
+        return data
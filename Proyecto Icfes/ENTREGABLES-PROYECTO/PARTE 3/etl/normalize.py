@@ -0,0 +1,80 @@
+# etl/normalize.py
+"""
+Normalización de texto por valores únicos.
+
+Las columnas de ubicación del ICFES (departamentos y municipios) tienen cientos de miles
+de filas pero ~1.100 valores distintos. En vez de aplicar norm_txt celda por celda:
+
+    factorize → norm_txt + mapeo solo sobre los únicos → take por código
+
+El resultado es idéntico a `s.map(norm_txt).replace(mapping)` (ver bench/bench_normalize.py).
+Una columna category (lector con esquema, etl/schema.py) se normaliza sobre sus categorías
+y sigue siendo category.
+"""
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+
+def norm_txt(x: object) -> str:
+    """MAYÚSCULAS, sin espacios en los extremos y sin tildes; NaN → ""."""
+    if pd.isna(x):
+        return ""
+    s = str(x).upper().strip()
+    s = ''.join(c for c in unicodedata.normalize('NFD', s) if unicodedata.category(c) != 'Mn')
+    return s
+
+
+def _normalizar_unico(valor, mapping: dict = None):
+    out = norm_txt(valor)
+    if mapping:
+        # Un None en el mapeo deja el valor normalizado (equivale a .replace(...).fillna(norm))
+        mapped = mapping.get(out)
+        if mapped is not None:
+            out = mapped
+    return out
+
+
+def normalizar_serie(s: pd.Series, mapping: dict = None, memo: dict = None) -> pd.Series:
+    """
+    `s` normalizada y mapeada, resolviendo cada valor distinto una sola vez.
+    `memo` (valor crudo → resultado) se puede compartir entre columnas con los mismos valores.
+    """
+    memo = {} if memo is None else memo
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return _normalizar_categoria(s, mapping, memo)
+    codes, uniques = pd.factorize(s, use_na_sentinel=True)
+    valores = []
+    for u in uniques:
+        if u not in memo:
+            memo[u] = _normalizar_unico(u, mapping)
+        valores.append(memo[u])
+    # Código -1 (NaN) → último elemento: norm_txt(NaN) = ""
+    valores.append(_normalizar_unico(np.nan, mapping))
+    tabla = np.array(valores, dtype=object)
+    return pd.Series(tabla[codes], index=s.index, name=s.name)
+
+
+def _normalizar_categoria(s: pd.Series, mapping: dict, memo: dict) -> pd.Series:
+    """Versión categórica: se normalizan las categorías y se recodifica (sigue siendo category)."""
+    for u in s.cat.categories:
+        if u not in memo:
+            memo[u] = _normalizar_unico(u, mapping)
+    valores = [memo[u] for u in s.cat.categories]
+    codes = s.cat.codes.to_numpy()
+    if (codes < 0).any():
+        valores.append(_normalizar_unico(np.nan, mapping))
+    # Varias categorías crudas pueden quedar iguales tras normalizar: se funden
+    nuevos_codes, categorias = pd.factorize(pd.Index(valores, dtype=object))
+    return pd.Series(pd.Categorical.from_codes(nuevos_codes[codes], categories=categorias),
+                     index=s.index, name=s.name)
+
+
+def normalizar_columnas(df: pd.DataFrame, cols, mapping: dict = None) -> pd.DataFrame:
+    """Normaliza in-place las columnas `cols` presentes en `df`, con un memo compartido."""
+    memo = {}
+    for c in cols:
+        if c in df.columns:
+            df[c] = normalizar_serie(df[c], mapping, memo)
+    return df
@@ -0,0 +1,160 @@
+# etl/parsers.py
+"""
+Capa de parseo HTML del extract. Dos implementaciones con la misma interfaz:
+
+- "bs4"  : BeautifulSoup(html, "lxml"), igual que los notebooks (referencia).
+- "lxml" : árbol lxml + XPath compilados, sin construir el árbol de BeautifulSoup.
+           Es el camino rápido y el default (HTML_PARSER=lxml).
+
+Ambas devuelven exactamente los mismos valores (ver bench/bench_parsers.py).
+"""
+import os
+
+import lxml.html
+from lxml import etree
+from bs4 import BeautifulSoup
+
+
+def _has_class(name: str) -> str:
+    """Predicado XPath equivalente a class_=name de BeautifulSoup (una clase entre varias)."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _text(el, sep: str = "") -> str:
+    """Equivalente a Tag.get_text(sep, strip=True) de BeautifulSoup."""
+    return sep.join(t.strip() for t in el.itertext() if t.strip())
+
+
+def _tree(html: str):
+    try:
+        return lxml.html.document_fromstring(html)
+    except ValueError:
+        # str con declaración de encoding: lxml exige bytes
+        return lxml.html.document_fromstring(html.encode("utf-8"))
+
+
+class SoupParser:
+    """Parser de referencia (BeautifulSoup), idéntico a los notebooks."""
+
+    name = "bs4"
+
+    def tabla_idh(self, html: str) -> list:
+        soup = BeautifulSoup(html, "lxml")
+        table = soup.find("table", {"class": "wikitable"})
+        rows = []
+        for tr in table.select("tr"):
+            cols = tr.find_all("td")
+            if len(cols) != 3:
+                continue
+            rows.append(_fila_idh(cols[0].get_text(strip=True),
+                                  cols[1].get_text(strip=True),
+                                  cols[2].get_text(strip=True)))
+        return rows
+
+    def iframe_pobreza_src(self, html: str):
+        soup = BeautifulSoup(html, "lxml")
+        iframe = soup.find("iframe", src=lambda s: s and "gra-PMDepartamental" in s)
+        return iframe.get("src") if iframe else None
+
+    def script_grafico(self, html: str) -> str:
+        soup = BeautifulSoup(html, "lxml")
+        script = next((s.text for s in soup.find_all("script") if "labels" in s.text), None)
+        if script is None:
+            raise ValueError("No hay <script> con 'labels'")
+        return script
+
+    def listado_municipios(self, html: str):
+        soup = BeautifulSoup(html, "lxml")
+        departamentos, municipios, urls = [], [], []
+        for div in soup.find_all("div", class_="departamento_slide"):
+            dep = div.find("h3").get_text(strip=True)
+            for a in div.select("ul.municipiosDepartamento li a"):
+                departamentos.append(dep)
+                municipios.append(a.get_text(strip=True))
+                urls.append(a["href"])
+        return departamentos, municipios, urls
+
+    def poblacion_municipio(self, html: str):
+        soup = BeautifulSoup(html, "lxml")
+        for div in soup.find_all("div", class_="col-6 col-md-4 py-4"):
+            text = div.get_text(" ", strip=True)
+            if "habitantes" in text.lower():
+                return text.replace("habitantes", "").strip()
+        return None
+
+
+class LxmlParser:
+    """Camino rápido: lxml + XPath compilados una sola vez."""
+
+    name = "lxml"
+
+    _X_WIKITABLE = etree.XPath(f"(//table[{_has_class('wikitable')}])[1]")
+    _X_TR = etree.XPath(".//tr")
+    _X_TD = etree.XPath(".//td")
+    _X_IFRAME = etree.XPath("(//iframe[contains(@src, 'gra-PMDepartamental')])[1]")
+    _X_SCRIPT = etree.XPath("//script")
+    _X_SLIDES = etree.XPath(f"//div[{_has_class('departamento_slide')}]")
+    _X_H3 = etree.XPath("(.//h3)[1]")
+    _X_MUN_LINKS = etree.XPath(f".//ul[{_has_class('municipiosDepartamento')}]//li//a")
+    # class_="col-6 col-md-4 py-4" en bs4 compara el atributo completo
+    _X_POBLACION = etree.XPath("//div[@class='col-6 col-md-4 py-4']")
+
+    def tabla_idh(self, html: str) -> list:
+        table = self._X_WIKITABLE(_tree(html))[0]
+        rows = []
+        for tr in self._X_TR(table):
+            cols = self._X_TD(tr)
+            if len(cols) != 3:
+                continue
+            rows.append(_fila_idh(_text(cols[0]), _text(cols[1]), _text(cols[2])))
+        return rows
+
+    def iframe_pobreza_src(self, html: str):
+        found = self._X_IFRAME(_tree(html))
+        return found[0].get("src") if found else None
+
+    def script_grafico(self, html: str) -> str:
+        for s in self._X_SCRIPT(_tree(html)):
+            text = "".join(s.itertext())
+            if "labels" in text:
+                return text
+        raise ValueError("No hay <script> con 'labels'")
+
+    def listado_municipios(self, html: str):
+        departamentos, municipios, urls = [], [], []
+        for div in self._X_SLIDES(_tree(html)):
+            dep = _text(self._X_H3(div)[0])
+            for a in self._X_MUN_LINKS(div):
+                departamentos.append(dep)
+                municipios.append(_text(a))
+                urls.append(a.attrib["href"])
+        return departamentos, municipios, urls
+
+    def poblacion_municipio(self, html: str):
+        # Sin la palabra en el documento no hace falta parsear
+        if "habitantes" not in html.lower():
+            return None
+        for div in self._X_POBLACION(_tree(html)):
+            text = _text(div, " ")
+            if "habitantes" in text.lower():
+                return text.replace("habitantes", "").strip()
+        return None
+
+
+def _fila_idh(entidad: str, idh: str, poblacion: str) -> dict:
+    return {
+        "Entidad": entidad,
+        "IDH": float(idh.replace(",", ".")),
+        "Población": int(poblacion.replace("\xa0", "").replace(" ", "")),
+    }
+
+
+PARSERS = {p.name: p for p in (LxmlParser(), SoupParser())}
+
+
+def get_parser(name: str = None):
+    """Parser por nombre ('lxml' | 'bs4'); por defecto HTML_PARSER o 'lxml'."""
+    name = (name or os.getenv("HTML_PARSER", "lxml")).lower()
+    if name not in PARSERS:
+        raise ValueError(f"HTML_PARSER desconocido: {name!r} (opciones: {sorted(PARSERS)})")
+    return PARSERS[name]
@@ -0,0 +1,166 @@
+# etl/schema.py
+"""
+Esquema declarado del crudo del ICFES (data_icfes_2024.csv, 53 columnas) y su lector.
+
+- Solo se leen las columnas que usa el transform (`usecols`): las de cols_drop nunca
+  se parsean.
+- Tipos compactos: categorías para ubicación / área / calendario / naturaleza y enteros
+  reducidos para puntajes, percentiles y niveles de desempeño. Los float64 se mantienen:
+  cambiarlos alteraría los valores que se escriben en la salida.
+- Motor: pyarrow (multihilo) cuando está instalado y no se lee por lotes; si no, el
+  parser C de pandas con los mismos dtypes.
+- Texto: las columnas "object" del esquema se leen como str de Python o, con
+  ICFES_STRING_DTYPE=arrow, como string[pyarrow] (un buffer Arrow por columna). Las de
+  ubicación ya son category, que en Parquet queda como diccionario de Arrow.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+CATEGORIA = "category"
+
+ICFES_SCHEMA = {
+    "periodo": "int32",
+    "estu_estudiante": "object",
+    "cole_area_ubicacion": CATEGORIA,
+    "cole_bilingue": "int8",
+    "cole_calendario": CATEGORIA,
+    "cole_caracter": "object",
+    "cole_depto_ubicacion": CATEGORIA,
+    "cole_genero": "object",
+    "cole_jornada": "object",
+    "cole_mcpio_ubicacion": CATEGORIA,
+    "cole_naturaleza": CATEGORIA,
+    "desemp_c_naturales": "int8",
+    "desemp_ingles": "object",
+    "desemp_lectura_critica": "int8",
+    "desemp_matematicas": "int8",
+    "desemp_sociales_ciudadanas": "int8",
+    "estu_dedicacioninternet": "object",
+    "estu_dedicacionlecturadiaria": "object",
+    "estu_depto_presentacion": CATEGORIA,
+    "estu_depto_reside": CATEGORIA,
+    "estu_genero": "object",
+    "estu_grado": "int8",
+    "estu_horassemanatrabaja": "object",
+    "estu_inse_individual": "float64",
+    "estu_mcpio_presentacion": CATEGORIA,
+    "estu_mcpio_reside": CATEGORIA,
+    "estu_nacionalidad": "object",
+    "estu_nse_establecimiento": "float64",
+    "estu_nse_individual": "float64",
+    "estu_pais_reside": "object",
+    "fami_comecarnepescadohuevo": "object",
+    "fami_comecerealfrutoslegumbre": "object",
+    "fami_comelechederivados": "object",
+    "fami_cuartoshogar": "object",
+    "fami_educacionmadre": "object",
+    "fami_educacionpadre": "object",
+    "fami_estratovivienda": "int8",
+    "fami_numlibros": "object",
+    "fami_personashogar": "object",
+    "fami_tienecomputador": "int8",
+    "fami_tieneinternet": "int8",
+    "percentil_c_naturales": "int8",
+    "percentil_global": "int8",
+    "percentil_ingles": "int8",
+    "percentil_lectura_critica": "int8",
+    "percentil_matematicas": "int8",
+    "percentil_sociales_ciudadanas": "int8",
+    "punt_c_naturales": "int16",
+    "punt_ingles": "int16",
+    "punt_lectura_critica": "int16",
+    "punt_matematicas": "int16",
+    "punt_sociales_ciudadanas": "int16",
+    "punt_global": "int16",
+}
+
+# "pyarrow" | "c"  (pyarrow cae a "c" si no está instalado o se lee por lotes)
+ICFES_CSV_ENGINE = os.getenv("ICFES_CSV_ENGINE", "pyarrow").lower()
+# "object" | "arrow": dtype de las columnas de texto en transform, great_expectations y load
+ICFES_STRING_DTYPE = os.getenv("ICFES_STRING_DTYPE", "object").lower()
+TEXTO_ARROW = "string[pyarrow]"
+
+
+def texto_arrow() -> bool:
+    return ICFES_STRING_DTYPE == "arrow"
+
+
+def _dtype(tipo: str) -> str:
+    return TEXTO_ARROW if tipo == "object" and texto_arrow() else tipo
+
+
+def _engine(chunksize) -> str:
+    if chunksize or ICFES_CSV_ENGINE != "pyarrow":
+        return "c"
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return "c"
+    return "pyarrow"
+
+
+def columnas_a_leer(path, drop) -> list:
+    """Columnas del encabezado del CSV que no están en `drop`, en el orden del archivo."""
+    header = pd.read_csv(path, encoding="utf-8", nrows=0).columns
+    return [c for c in header if c not in set(drop)]
+
+
+def leer_icfes(path, drop=(), chunksize: int = None):
+    """
+    DataFrame (o iterador de lotes si `chunksize`) del crudo del ICFES con el esquema
+    declarado, sin parsear las columnas de `drop`. Columnas que no estén en el esquema
+    se leen con la inferencia de pandas.
+    """
+    usecols = columnas_a_leer(path, drop)
+    dtype = {c: _dtype(ICFES_SCHEMA[c]) for c in usecols if c in ICFES_SCHEMA}
+    kwargs = dict(encoding="utf-8", usecols=usecols, dtype=dtype, engine=_engine(chunksize))
+    if chunksize:
+        return pd.read_csv(path, chunksize=chunksize, **kwargs)
+    return pd.read_csv(path, **kwargs)
+
+
+def memoria_mb(df: pd.DataFrame) -> float:
+    return df.memory_usage(deep=True).sum() / 1024**2
+
+
+def memoria_sin_esquema_mb(df: pd.DataFrame) -> float:
+    """
+    Memoria que ocuparía `df` con los tipos por defecto (object / int64), calculada sin
+    volver a leer: cada celda de texto cuesta su str + el puntero; cada entero, 8 bytes.
+    """
+    total = df.index.memory_usage()
+    for c in df.columns:
+        s = df[c]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            total += _costo_objetos(s.cat.codes.to_numpy(), s.cat.categories)
+        elif isinstance(s.dtype, pd.StringDtype):
+            total += _costo_objetos(*pd.factorize(s))
+        elif pd.api.types.is_integer_dtype(s.dtype) or pd.api.types.is_float_dtype(s.dtype):
+            total += 8 * len(s)
+        else:
+            total += s.memory_usage(deep=True, index=False)
+    return total / 1024**2
+
+
+def _costo_objetos(codes: np.ndarray, valores) -> int:
+    """Bytes como columna object: el str de cada valor (según `codes`) + un puntero por fila."""
+    costo = np.array([sys.getsizeof(v) for v in valores], dtype=np.int64)
+    conteos = np.bincount(codes[codes >= 0], minlength=len(costo))
+    return int((costo * conteos).sum()) + 8 * len(codes)
+
+
+def leer_icfes_con_reporte(path, drop=()) -> pd.DataFrame:
+    """leer_icfes + línea de log con tiempo de lectura y memoria vs. tipos por defecto."""
+    t0 = time.perf_counter()
+    df = leer_icfes(path, drop)
+    segundos = time.perf_counter() - t0
+    actual, sin_esquema = memoria_mb(df), memoria_sin_esquema_mb(df)
+    print(f"[SCHEMA] {len(df.columns)} columnas leídas ({len(drop)} omitidas) con {_engine(None)}, "
+          f"texto {_dtype('object')} "
+          f"en {segundos:.1f}s · memoria {actual:.0f} MB vs {sin_esquema:.0f} MB sin esquema "
+          f"(-{1 - actual / sin_esquema:.0%})")
+    return df
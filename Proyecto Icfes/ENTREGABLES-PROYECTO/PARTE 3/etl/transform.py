@@ -1,9 +1,22 @@
-# etl/transform.py  
-
+# etl/transform.py
+
+import os
+import json
+import shutil
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 from pathlib import Path
 import pandas as pd
 import numpy as np
-import unicodedata
+
+from etl.curated import DIR_CURATED, EscritorCurated, escribir_lote, periodos
+from etl.geo import GEO_FUZZY_UMBRAL, SIN_CODIGO, IndiceGeo, buscar_codigo, tabla_por_codigo
+from etl.manifest import file_entry, sha256_file
+from etl.metrics import Metricas
+from etl.normalize import normalizar_columnas, normalizar_serie
+from etl.schema import ICFES_CSV_ENGINE, leer_icfes, leer_icfes_con_reporte
 
 # ========= RUTAS EN CONTENEDOR =========
 BASE_INPUT   = Path("/opt/airflow/data/input")
@@ -12,102 +25,90 @@ BASE_OUTPUT  = Path("/opt/airflow/data/output")
 BASE_OUTPUT.mkdir(parents=True, exist_ok=True)
 
 # Entradas (respetando nombres del notebook, adaptados a Airflow)
-FILE_ICFES              = BASE_INPUT   / "data_icfes_2024.csv"
+# ICFES: un CSV por periodo (data_icfes_2024.csv, data_icfes_20251.csv, ...)
+DIR_ICFES               = BASE_INPUT
+PATRON_ICFES            = "data_icfes_*.csv"
 FILE_DANE_POBREZA       = BASE_STAGING / "dane_pobreza_monetaria.csv"
 FILE_IDH_DEPTO          = BASE_STAGING / "idh_departamentos.csv"
 FILE_POBLACION_MUNICIPIO= BASE_STAGING / "poblacion_municipios.csv"
-
-# Salida final
-OUT_FINAL = BASE_OUTPUT / "df_icfes_2024_final.csv"
-
-# ========= HELPERS =========
-def _norm_txt(x: object) -> str:
-    if pd.isna(x):
-        return ""
-    s = str(x).upper().strip()
-    s = ''.join(c for c in unicodedata.normalize('NFD', s) if unicodedata.category(c) != 'Mn')
-    return s
-
-def transform():
-    print("== TRANSFORM (inicio) ==")
-
-    # ===== 1) Leer ICFES =====
-    df_icfes_2024 = pd.read_csv(FILE_ICFES, encoding="utf-8", low_memory=False)
-    print(f"[ICFES] shape={df_icfes_2024.shape}")
-
-    # ===== 2) Drop de columnas EXACTO (del notebook) =====
-    cols_drop = [
-        "cole_genero","cole_jornada","cole_caracter","estu_genero","estu_grado",
-        "estu_dedicacioninternet","estu_dedicacionlecturadiaria","estu_horassemanatrabaja",
-        "fami_comecarnepescadohuevo","fami_comecerealfrutoslegumbre","fami_comelechederivados",
-        "fami_cuartoshogar","fami_educacionmadre","fami_educacionpadre","fami_numlibros",
-        "fami_personashogar","fami_tienecomputador","fami_tieneinternet"
-    ]
-    df_icfes_2024.drop(columns=[c for c in cols_drop if c in df_icfes_2024.columns], inplace=True, errors="ignore")
-    print(f"[ICFES] columnas tras drop: {len(df_icfes_2024.columns)}")
-
-    # ===== 3) Mapeos EXACTOS del notebook =====
-    map_deptos = {
-        "BOGOTÁ": "BOGOTÁ, D.C.","BOGOTA": "BOGOTÁ, D.C.","BOGOTÁ D.C.": "BOGOTÁ, D.C.","BOGOTA D.C.":"BOGOTÁ, D.C.",
-        "VALLE": "VALLE DEL CAUCA","QUINDIO": "QUINDÍO","CUNDINAMARCA": "CUNDINAMARCA","ANTIOQUIA": "ANTIOQUIA",
-        "BOLIVAR": "BOLÍVAR","CAUCA": "CAUCA","ATLANTICO": "ATLÁNTICO","NARIÑO": "NARIÑO","NARINO": "NARIÑO",
-        "SANTANDER": "SANTANDER","CORDOBA": "CÓRDOBA","RISARALDA": "RISARALDA","CESAR": "CESAR","MAGDALENA": "MAGDALENA",
-        "HUILA": "HUILA","CALDAS": "CALDAS","NORTE SANTANDER": "NORTE DE SANTANDER","NORTE DE SANTANDER": "NORTE DE SANTANDER",
-        "TOLIMA": "TOLIMA","LA GUAJIRA": "LA GUAJIRA","META": "META","CASANARE": "CASANARE","ARAUCA": "ARAUCA","SUCRE": "SUCRE",
-        "BOYACA": "BOYACÁ","CAQUETA": "CAQUETÁ","PUTUMAYO": "PUTUMAYO","GUAVIARE": "GUAVIARE","CHOCO": "CHOCÓ",
-        "GUAINIA": "GUAINÍA","VICHADA": "VICHADA","AMAZONAS": "AMAZONAS",
-        "SAN ANDRES": "SAN ANDRÉS, PROVIDENCIA Y SANTA CATALINA",
-        "SAN ANDRES Y PROVIDENCIA": "SAN ANDRÉS, PROVIDENCIA Y SANTA CATALINA",
-        "VAUPES": "VAUPÉS","VALLE DEL CAUCA": "VALLE DEL CAUCA","DESCONOCIDO": "DESCONOCIDO","EXTRANJERO": "EXTRANJERO"
-    }
-
-    map_mpios = {
-        "ARMERO GUAYABAL":"ARMERO","BOGOTA":"BOGOTA D.C.","CALIMA EL DARIEN":"CALIMA","CARTAGENA":"CARTAGENA DE INDIAS",
-        "CHIBOLO":"CHIVOLO","DON MATIAS":"DONMATIAS","FUENTE DE ORO":"FUENTEDEORO","GUICAN":"GUICAN DE LA SIERRA",
-        "MAGUI PAYAN":"MAGUI","MARIQUITA":"SAN SEBASTIAN DE MARIQUITA","PIENDAMO":"PIENDAMO - TUNIA",
-        "PURISIMA":"PURISIMA DE LA CONCEPCION","SALAZAR DE LAS PALMAS":"SALAZAR","SAN JOSE DEL PALMAR":"SAN JOSE DEL PALMAR",
-        "SAN JUAN DE RIO SECO":"SAN JUAN DE RIOSECO","SAN VICENTE":"SAN VICENTE FERRER","SANTA CRUZ DE LORICA":"LORICA",
-        "SANTAFE DE ANTIOQUIA":"SANTA FE DE ANTIOQUIA","SINCE":"SAN LUIS DE SINCE","TUMACO":"SAN ANDRES DE TUMACO",
-        "UBATE":"VILLA DE SAN DIEGO DE UBATE",
-        "RIO IRO": None,"SIPI": None
-    }
-
-    # ===== 4) Normalizar departamentos en ICFES y aplicar map_deptos =====
-    cols_deptos = ["cole_depto_ubicacion","estu_depto_presentacion","estu_depto_reside"]
-    for col in cols_deptos:
-        if col in df_icfes_2024.columns:
-            df_icfes_2024[col] = df_icfes_2024[col].map(_norm_txt).replace(map_deptos)
-
-    # ===== 5) Reorden de columnas (como tu notebook) =====
-    bloque_ubicacion = [
-        "cole_depto_ubicacion","cole_mcpio_ubicacion",
-        "estu_depto_presentacion","estu_mcpio_presentacion",
-        "estu_depto_reside","estu_mcpio_reside",
-        "estu_nacionalidad","estu_pais_reside"
-    ]
-    bloque_socioeco = [
-        "estu_inse_individual","estu_nse_individual",
-        "estu_nse_establecimiento","fami_estratovivienda"
-    ]
-    inicio = ["periodo","estu_estudiante","cole_area_ubicacion","cole_bilingue","cole_calendario","cole_naturaleza"]
-
-    otras = [c for c in df_icfes_2024.columns if c not in (inicio + bloque_ubicacion + bloque_socioeco)]
-    orden_columnas = inicio + [c for c in bloque_ubicacion if c in df_icfes_2024.columns] + \
-                     [c for c in bloque_socioeco if c in df_icfes_2024.columns] + otras
-
-    if "punt_global" in orden_columnas:
-        orden_columnas = [c for c in orden_columnas if c != "punt_global"] + ["punt_global"]
-
-    df_icfes_2024 = df_icfes_2024[orden_columnas]
-    print("[ICFES] reorden aplicado")
-
-
-
-
-
-
-
-# etl/transform.py  (Parte 2/3) — continuar debajo
+# Índice geográfico (etl/geo.py): códigos de municipio asignados + memo de nombres aproximados
+FILE_GEO_INDEX          = BASE_STAGING / "geo_index.json"
+
+# Salida final: Parquet particionado (etl/curated.py), con el registro de archivos procesados
+# en OUT_CURATED/_ledger.json y, opcional, un CSV por archivo (data_icfes_2024.csv → df_icfes_2024_final.csv)
+OUT_CURATED = DIR_CURATED
+
+# ========= CONFIG (variables de entorno) =========
+# Modo: "auto" (por lotes si el CSV no cabe en el presupuesto), "full", "chunked" o "parallel"
+TRANSFORM_MODE       = os.getenv("TRANSFORM_MODE", "auto").lower()
+TRANSFORM_CHUNK_ROWS = int(os.getenv("TRANSFORM_CHUNK_ROWS", "200000"))    # filas por lote
+TRANSFORM_MEMORY_MB  = float(os.getenv("TRANSFORM_MEMORY_MB", "2048"))     # presupuesto de RAM
+TRANSFORM_EXPORT_CSV = os.getenv("TRANSFORM_EXPORT_CSV", "0") == "1"       # exportar también el CSV
+TRANSFORM_WORKERS    = int(os.getenv("TRANSFORM_WORKERS", "0"))            # procesos del modo parallel (0 = núcleos)
+TRANSFORM_METRICS_XCOM = os.getenv("TRANSFORM_METRICS_XCOM", "1") == "1"   # métricas por paso también a XCom
+# Pico de RAM del modo completo ≈ RAM_FACTOR × tamaño del CSV (bench/bench_transform.py): lo marca la
+# lectura, 2,7x con pyarrow y 1,1x con el parser C (4,2x con la lectura por defecto y los merge)
+RAM_FACTOR = 3.0 if ICFES_CSV_ENGINE == "pyarrow" else 1.5
+
+# Tiempo, CPU, memoria y filas de cada paso (etl/metrics.py) → data/output/transform_metrics.json
+METRICAS = Metricas("transform")
+
+# ===== 2) Drop de columnas EXACTO (del notebook) =====
+cols_drop = [
+    "cole_genero","cole_jornada","cole_caracter","estu_genero","estu_grado",
+    "estu_dedicacioninternet","estu_dedicacionlecturadiaria","estu_horassemanatrabaja",
+    "fami_comecarnepescadohuevo","fami_comecerealfrutoslegumbre","fami_comelechederivados",
+    "fami_cuartoshogar","fami_educacionmadre","fami_educacionpadre","fami_numlibros",
+    "fami_personashogar","fami_tienecomputador","fami_tieneinternet"
+]
+
+# ===== 3) Mapeos EXACTOS del notebook =====
+map_deptos = {
+    "BOGOTÁ": "BOGOTÁ, D.C.","BOGOTA": "BOGOTÁ, D.C.","BOGOTÁ D.C.": "BOGOTÁ, D.C.","BOGOTA D.C.":"BOGOTÁ, D.C.",
+    "VALLE": "VALLE DEL CAUCA","QUINDIO": "QUINDÍO","CUNDINAMARCA": "CUNDINAMARCA","ANTIOQUIA": "ANTIOQUIA",
+    "BOLIVAR": "BOLÍVAR","CAUCA": "CAUCA","ATLANTICO": "ATLÁNTICO","NARIÑO": "NARIÑO","NARINO": "NARIÑO",
+    "SANTANDER": "SANTANDER","CORDOBA": "CÓRDOBA","RISARALDA": "RISARALDA","CESAR": "CESAR","MAGDALENA": "MAGDALENA",
+    "HUILA": "HUILA","CALDAS": "CALDAS","NORTE SANTANDER": "NORTE DE SANTANDER","NORTE DE SANTANDER": "NORTE DE SANTANDER",
+    "TOLIMA": "TOLIMA","LA GUAJIRA": "LA GUAJIRA","META": "META","CASANARE": "CASANARE","ARAUCA": "ARAUCA","SUCRE": "SUCRE",
+    "BOYACA": "BOYACÁ","CAQUETA": "CAQUETÁ","PUTUMAYO": "PUTUMAYO","GUAVIARE": "GUAVIARE","CHOCO": "CHOCÓ",
+    "GUAINIA": "GUAINÍA","VICHADA": "VICHADA","AMAZONAS": "AMAZONAS",
+    "SAN ANDRES": "SAN ANDRÉS, PROVIDENCIA Y SANTA CATALINA",
+    "SAN ANDRES Y PROVIDENCIA": "SAN ANDRÉS, PROVIDENCIA Y SANTA CATALINA",
+    "VAUPES": "VAUPÉS","VALLE DEL CAUCA": "VALLE DEL CAUCA","DESCONOCIDO": "DESCONOCIDO","EXTRANJERO": "EXTRANJERO"
+}
+
+map_mpios = {
+    "ARMERO GUAYABAL":"ARMERO","BOGOTA":"BOGOTA D.C.","CALIMA EL DARIEN":"CALIMA","CARTAGENA":"CARTAGENA DE INDIAS",
+    "CHIBOLO":"CHIVOLO","DON MATIAS":"DONMATIAS","FUENTE DE ORO":"FUENTEDEORO","GUICAN":"GUICAN DE LA SIERRA",
+    "MAGUI PAYAN":"MAGUI","MARIQUITA":"SAN SEBASTIAN DE MARIQUITA","PIENDAMO":"PIENDAMO - TUNIA",
+    "PURISIMA":"PURISIMA DE LA CONCEPCION","SALAZAR DE LAS PALMAS":"SALAZAR","SAN JOSE DEL PALMAR":"SAN JOSE DEL PALMAR",
+    "SAN JUAN DE RIO SECO":"SAN JUAN DE RIOSECO","SAN VICENTE":"SAN VICENTE FERRER","SANTA CRUZ DE LORICA":"LORICA",
+    "SANTAFE DE ANTIOQUIA":"SANTA FE DE ANTIOQUIA","SINCE":"SAN LUIS DE SINCE","TUMACO":"SAN ANDRES DE TUMACO",
+    "UBATE":"VILLA DE SAN DIEGO DE UBATE",
+    "RIO IRO": None,"SIPI": None
+}
+
+
+# ===== 5) Bloques del reorden de columnas (del notebook) =====
+inicio = ["periodo","estu_estudiante","cole_area_ubicacion","cole_bilingue","cole_calendario","cole_naturaleza"]
+bloque_ubicacion = [
+    "cole_depto_ubicacion","cole_mcpio_ubicacion",
+    "estu_depto_presentacion","estu_mcpio_presentacion",
+    "estu_depto_reside","estu_mcpio_reside",
+    "estu_nacionalidad","estu_pais_reside"
+]
+bloque_socioeco = [
+    "estu_inse_individual","estu_nse_individual",
+    "estu_nse_establecimiento","fami_estratovivienda"
+]
+
+
+# ========= REFERENCIAS (tablas chicas, una sola vez por corrida) =========
+def _leer_referencias() -> dict:
+    """
+    Pobreza, IDH/población depto y población municipal como arreglos indexados por código
+    (DIVIPOLA de departamento / código de municipio del índice geográfico), más el índice.
+    """
 
     # ===== 6) DANE: pobreza 2024 =====
     df_pobreza_monetaria = pd.read_csv(FILE_DANE_POBREZA, encoding="utf-8", low_memory=False)
@@ -115,55 +116,12 @@ def transform():
         df_pobreza_monetaria.drop(columns=["Pobreza_2023"], inplace=True)
 
     # Normalización + mapeo deptos
-    df_pobreza_monetaria["Departamento"] = (
-        df_pobreza_monetaria["Departamento"]
-        .map(_norm_txt)
-        .replace(map_deptos)
-    )
-
-    # Merge por departamento de residencia
-    df_icfes_2024 = df_icfes_2024.merge(
-        df_pobreza_monetaria.rename(columns={"Pobreza_2024": "pobreza_monetaria_depto"}),
-        how="left",
-        left_on="estu_depto_reside",
-        right_on="Departamento"
-    ).drop(columns=["Departamento"], errors="ignore")
-
-    # Reordenar: pobreza_monetaria_depto después de estu_pais_reside
-    cols = df_icfes_2024.columns.tolist()
-    if "pobreza_monetaria_depto" in cols and "estu_pais_reside" in cols:
-        cols.remove("pobreza_monetaria_depto")
-        idx = cols.index("estu_pais_reside") + 1
-        cols.insert(idx, "pobreza_monetaria_depto")
-        df_icfes_2024 = df_icfes_2024[cols]
+    df_pobreza_monetaria["Departamento"] = normalizar_serie(df_pobreza_monetaria["Departamento"], map_deptos)
 
     # ===== 7) IDH y Población a nivel departamento =====
     df_idh_departamentos = pd.read_csv(FILE_IDH_DEPTO, encoding="utf-8", low_memory=False)
 
-    df_idh_departamentos["Entidad"] = (
-        df_idh_departamentos["Entidad"]
-        .map(_norm_txt)
-        .replace(map_deptos)
-    )
-
-    df_icfes_2024 = df_icfes_2024.merge(
-        df_idh_departamentos.rename(columns={"IDH":"idh_depto","Población":"poblacion_depto"}),
-        how="left",
-        left_on="estu_depto_reside",
-        right_on="Entidad"
-    ).drop(columns=["Entidad"], errors="ignore")
-
-    # Reorden: idh_depto después de estu_pais_reside; poblacion_depto después de estu_mcpio_reside
-    cols = df_icfes_2024.columns.tolist()
-    if "idh_depto" in cols and "estu_pais_reside" in cols:
-        cols.remove("idh_depto")
-        idx = cols.index("estu_pais_reside") + 1
-        cols.insert(idx, "idh_depto")
-    if "poblacion_depto" in cols and "estu_mcpio_reside" in cols:
-        cols.remove("poblacion_depto")
-        idx = cols.index("estu_mcpio_reside") + 1
-        cols.insert(idx, "poblacion_depto")
-    df_icfes_2024 = df_icfes_2024[cols]
+    df_idh_departamentos["Entidad"] = normalizar_serie(df_idh_departamentos["Entidad"], map_deptos)
 
     # ===== 8) Población municipal (1100 filas aprox.) =====
     df_poblacion_municipios = pd.read_csv(FILE_POBLACION_MUNICIPIO, encoding="utf-8", low_memory=False)
@@ -180,79 +138,421 @@ def transform():
         .astype(int)
     )
 
-    # Normalización 1 (función local)
-    def normalizar(s):
-        if pd.isna(s):
-            return ""
-        s = str(s).upper().strip()
-        s = ''.join(c for c in unicodedata.normalize('NFD', s) if unicodedata.category(c) != 'Mn')
-        return s
-
-    df_icfes_2024 = df_icfes_2024.reset_index(drop=True)
     df_poblacion_municipios = df_poblacion_municipios.reset_index(drop=True)
 
-    # Normalizar municipios en ICFES
-    for c in ["estu_mcpio_reside","cole_mcpio_ubicacion","estu_mcpio_presentacion"]:
-        if c in df_icfes_2024.columns:
-            df_icfes_2024[c] = df_icfes_2024[c].apply(normalizar)
-
-    # Normalizar y mapear municipios en población
-    df_poblacion_municipios["Municipio_norm"] = df_poblacion_municipios["Municipio"].apply(normalizar)
-    df_poblacion_municipios["Municipio_mapeado"] = (
-        df_poblacion_municipios["Municipio_norm"].replace(map_mpios).fillna(df_poblacion_municipios["Municipio_norm"])
-    )
+    # Normalización 1: municipio en población (None en map_mpios = se conserva el normalizado)
+    df_poblacion_municipios["Municipio_mapeado"] = normalizar_serie(df_poblacion_municipios["Municipio"], map_mpios)
 
     # Normalización 2: departamento en población
-    df_poblacion_municipios["Departamento_norm"] = df_poblacion_municipios["Departamento"].apply(normalizar)
-    df_poblacion_municipios["Departamento_mapeado"] = (
-        df_poblacion_municipios["Departamento_norm"].replace(map_deptos).fillna(df_poblacion_municipios["Departamento_norm"])
-    )
+    df_poblacion_municipios["Departamento_mapeado"] = normalizar_serie(df_poblacion_municipios["Departamento"], map_deptos)
     # Ajuste Bogotá DC
     mask_bogota = df_poblacion_municipios["Municipio_mapeado"] == "BOGOTA D.C."
     df_poblacion_municipios.loc[mask_bogota, "Departamento_mapeado"] = "BOGOTÁ, D.C."
 
-    # Merge con población municipal por (depto_reside, mpio_reside)
-    df_icfes_2024 = df_icfes_2024.merge(
-        df_poblacion_municipios.rename(columns={"Poblacion":"poblacion_mcpio"})[
-            ["Departamento_mapeado","Municipio_mapeado","poblacion_mcpio"]
-        ],
-        how="left",
-        left_on=["estu_depto_reside","estu_mcpio_reside"],
-        right_on=["Departamento_mapeado","Municipio_mapeado"]
-    ).drop(columns=["Departamento_mapeado","Municipio_mapeado"], errors="ignore")
+    # Códigos: DIVIPOLA por departamento; municipio según el índice (se asignan los nuevos)
+    geo = IndiceGeo(df_poblacion_municipios[["Departamento_mapeado","Municipio_mapeado"]], FILE_GEO_INDEX, map_deptos)
+    df_pobreza_monetaria["cod_depto"] = geo.codigos_depto(df_pobreza_monetaria["Departamento"])
+    df_idh_departamentos["cod_depto"] = geo.codigos_depto(df_idh_departamentos["Entidad"])
+    df_poblacion_municipios["cod_mcpio"] = geo.codigos_mcpio(
+        geo.codigos_depto(df_poblacion_municipios["Departamento_mapeado"]), df_poblacion_municipios["Municipio_mapeado"])
+
+    # Tablas de búsqueda: valor en la posición del código
+    df_pobreza_monetaria = df_pobreza_monetaria.rename(columns={"Pobreza_2024": "pobreza_monetaria_depto"})
+    df_idh_departamentos = df_idh_departamentos.rename(columns={"IDH":"idh_depto","Población":"poblacion_depto"})
+    df_poblacion_municipios = df_poblacion_municipios.rename(columns={"Poblacion":"poblacion_mcpio"})
+    return {
+        "geo": geo,
+        "pobreza_monetaria_depto": _indexar(df_pobreza_monetaria, "cod_depto", "pobreza_monetaria_depto"),
+        "idh_depto": _indexar(df_idh_departamentos, "cod_depto", "idh_depto"),
+        "poblacion_depto": _indexar(df_idh_departamentos, "cod_depto", "poblacion_depto"),
+        "poblacion_mcpio": _indexar(df_poblacion_municipios, "cod_mcpio", "poblacion_mcpio"),
+    }
 
-    # Reorden: poblacion_mcpio después de poblacion_depto
-    cols = df_icfes_2024.columns.tolist()
-    if "poblacion_mcpio" in cols and "poblacion_depto" in cols:
-        cols.remove("poblacion_mcpio")
-        idx = cols.index("poblacion_depto") + 1
-        cols.insert(idx, "poblacion_mcpio")
-        df_icfes_2024 = df_icfes_2024[cols]
 
+# ========= BÚSQUEDAS POR CÓDIGO (reemplazan los merge) =========
+def _indexar(df: pd.DataFrame, clave: str, col: str) -> np.ndarray:
+    """
+    `col` como arreglo indexado por el código `clave` (tabla_por_codigo). Filas sin código se
+    avisan y se omiten; con códigos repetidos el merge duplicaría filas: se deja la primera.
+    """
+    sin_codigo = df[clave] == SIN_CODIGO
+    if sin_codigo.any():
+        print(f"[WARN] {col}: {int(sin_codigo.sum())} filas de la referencia sin código geográfico; se omiten")
+        df = df[~sin_codigo]
+    repetidas = df.duplicated(clave)
+    if repetidas.any():
+        print(f"[WARN] {col}: {int(repetidas.sum())} claves repetidas en la referencia; se usa la primera")
+        df = df[~repetidas]
+    return tabla_por_codigo(df.set_index(clave)[col])
+
+def _mover(cols: list, col: str, despues_de: str) -> None:
+    if col in cols and despues_de in cols:
+        cols.remove(col)
+        cols.insert(cols.index(despues_de) + 1, col)
+
+def _orden_salida(columnas: list) -> list:
+    """Orden final de columnas (pasos 5–8 del notebook), calculado sobre los nombres y aplicado al escribir."""
+    agregadas = ["pobreza_monetaria_depto","idh_depto","poblacion_depto","poblacion_mcpio"]
+    columnas = [c for c in columnas if c not in agregadas]
 
-# etl/transform.py  (Parte 3/3) — finalizar
+    # ===== 5) Reorden de columnas (como tu notebook) =====
+    otras = [c for c in columnas if c not in (inicio + bloque_ubicacion + bloque_socioeco)]
+    cols = inicio + [c for c in bloque_ubicacion if c in columnas] + \
+           [c for c in bloque_socioeco if c in columnas] + otras
+    if "punt_global" in cols:
+        cols = [c for c in cols if c != "punt_global"] + ["punt_global"]
+
+    # 6) pobreza_monetaria_depto después de estu_pais_reside
+    cols.append("pobreza_monetaria_depto")
+    _mover(cols, "pobreza_monetaria_depto", "estu_pais_reside")
+    # 7) idh_depto después de estu_pais_reside; poblacion_depto después de estu_mcpio_reside
+    cols += ["idh_depto", "poblacion_depto"]
+    _mover(cols, "idh_depto", "estu_pais_reside")
+    _mover(cols, "poblacion_depto", "estu_mcpio_reside")
+    # 8) poblacion_mcpio después de poblacion_depto
+    cols.append("poblacion_mcpio")
+    _mover(cols, "poblacion_mcpio", "poblacion_depto")
+    return cols
+
+
+# ========= ENRIQUECIMIENTO (un DataFrame completo o un lote) =========
+def _enriquecer(df_icfes_2024: pd.DataFrame, refs: dict, verbose: bool = True) -> pd.DataFrame:
+    """
+    Pasos 2–9 del notebook sobre `df_icfes_2024`, en el mismo objeto: las columnas nuevas se
+    agregan al final y el orden del notebook se aplica al escribir (_orden_salida).
+    Fila a fila, así que sirve igual por lotes.
+    """
+
+    n = len(df_icfes_2024)
+
+    # ===== 2) Drop de columnas (el lector con esquema ya no las lee; esto cubre otros orígenes) =====
+    with METRICAS.paso("2) drop", n):
+        df_icfes_2024.drop(columns=[c for c in cols_drop if c in df_icfes_2024.columns], inplace=True, errors="ignore")
+    if verbose:
+        print(f"[ICFES] columnas tras drop: {len(df_icfes_2024.columns)}")
+
+    # ===== 4) Normalizar departamentos en ICFES y aplicar map_deptos =====
+    # Solo sobre los valores distintos (~35), compartidos por las tres columnas
+    with METRICAS.paso("4) normalizar departamentos", n):
+        cols_deptos = ["cole_depto_ubicacion","estu_depto_presentacion","estu_depto_reside"]
+        normalizar_columnas(df_icfes_2024, cols_deptos, map_deptos)
+
+    with METRICAS.paso("6-7) pobreza, IDH y población depto", n) as m:
+        # Código DIVIPOLA del departamento de residencia (una resolución por valor distinto)
+        geo = refs["geo"]
+        cod_depto = geo.codigos_depto(df_icfes_2024["estu_depto_reside"])
+
+        # ===== 6) Pobreza por departamento de residencia =====
+        df_icfes_2024["pobreza_monetaria_depto"] = buscar_codigo(cod_depto, refs["pobreza_monetaria_depto"])
+
+        # ===== 7) IDH y población departamental =====
+        df_icfes_2024["idh_depto"] = buscar_codigo(cod_depto, refs["idh_depto"])
+        df_icfes_2024["poblacion_depto"] = buscar_codigo(cod_depto, refs["poblacion_depto"])
+        m.detalle["sin_codigo_depto"] = int((cod_depto == SIN_CODIGO).sum())
+
+    # ===== 8) Población municipal =====
+    # Normalizar municipios en ICFES (solo los ~1.100 valores distintos, memo compartido)
+    with METRICAS.paso("8) normalizar municipios", n):
+        normalizar_columnas(df_icfes_2024, ["estu_mcpio_reside","cole_mcpio_ubicacion","estu_mcpio_presentacion"])
+
+    with METRICAS.paso("8) población municipal", n) as m:
+        # Por código de (depto_reside, mpio_reside): exacto o, si no, aproximado dentro del departamento
+        cod_mcpio = geo.codigos_mcpio(cod_depto, df_icfes_2024["estu_mcpio_reside"])
+        df_icfes_2024["poblacion_mcpio"] = buscar_codigo(cod_mcpio, refs["poblacion_mcpio"])
+        m.detalle["sin_poblacion_mcpio"] = int(df_icfes_2024["poblacion_mcpio"].isna().sum())
 
     # ===== 9) Tratamiento de nulos y caso EXTRANJERO =====
-    m_extranjero = df_icfes_2024["estu_depto_reside"].astype(str).str.strip().str.upper().eq("EXTRANJERO")
-    # 0 en poblaciones, 0.0 en idh/pobreza para EXTRANJERO
-    for c in ["poblacion_depto","poblacion_mcpio"]:
-        if c in df_icfes_2024.columns:
-            df_icfes_2024.loc[m_extranjero, c] = 0
-    for c in ["idh_depto","pobreza_monetaria_depto"]:
-        if c in df_icfes_2024.columns:
-            df_icfes_2024.loc[m_extranjero, c] = 0.0
-
-    # Tipos finales (idéntico a tu notebook)
-    if "poblacion_depto" in df_icfes_2024.columns:
-        df_icfes_2024["poblacion_depto"] = df_icfes_2024["poblacion_depto"].astype("Int64")
-    if "poblacion_mcpio" in df_icfes_2024.columns:
-        df_icfes_2024["poblacion_mcpio"] = df_icfes_2024["poblacion_mcpio"].astype("Int64")
-    for c in ["idh_depto","pobreza_monetaria_depto"]:
-        if c in df_icfes_2024.columns:
-            df_icfes_2024[c] = df_icfes_2024[c].astype(float)
-
-    # ===== 10) Copia final y escritura =====
-    df_icfes_2024_final = df_icfes_2024.copy()
-    df_icfes_2024_final.to_csv(OUT_FINAL, index=False, encoding="utf-8-sig")
-    print(f"[OK] OUTPUT: {OUT_FINAL}  shape={df_icfes_2024_final.shape}")
+    with METRICAS.paso("9) nulos y tipos", n):
+        # estu_depto_reside ya está normalizado (mayúsculas, sin espacios): basta comparar
+        m_extranjero = (df_icfes_2024["estu_depto_reside"] == "EXTRANJERO").to_numpy()
+        # 0 en poblaciones, 0.0 en idh/pobreza para EXTRANJERO
+        for c in ["poblacion_depto","poblacion_mcpio"]:
+            if c in df_icfes_2024.columns:
+                df_icfes_2024.loc[m_extranjero, c] = 0
+        for c in ["idh_depto","pobreza_monetaria_depto"]:
+            if c in df_icfes_2024.columns:
+                df_icfes_2024.loc[m_extranjero, c] = 0.0
+
+        # Tipos finales (idéntico a tu notebook)
+        if "poblacion_depto" in df_icfes_2024.columns:
+            df_icfes_2024["poblacion_depto"] = df_icfes_2024["poblacion_depto"].astype("Int64")
+        if "poblacion_mcpio" in df_icfes_2024.columns:
+            df_icfes_2024["poblacion_mcpio"] = df_icfes_2024["poblacion_mcpio"].astype("Int64")
+        for c in ["idh_depto","pobreza_monetaria_depto"]:
+            if c in df_icfes_2024.columns:
+                df_icfes_2024[c] = df_icfes_2024[c].astype(float)
+
+    return df_icfes_2024
+
+
+# ========= MODO DE EJECUCIÓN =========
+def _usar_lotes(archivo: Path) -> bool:
+    """True si conviene procesar por lotes: forzado por TRANSFORM_MODE o el CSV no cabe en el presupuesto."""
+    if TRANSFORM_MODE in ("full", "chunked"):
+        return TRANSFORM_MODE == "chunked"
+    size_mb = archivo.stat().st_size / 1024**2
+    estimado = size_mb * RAM_FACTOR
+    print(f"[TRANSFORM] CSV {size_mb:.0f} MB → pico estimado {estimado:.0f} MB "
+          f"(presupuesto {TRANSFORM_MEMORY_MB:.0f} MB)")
+    return estimado > TRANSFORM_MEMORY_MB
+
+def _salida_csv(archivo: Path) -> Path:
+    """CSV opcional de un archivo del ICFES: data_icfes_2024.csv → df_icfes_2024_final.csv."""
+    nombre = archivo.stem[len("data_"):] if archivo.stem.startswith("data_") else archivo.stem
+    return BASE_OUTPUT / f"df_{nombre}_final.csv"
+
+def _transform_completo(refs: dict, archivo: Path, escritor: EscritorCurated) -> int:
+    # ===== 1) Leer ICFES (esquema declarado: sin las columnas de cols_drop, tipos compactos) =====
+    with METRICAS.paso("1) lectura") as m:
+        df_icfes_2024 = leer_icfes_con_reporte(archivo, cols_drop)
+        m.filas_salida = len(df_icfes_2024)
+    print(f"[ICFES] shape={df_icfes_2024.shape}")
+
+    df_icfes_2024 = _enriquecer(df_icfes_2024, refs)
+
+    # ===== 10) Escritura (el orden de columnas se aplica acá, una sola vez) =====
+    orden = _orden_salida(df_icfes_2024.columns.tolist())
+    with METRICAS.paso("10) escritura parquet", len(df_icfes_2024)):
+        escritor.escribir(df_icfes_2024, orden)
+    if TRANSFORM_EXPORT_CSV:
+        with METRICAS.paso("10) escritura csv", len(df_icfes_2024)):
+            df_icfes_2024.to_csv(_salida_csv(archivo), index=False, encoding="utf-8-sig", columns=orden)
+        print(f"[OK] CSV: {_salida_csv(archivo)}")
+    print(f"[OK] {archivo.name}  shape={(len(df_icfes_2024), len(orden))}")
+    return len(df_icfes_2024)
+
+def _lecturas_medidas(lotes):
+    """Itera `lotes` midiendo la lectura de cada uno como el paso 1."""
+    lotes = iter(lotes)
+    while True:
+        with METRICAS.paso("1) lectura") as m:
+            lote = next(lotes, None)
+            m.filas_salida = 0 if lote is None else len(lote)
+        if lote is None:
+            return
+        yield lote
+
+def _transform_por_lotes(refs: dict, archivo: Path, escritor: EscritorCurated) -> int:
+    """Lee el CSV en lotes de TRANSFORM_CHUNK_ROWS filas y los agrega a la salida: RAM acotada por el lote."""
+    print(f"[TRANSFORM] Modo por lotes: {TRANSFORM_CHUNK_ROWS:,} filas por lote")
+    salida_csv = _salida_csv(archivo)
+    tmp = salida_csv.with_name(salida_csv.name + ".tmp")
+    filas, n_cols = 0, 0
+    lotes = _lecturas_medidas(leer_icfes(archivo, cols_drop, chunksize=TRANSFORM_CHUNK_ROWS))
+    for i, lote in enumerate(lotes):
+        lote = _enriquecer(lote, refs, verbose=(i == 0))
+        orden = _orden_salida(lote.columns.tolist())
+        with METRICAS.paso("10) escritura parquet", len(lote)):
+            escritor.escribir(lote, orden)
+        if TRANSFORM_EXPORT_CSV:
+            # BOM + encabezado solo en el primer lote (utf-8-sig en append repetiría el BOM)
+            with METRICAS.paso("10) escritura csv", len(lote)):
+                lote.to_csv(tmp, index=False, header=(i == 0), mode="w" if i == 0 else "a",
+                            encoding="utf-8-sig" if i == 0 else "utf-8", columns=orden)
+        filas, n_cols = filas + len(lote), len(orden)
+        print(f"[CHUNK] lote {i + 1}: {len(lote):,} filas (acumulado {filas:,})")
+    # El CSV solo se reemplaza si todos los lotes terminaron
+    if TRANSFORM_EXPORT_CSV:
+        tmp.replace(salida_csv)
+        print(f"[OK] CSV: {salida_csv}")
+    print(f"[OK] {archivo.name}  shape=({filas}, {n_cols})")
+    return filas
+
+# ========= MODO PARALELO (por departamento de residencia) =========
+# DataFrame y referencias del proceso padre: los hijos (fork) los heredan sin copiarlos ni serializarlos
+_COMPARTIDO = {}
+
+def _nucleos() -> int:
+    try:
+        return len(os.sched_getaffinity(0))     # respeta los límites de CPU del contenedor
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def _tareas(claves: pd.Series, workers: int) -> list:
+    """
+    Posiciones de filas de cada tarea, de la más grande a la más chica: un departamento por
+    tarea; los que superan 1/(2·workers) de las filas se parten para repartir la carga.
+    """
+    codes, _ = pd.factorize(claves)
+    orden = np.argsort(codes, kind="stable")
+    grupos = np.split(orden, np.flatnonzero(np.diff(codes[orden])) + 1)
+    limite = max(-(-len(claves) // (2 * workers)), 1)
+    tareas = [parte for g in grupos for parte in np.array_split(g, -(-len(g) // limite))]
+    return sorted(tareas, key=len, reverse=True)
+
+def _procesar_tarea(args):
+    """
+    En el proceso hijo: enriquece las filas de la tarea y escribe sus particiones Parquet.
+    Los pasos (2 a 10) se miden con la copia de METRICAS del hijo y vuelven al padre.
+    """
+    n, posiciones = args
+    archivo = METRICAS.archivo
+    METRICAS.reiniciar()            # la copia del fork trae los pasos del padre (o de la tarea anterior)
+    METRICAS.archivo = archivo
+    parte = _enriquecer(_COMPARTIDO["df"].take(posiciones), _COMPARTIDO["refs"], verbose=False)
+    with METRICAS.paso("10) escritura parquet", len(parte)):
+        orden = _orden_salida(parte.columns.tolist())
+        escribir_lote(parte, orden, _COMPARTIDO["tmp"], f"{_COMPARTIDO['prefijo']}-{n}")
+    # Para el CSV el padre necesita las filas (el orden global mezcla departamentos); los
+    # nombres aproximados que resolvió este hijo vuelven al memo del padre
+    return (len(parte), (parte if TRANSFORM_EXPORT_CSV else None), _COMPARTIDO["refs"]["geo"].memo_nuevo,
+            METRICAS.pasos())
+
+def _transform_paralelo(refs: dict, archivo: Path, escritor: EscritorCurated) -> int:
+    """
+    Reparte las filas por departamento de residencia (normalizado) entre TRANSFORM_WORKERS
+    procesos; cada uno enriquece y escribe sus particiones. Mismo resultado que el modo completo.
+    """
+    workers = TRANSFORM_WORKERS or _nucleos()
+    with METRICAS.paso("1) lectura") as m:
+        df_icfes_2024 = leer_icfes_con_reporte(archivo, cols_drop)
+        m.filas_salida = len(df_icfes_2024)
+    print(f"[ICFES] shape={df_icfes_2024.shape}")
+
+    with METRICAS.paso("reparto por departamento", len(df_icfes_2024)):
+        claves = normalizar_serie(df_icfes_2024["estu_depto_reside"], map_deptos)
+        tareas = _tareas(claves, workers)
+    print(f"[PARALLEL] {claves.nunique()} departamentos → {len(tareas)} tareas en {workers} procesos")
+
+    # Los pasos 2–10 corren en los hijos: acá se mide el pool completo (reloj, CPU de los hijos
+    # y su pico de RSS) y después se suman los pasos que midió cada hijo
+    _COMPARTIDO.update(df=df_icfes_2024, refs=refs, tmp=escritor.tmp, prefijo=escritor.prefijo)
+    try:
+        with METRICAS.paso(f"2-10) enriquecer y escribir ({workers} procesos)", len(df_icfes_2024)):
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork")) as pool:
+                resultados = list(pool.map(_procesar_tarea, enumerate(tareas)))
+    finally:
+        _COMPARTIDO.clear()
+    filas = sum(n for n, _, _, _ in resultados)
+    escritor.registrar(filas, lotes=len(tareas))
+    for _, _, memo, pasos in resultados:
+        refs["geo"].incorporar(memo)
+        METRICAS.incorporar(pasos)
+
+    n_cols = len(_orden_salida(df_icfes_2024.columns.tolist()))
+    if TRANSFORM_EXPORT_CSV:
+        # Índice original (RangeIndex del lector) → sort_index recupera el orden del crudo
+        with METRICAS.paso("10) escritura csv", filas):
+            df_final = pd.concat([parte for _, parte, _, _ in resultados]).sort_index()
+            df_final.to_csv(_salida_csv(archivo), index=False, encoding="utf-8-sig",
+                            columns=_orden_salida(df_final.columns.tolist()))
+        print(f"[OK] CSV: {_salida_csv(archivo)}")
+    print(f"[OK] {archivo.name}  shape=({filas}, {n_cols})")
+    return filas
+
+
+# ========= REGISTRO DE ARCHIVOS PROCESADOS (ledger) =========
+def _ruta_ledger() -> Path:
+    # Dentro del dataset (pyarrow ignora los archivos que empiezan con "_"): si se borra el
+    # dataset, se borra también su registro
+    return OUT_CURATED / "_ledger.json"
+
+def _leer_ledger() -> dict:
+    try:
+        return json.loads(_ruta_ledger().read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+def _guardar_ledger(ledger: dict):
+    _ruta_ledger().parent.mkdir(parents=True, exist_ok=True)
+    tmp = _ruta_ledger().with_suffix(".tmp")
+    tmp.write_text(json.dumps(ledger, indent=2, ensure_ascii=False, sort_keys=True), encoding="utf-8")
+    tmp.replace(_ruta_ledger())
+
+def _huella_referencias() -> str:
+    """
+    sha256 conjunto de pobreza, IDH, población y el umbral de nombres aproximados: si cambia,
+    cada periodo se vuelve a enriquecer.
+    """
+    h = hashlib.sha256()
+    for f in (FILE_DANE_POBREZA, FILE_IDH_DEPTO, FILE_POBLACION_MUNICIPIO):
+        h.update(sha256_file(f).encode())
+    h.update(str(GEO_FUZZY_UMBRAL).encode())
+    return h.hexdigest()
+
+def _pendientes(archivos: list, ledger: dict, huella_refs: str) -> list:
+    """
+    (archivo, huella) de los archivos nuevos, modificados o enriquecidos con otras referencias.
+    Los que no cambiaron se omiten (su entrada en `ledger` solo actualiza tamaño y mtime).
+    """
+    pendientes = []
+    for archivo in archivos:
+        previo = ledger.get(archivo.name)
+        huella = file_entry(archivo, previo)     # reutiliza el hash si tamaño y mtime no cambiaron
+        if previo is None:
+            motivo = "nuevo"
+        elif huella["sha256"] != previo["sha256"]:
+            motivo = "modificado"
+        elif previo.get("referencias") != huella_refs:
+            motivo = "referencias nuevas"
+        else:
+            # Mismo contenido: se actualiza tamaño/mtime para no volver a hashearlo (p. ej. tras un touch)
+            ledger[archivo.name] = dict(previo, size=huella["size"], mtime_ns=huella["mtime_ns"])
+            print(f"[LEDGER] {archivo.name}: sin cambios ({previo['filas']:,} filas) → se omite")
+            continue
+        print(f"[LEDGER] {archivo.name}: {motivo} → se procesa")
+        pendientes.append((archivo, {k: huella[k] for k in ("sha256", "size", "mtime_ns")}))
+    for nombre in sorted(ledger.keys() - {a.name for a in archivos}):
+        print(f"[LEDGER] {nombre}: ya no está en {DIR_ICFES}; se conservan sus particiones")
+    return pendientes
+
+# ========= MÉTRICAS POR PASO =========
+def _ruta_metricas() -> Path:
+    return BASE_OUTPUT / "transform_metrics.json"
+
+def _publicar_metricas(context: dict, **extra) -> dict:
+    """Escribe transform_metrics.json y, dentro de Airflow, lo deja en XCom (key "transform_metrics")."""
+    METRICAS.imprimir()
+    resumen = METRICAS.guardar(_ruta_metricas(), modo=TRANSFORM_MODE, **extra)
+    print(f"[METRICS] {_ruta_metricas()}")
+    ti = context.get("ti")
+    if TRANSFORM_METRICS_XCOM and ti is not None:
+        ti.xcom_push(key="transform_metrics", value=resumen)
+    return resumen
+
+def transform(**context):
+    print("== TRANSFORM (inicio) ==")
+    METRICAS.reiniciar()
+    archivos = sorted(DIR_ICFES.glob(PATRON_ICFES))
+    if not archivos:
+        raise FileNotFoundError(f"No hay archivos {PATRON_ICFES} en {DIR_ICFES}")
+
+    ledger = _leer_ledger()
+    if not ledger and OUT_CURATED.exists():
+        # Dataset de una versión sin registro: no se sabe de qué archivo es cada parte
+        print(f"[LEDGER] {OUT_CURATED} no tiene registro → se reconstruye")
+        shutil.rmtree(OUT_CURATED)
+    with METRICAS.paso("ledger"):
+        huella_refs = _huella_referencias()
+        pendientes = _pendientes(archivos, ledger, huella_refs)
+    if not pendientes:
+        _guardar_ledger(ledger)
+        print("[LEDGER] Ningún archivo nuevo o modificado")
+        _publicar_metricas(context, procesados=[])
+        print("== TRANSFORM (fin) ==")
+        return
+
+    with METRICAS.paso("referencias"):
+        refs = _leer_referencias()
+    for archivo, huella in pendientes:
+        METRICAS.archivo = archivo.name
+        # Las partes Parquet llevan el nombre del archivo: reprocesarlo reemplaza solo las suyas
+        escritor = EscritorCurated(OUT_CURATED, prefijo=archivo.stem)
+        if TRANSFORM_MODE == "parallel":
+            filas = _transform_paralelo(refs, archivo, escritor)
+        elif _usar_lotes(archivo):
+            filas = _transform_por_lotes(refs, archivo, escritor)
+        else:
+            filas = _transform_completo(refs, archivo, escritor)
+        with METRICAS.paso("publicación", filas):
+            publicados = escritor.cerrar()
+            refs["geo"].guardar()
+
+            ledger[archivo.name] = dict(huella, filas=filas, periodos=periodos(publicados),
+                                        referencias=huella_refs,
+                                        procesado=datetime.now().isoformat(timespec="seconds"))
+            _guardar_ledger(ledger)
+    METRICAS.archivo = None
+    print(f"[LEDGER] {len(pendientes)} archivo(s) procesados; {len(ledger)} en el histórico")
+    _publicar_metricas(context, procesados=[a.name for a, _ in pendientes])
     print("== TRANSFORM (fin) ==")
@@ -0,0 +1,315 @@
+# etl/validation.py
+"""
+Motor de validación propio para great_expectations(): evalúa la suite completa sobre la
+tabla Arrow del dataset curado, sin pasar por pandas ni importar great_expectations.
+
+La suite es la de PARTE 2 (src/validation/gx/expectations/icfes_suite.json, montada en el
+contenedor): cargar_suite() la compila a tuplas (clave del reporte, tipo, columna(s),
+argumentos). La clave sale de meta.report_key y meta.critical marca las expectativas que
+hacen fallar la tarea.
+
+El trabajo se hace por columna, no por expectativa: cada columna se lee una vez y de ella
+salen nulos, mínimo y máximo, que comparten todas sus expectativas. Un rango solo se
+recorre valor a valor cuando el mínimo o el máximo del lote caen fuera de él, y el tipo
+sale del esquema; la regla entre columnas es la única comparación fila a fila. Los conteos
+se acumulan en `Estadisticas`, lote a lote si el dataset no cabe en memoria
+(validar_lotes), con el mismo resultado que sobre la tabla entera; las de cada partición
+se pueden guardar (a_dict) y combinar después sin volver a leer sus datos.
+
+Los resultados tienen la forma de los de PandasDataset (success y result con
+unexpected_count, unexpected_percent u observed_value), así que el reporte sale igual con
+cualquiera de los dos motores:
+
+- not_null : nulos (y NaN) sobre el total de filas;
+- between  : valores no nulos fuera de [min_value, max_value], sobre los no nulos;
+- of_type  : texto → valor a valor (como GE con columnas object); resto → dtype de la columna;
+- pair_gt  : filas donde la primera columna no es > (o >= con or_equal) la segunda (un
+             nulo cuenta como falla).
+"""
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Cambia cuando cambia cómo se calculan las estadísticas (invalida las guardadas en caché)
+VERSION_MOTOR = 1
+
+# expectation_type de GE → expectativa del motor
+TIPOS_GE = {
+    "expect_column_values_to_not_be_null": "not_null",
+    "expect_column_values_to_be_between": "between",
+    "expect_column_values_to_be_of_type": "of_type",
+    "expect_column_pair_values_a_to_be_greater_than_b": "pair_gt",
+}
+# Argumentos de cada tipo que entiende el motor (el resto de los de GE se ignora)
+_ARGUMENTOS = {
+    "not_null": ("mostly",),
+    "between": ("min_value", "max_value", "strict_min", "strict_max", "mostly"),
+    "of_type": ("type_", "mostly"),
+    "pair_gt": ("or_equal",),
+}
+
+
+def cargar_suite(ruta: Path) -> tuple:
+    """
+    (suite, críticas) desde el JSON de una suite de GE. Las expectativas que el motor no
+    conoce quedan en la suite con su expectation_type y argumentos originales: el motor
+    native las informa como "skipped" y el de GE las corre igual.
+    """
+    data = json.loads(Path(ruta).read_text(encoding="utf-8"))
+    suite, criticas = [], []
+    for e in data.get("expectations", []):
+        ge_tipo, kw, meta = e["expectation_type"], dict(e.get("kwargs", {})), e.get("meta") or {}
+        tipo = TIPOS_GE.get(ge_tipo, ge_tipo)
+        if "column_A" in kw:
+            cols = (kw.pop("column_A"), kw.pop("column_B"))
+        else:
+            cols = kw.pop("column", ())
+        nombre = ge_tipo[len("expect_"):] if ge_tipo.startswith("expect_") else ge_tipo
+        clave = meta.get("report_key") or "_".join([nombre] + ([cols] if isinstance(cols, str) else list(cols)))
+        usadas = {c for c, *_ in suite}
+        if clave in usadas:
+            clave = next(f"{clave}_{i}" for i in range(2, len(usadas) + 2) if f"{clave}_{i}" not in usadas)
+        if tipo not in _ARGUMENTOS:
+            print(f"[WARN] Suite {ruta}: {ge_tipo} no está soportada por el motor native ({clave}: skipped)")
+        else:
+            kw = {k: v for k, v in kw.items() if k in _ARGUMENTOS[tipo] and v is not None}
+        suite.append((clave, tipo, cols, kw))
+        if meta.get("critical"):
+            criticas.append(clave)
+    return suite, criticas
+
+
+def version_suite(suite) -> str:
+    """sha256 de la suite compilada y de VERSION_MOTOR: identifica estadísticas comparables."""
+    texto = json.dumps([VERSION_MOTOR, suite], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+def columnas_suite(suite) -> list:
+    """Columnas que usa la suite, sin repetir y en orden de aparición."""
+    out = []
+    for _, tipo, cols, _ in suite:
+        if tipo not in _ARGUMENTOS:
+            continue
+        for c in (cols,) if isinstance(cols, str) else cols:
+            if c not in out:
+                out.append(c)
+    return out
+
+
+def _es_texto(tipo: pa.DataType) -> bool:
+    if pa.types.is_dictionary(tipo):
+        tipo = tipo.value_type
+    return pa.types.is_string(tipo) or pa.types.is_large_string(tipo)
+
+
+def _nulos(col) -> int:
+    """Nulos de Arrow más NaN en columnas float (pandas / GE cuentan ambos como faltantes)."""
+    n = col.null_count
+    if pa.types.is_floating(col.type):
+        n += pc.sum(pc.is_nan(col)).as_py() or 0
+    return n
+
+
+def _mapa(n_filas: int, no_nulos: int, unexpected: int, mostly: float = None) -> dict:
+    """Resultado de una expectativa valor a valor, con los campos, porcentajes y `mostly` de GE."""
+    if not no_nulos:
+        ok = True
+    elif mostly is None:
+        ok = unexpected == 0
+    else:
+        ok = (no_nulos - unexpected) / no_nulos >= mostly
+    return {
+        "success": ok,
+        "result": {
+            "element_count": n_filas,
+            "missing_count": n_filas - no_nulos,
+            "unexpected_count": unexpected,
+            "unexpected_percent": unexpected / no_nulos * 100 if no_nulos else None,
+            "unexpected_percent_total": unexpected / n_filas * 100 if no_nulos else None,
+        },
+    }
+
+
+def _dtype_pandas(tipo: pa.DataType) -> str:
+    """Nombre del dtype.type con que pandas recibe la columna (lo que GE informa como observed_value)."""
+    if pa.types.is_dictionary(tipo):
+        return "CategoricalDtypeType"
+    try:
+        return np.dtype(tipo.to_pandas_dtype()).type.__name__
+    except (NotImplementedError, TypeError):
+        return str(tipo)
+
+
+def _tipo_esperado(type_: str):
+    try:
+        return np.dtype(type_).type.__name__
+    except TypeError:
+        return type_
+
+
+def _en_rango(minimo, maximo, kw: dict) -> bool:
+    """Si el mínimo y el máximo de un lote caen dentro del rango, ningún valor queda afuera."""
+    if minimo is None:
+        return True
+    lo, hi = kw.get("min_value"), kw.get("max_value")
+    if lo is not None and (minimo <= lo if kw.get("strict_min") else minimo < lo):
+        return False
+    if hi is not None and (maximo >= hi if kw.get("strict_max") else maximo > hi):
+        return False
+    return True
+
+
+def _fuera_de_rango(col, kw: dict) -> int:
+    fuera = []
+    if kw.get("min_value") is not None:
+        fuera.append((pc.less_equal if kw.get("strict_min") else pc.less)(col, kw["min_value"]))
+    if kw.get("max_value") is not None:
+        fuera.append((pc.greater_equal if kw.get("strict_max") else pc.greater)(col, kw["max_value"]))
+    if not fuera:
+        return 0
+    mask = fuera[0] if len(fuera) == 1 else pc.or_(*fuera)
+    return pc.sum(mask).as_py() or 0
+
+
+class Estadisticas:
+    """
+    Conteos de la suite sobre un conjunto de filas, que se pueden acumular lote a lote y
+    combinar entre sí: filas, por columna nulos / mínimo / máximo (y su tipo), y por
+    expectativa los valores fuera de rango, de otro tipo o que rompen la regla. Los
+    resultados se arman al final solo con sumas, así que no dependen de cómo se partieron
+    las filas: validar por lotes da exactamente lo mismo que validar la tabla entera.
+    """
+
+    def __init__(self, suite):
+        self.suite = suite
+        self.filas = 0
+        self.columnas = {}      # columna → {texto, dtype, nulos, min, max}
+        self.fallas = {}        # clave → filas que fallan (between, pair_gt, of_type de texto)
+
+    def acumular(self, lote) -> "Estadisticas":
+        """Suma un pa.Table / pa.RecordBatch con las columnas de la suite."""
+        nombres = set(lote.schema.names)
+        nulos, extremos = {}, {}
+        for c in columnas_suite(self.suite):
+            if c not in nombres:
+                continue
+            col = lote.column(c)
+            st = self.columnas.setdefault(c, {
+                "texto": _es_texto(col.type), "dtype": _dtype_pandas(col.type),
+                "nulos": 0, "min": None, "max": None,
+            })
+            nulos[c] = _nulos(col)
+            st["nulos"] += nulos[c]
+            if not pa.types.is_dictionary(col.type):
+                mm = pc.min_max(col)
+                extremos[c] = (mm["min"].as_py(), mm["max"].as_py())
+                _extremos(st, *extremos[c])
+
+        for clave, tipo, cols, kw in self.suite:
+            nombres_exp = (cols,) if isinstance(cols, str) else tuple(cols)
+            if tipo not in _ARGUMENTOS or not nombres.issuperset(nombres_exp):
+                continue
+            col = lote.column(nombres_exp[0])
+            if tipo == "between":
+                en_rango = nombres_exp[0] in extremos and _en_rango(*extremos[nombres_exp[0]], kw)
+                n = 0 if en_rango else _fuera_de_rango(col, kw)
+            elif tipo == "pair_gt":
+                comparar = pc.greater_equal if kw.get("or_equal") else pc.greater
+                mask = pc.fill_null(comparar(col, lote.column(nombres_exp[1])), False)
+                n = lote.num_rows - (pc.sum(mask).as_py() or 0)
+            elif tipo == "of_type" and _es_texto(col.type):
+                # Como object en pandas: GE revisa cada valor no nulo (todos son str)
+                ok = kw["type_"].lower() in ("str", "string_types")
+                n = 0 if ok else lote.num_rows - nulos[nombres_exp[0]]
+            else:
+                continue
+            self.fallas[clave] = self.fallas.get(clave, 0) + n
+        self.filas += lote.num_rows
+        return self
+
+    def combinar(self, otra: "Estadisticas") -> "Estadisticas":
+        """Suma las estadísticas de otro conjunto de filas (mismas columnas y tipos)."""
+        self.filas += otra.filas
+        for c, o in otra.columnas.items():
+            st = self.columnas.setdefault(c, dict(o, nulos=0, min=None, max=None))
+            st["nulos"] += o["nulos"]
+            _extremos(st, o["min"], o["max"])
+        for clave, n in otra.fallas.items():
+            self.fallas[clave] = self.fallas.get(clave, 0) + n
+        return self
+
+    def a_dict(self) -> dict:
+        """Forma serializable (JSON) de las estadísticas."""
+        return {"filas": self.filas, "columnas": self.columnas, "fallas": self.fallas}
+
+    @classmethod
+    def desde_dict(cls, suite, data: dict) -> "Estadisticas":
+        est = cls(suite)
+        est.filas = data["filas"]
+        est.columnas = {c: dict(st) for c, st in data["columnas"].items()}
+        est.fallas = dict(data["fallas"])
+        return est
+
+    def resultados(self) -> dict:
+        """
+        {clave: resultado} de cada expectativa de la suite; None si el motor no la soporta
+        o falta alguna de sus columnas (queda como "skipped" en el reporte).
+        """
+        n = self.filas
+        out = {}
+        for clave, tipo, cols, kw in self.suite:
+            nombres = (cols,) if isinstance(cols, str) else tuple(cols)
+            if tipo not in _ARGUMENTOS or any(c not in self.columnas for c in nombres):
+                out[clave] = None
+                continue
+            st = self.columnas[nombres[0]]
+            validos = n - st["nulos"]
+
+            if tipo == "not_null":
+                # GE no ignora nada en not_null: el porcentaje es sobre todas las filas
+                out[clave] = _mapa(n, n, st["nulos"], kw.get("mostly"))
+
+            elif tipo == "between":
+                out[clave] = _mapa(n, validos, self.fallas.get(clave, 0), kw.get("mostly"))
+
+            elif tipo == "of_type":
+                if st["texto"]:
+                    out[clave] = _mapa(n, validos, self.fallas.get(clave, 0), kw.get("mostly"))
+                else:
+                    out[clave] = {"success": st["dtype"] == _tipo_esperado(kw["type_"]),
+                                  "result": {"observed_value": st["dtype"]}}
+
+            elif tipo == "pair_gt":
+                fallas = self.fallas.get(clave, 0)
+                # Como la regla de la versión con pandas: sin "result", el reporte solo lleva success
+                out[clave] = {
+                    "success": fallas == 0,
+                    "unexpected_count": fallas,
+                    "unexpected_percent": round(fallas / n * 100, 4) if n else 0.0,
+                }
+        return out
+
+
+def _extremos(st: dict, minimo, maximo) -> None:
+    if minimo is not None and (st["min"] is None or minimo < st["min"]):
+        st["min"] = minimo
+    if maximo is not None and (st["max"] is None or maximo > st["max"]):
+        st["max"] = maximo
+
+
+def validar(tabla: pa.Table, suite) -> dict:
+    """Resultados de `suite` sobre una tabla completa en memoria."""
+    return Estadisticas(suite).acumular(tabla).resultados()
+
+
+def validar_lotes(lotes, suite) -> Estadisticas:
+    """Estadísticas de `suite` acumuladas sobre un iterable de lotes (la memoria es la de un lote)."""
+    est = Estadisticas(suite)
+    for lote in lotes:
+        est.acumular(lote)
+    return est
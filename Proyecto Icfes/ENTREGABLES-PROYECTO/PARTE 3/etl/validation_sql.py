@@ -0,0 +1,155 @@
+# etl/validation_sql.py
+"""
+La suite de great_expectations() compilada a una sola consulta de agregación sobre el DW
+(etl/sql/schema.sql), para validar lo que dejó load() sin traer filas a pandas: Postgres
+recorre fact_icfes una vez, con LEFT JOIN a cada dimensión, y devuelve una fila por periodo
+con
+
+- filas de hechos, y por columna de la suite nulos, mínimo y máximo;
+- por expectativa, las filas que fallan (fuera de rango, regla entre columnas);
+- por dimensión, las filas de hechos huérfanas (clave nula o sin fila en la dimensión).
+
+Cada columna de la suite se busca en fact_icfes o en la dimensión que la tiene, así que los
+conteos son por fila de hechos, como en el dataset curado. Cada fila del resultado se carga
+en un `Estadisticas` (etl/validation.py) y los resultados tienen la forma de los del motor
+native; una columna que no está en el DW (p. ej. estu_pais_reside) queda como "skipped".
+El módulo solo arma el SQL y lee las filas: la conexión la pone quien lo usa.
+"""
+from etl.validation import _ARGUMENTOS, Estadisticas, columnas_suite
+
+FACT = "fact_icfes"
+# Dimensión → clave (SERIAL) con que la referencia fact_icfes
+DIMENSIONES = {
+    "dim_departamento": "id_departamento",
+    "dim_municipio": "id_municipio",
+    "dim_contexto_socioeconomico": "id_contexto",
+    "dim_colegio": "id_colegio",
+    "dim_fecha": "id_fecha",
+}
+TABLAS = [FACT, *DIMENSIONES]
+
+# Columnas de las tablas del DW: {tabla: {columna: data_type}} con catalogo()
+SQL_CATALOGO = """
+SELECT table_name, column_name, data_type
+FROM information_schema.columns
+WHERE table_schema = current_schema() AND table_name = ANY(:tablas)
+ORDER BY table_name, ordinal_position
+"""
+
+# data_type de Postgres → dtype con que pd.read_sql entrega la columna (un entero con nulos
+# llega como float64); el texto cuenta como object, igual que en el motor native
+_ENTEROS = ("smallint", "integer", "bigint")
+_TEXTO = ("character varying", "character", "text")
+
+
+def _id(nombre: str) -> str:
+    return '"' + nombre.replace('"', '""') + '"'
+
+
+def catalogo(filas) -> dict:
+    """{tabla: {columna: data_type}} desde las filas de SQL_CATALOGO."""
+    out = {}
+    for tabla, columna, tipo in filas:
+        out.setdefault(tabla, {})[columna] = tipo
+    return out
+
+
+def ubicar(tablas: dict) -> dict:
+    """{columna: (tabla, data_type)}: cada columna en fact_icfes o en la primera dimensión que la tenga."""
+    out = {}
+    for tabla in TABLAS:
+        for columna, tipo in tablas.get(tabla, {}).items():
+            out.setdefault(columna, (tabla, tipo))
+    return out
+
+
+def compilar(suite, tablas: dict) -> tuple:
+    """
+    (sql, parámetros, salidas) de la consulta que valida `suite` sobre el DW descrito por
+    `tablas` (catalogo()). `salidas` nombra las columnas del resultado que siguen a periodo
+    y filas: ("nulos" | "min" | "max", columna), ("falla", clave) o ("huerfanas", dimensión).
+    """
+    if FACT not in tablas:
+        raise RuntimeError(f"No existe la tabla {FACT} en el DW (¿corrió load?)")
+    dims = [d for d in DIMENSIONES if d in tablas]
+    alias = {FACT: "f", **{d: f"d{i}" for i, d in enumerate(dims, 1)}}
+    donde = {c: t for c, (t, _) in ubicar(tablas).items() if t in alias}
+
+    def ref(c):
+        return f"{alias[donde[c]]}.{_id(c)}"
+
+    def param(valor):
+        nombre = f"p{len(params)}"
+        params[nombre] = valor
+        return f":{nombre}"
+
+    selects, salidas, params = [], [], {}
+    for c in columnas_suite(suite):
+        if c in donde:
+            selects += [f"count(*) FILTER (WHERE {ref(c)} IS NULL)", f"min({ref(c)})", f"max({ref(c)})"]
+            salidas += [("nulos", c), ("min", c), ("max", c)]
+
+    for clave, tipo, cols, kw in suite:
+        nombres = (cols,) if isinstance(cols, str) else tuple(cols)
+        if tipo not in _ARGUMENTOS or any(c not in donde for c in nombres):
+            continue
+        if tipo == "between":
+            fuera = []
+            if kw.get("min_value") is not None:
+                fuera.append(f"{ref(nombres[0])} {'<=' if kw.get('strict_min') else '<'} {param(kw['min_value'])}")
+            if kw.get("max_value") is not None:
+                fuera.append(f"{ref(nombres[0])} {'>=' if kw.get('strict_max') else '>'} {param(kw['max_value'])}")
+            condicion = " OR ".join(fuera) or "FALSE"
+        elif tipo == "pair_gt":
+            # Como en el motor native: un nulo en cualquiera de las dos cuenta como falla
+            condicion = f"({ref(nombres[0])} {'>=' if kw.get('or_equal') else '>'} {ref(nombres[1])}) IS NOT TRUE"
+        else:
+            continue
+        selects.append(f"count(*) FILTER (WHERE {condicion})")
+        salidas.append(("falla", clave))
+
+    for d in dims:
+        selects.append(f"count(*) FILTER (WHERE {alias[d]}.{_id(DIMENSIONES[d])} IS NULL)")
+        salidas.append(("huerfanas", d))
+
+    periodo = ref("periodo") if "periodo" in donde else "NULL"
+    joins = "".join(
+        f"\nLEFT JOIN {_id(d)} {alias[d]} ON {alias[d]}.{_id(DIMENSIONES[d])} = f.{_id(DIMENSIONES[d])}"
+        for d in dims
+    )
+    columnas = ",\n    ".join([f"{periodo} AS periodo", "count(*) AS filas", *selects])
+    sql = f"SELECT\n    {columnas}\nFROM {_id(FACT)} f{joins}\nGROUP BY 1\nORDER BY 1"
+    return sql, params, salidas
+
+
+def leer_fila(suite, tablas: dict, salidas: list, fila) -> tuple:
+    """(Estadisticas, {dimensión: huérfanas}) de una fila (un periodo) del resultado de compilar()."""
+    donde = ubicar(tablas)
+    est = Estadisticas(suite)
+    est.filas = int(fila[1])
+    huerfanas = {}
+    for (que, nombre), valor in zip(salidas, fila[2:]):
+        if que == "falla":
+            est.fallas[nombre] = int(valor)
+        elif que == "huerfanas":
+            huerfanas[nombre] = int(valor)
+        else:
+            tipo = donde[nombre][1]
+            st = est.columnas.setdefault(nombre, {
+                "texto": tipo in _TEXTO, "dtype": "int64" if tipo in _ENTEROS else "float64",
+                "nulos": 0, "min": None, "max": None,
+            })
+            st[que] = int(valor) if que == "nulos" else valor
+
+    for st in est.columnas.values():
+        if st["texto"]:
+            st["dtype"] = "object"
+        elif st["dtype"] == "int64" and st["nulos"]:
+            st["dtype"] = "float64"
+    # of_type sobre texto: como en el motor native, o todos los no nulos cumplen o ninguno
+    for clave, tipo, cols, kw in suite:
+        st = est.columnas.get(cols) if tipo == "of_type" else None
+        if st and st["texto"]:
+            ok = kw["type_"].lower() in ("str", "string_types")
+            est.fallas[clave] = 0 if ok else est.filas - st["nulos"]
+    return est, huerfanas